@@ -1,7 +1,13 @@
 from ursina import *
 from ursina.shaders import unlit_shader
+from panda3d.core import Filename
 from pathlib import Path
 import math
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "backend"))
+from app.gui.models3d import model_path
+from app.gui.neon_grid import make_neon_grid, scroll_neon_grid
 
 app = Ursina(borderless=False)
 
@@ -9,6 +15,13 @@ app = Ursina(borderless=False)
 application.asset_folder = Path(__file__).parent
 
 window.title = 'Chess Quiz Battle - Hologram Menu'
+
+
+def load_piece(name):
+    """.bam do manifest (python -m app.gui.models3d) ou, sem build, o .obj."""
+    path = model_path(name)
+    return app.loader.loadModel(Filename.fromOsSpecific(str(path))) if path else name
+
 window.color = color.black
 window.fullscreen = False
 
@@ -29,70 +42,7 @@ scene.fog_density = 0.04
 #  GRID NEON EM PERSPECTIVA
 # ---------------------------
 
-def make_neon_grid():
-    grid_color  = color.hex("#27943b")
-    parent = Entity()  # tudo do grid fica agrupado aqui
-
-    # --- linhas horizontais (faixas que vêm "pra frente") ---
-    grid_lines = 12        # quantas faixas
-    spacing_z = 1.5        # distância entre faixas
-    start_z = -8          # onde começa o grid
-    base_width = 26.0      # largura na faixa mais distante
-    width_growth = 3.2     # quanto aumenta a largura a cada faixa
-
-    for i in range(grid_lines):
-        z = start_z + i * spacing_z
-        width = base_width + i * width_growth
-        Entity(
-            parent=parent,
-            model='cube',
-            color=grid_color,
-            texture=None,
-            shader=unlit_shader,
-            position=(0, 0, z),
-            scale=(width, 0.03, 0.06),   # (largura, altura, "profundidade" da linha)
-        )
-
-    # --- linhas verticais que convergem no "horizonte" ---
-    vert_count = 5          # quantidade de linhas verticais
-    bottom_width = 20.0      # espalhamento na base (perto da câmera)
-    top_width = 60.0          # espalhamento lá no fundo (perto do horizonte)
-    horizon_z = start_z - spacing_z   # um pouco antes da primeira faixa
-    bottom_z = start_z + grid_lines * spacing_z
-
-    for j in range(-vert_count // 2, vert_count // 2 + 1):
-        t = j / float(vert_count // 2)    # -1 .. 1
-        x_top = t * top_width * 0.5
-        x_bottom = t * bottom_width * 0.5
-
-        # pontos inicial e final da linha
-        x1, z1 = x_top, horizon_z
-        x2, z2 = x_bottom, bottom_z
-
-        mid_x = (x1 + x2) / 2.0
-        mid_z = (z1 + z2) / 2.0
-        dx = x2 - x1
-        dz = z2 - z1
-        length = math.sqrt(dx * dx + dz * dz)
-
-        # ângulo da linha no plano XZ
-        angle_y = math.degrees(math.atan2(dx, dz))
-
-        Entity(
-            parent=parent,
-            model='cube',
-            color=grid_color,
-            texture=None,
-            shader=unlit_shader,
-            position=(mid_x, -0.6, mid_z),
-            rotation_y=angle_y,
-            scale=(0.06, 0.03, length),   # fino em X, comprido em Z
-        )
-
-    return parent
-
-
-grid_entity = make_neon_grid()
+grid_entity = make_neon_grid()   # app/gui/neon_grid.py: uma malha, um draw call
 
 
 # ---------------------------
@@ -106,7 +56,7 @@ shadow_color = color.hex("#1F1F1F")
 
 # Peça grande na frente, à esquerda
 pawn_front = Entity(
-    model='Queen hologram',                # seu Pawn.obj
+    model=load_piece('Queen hologram'),                # seu Pawn.obj
     position=(-8, -5, 5),       # x, y, z (mais perto da câmera)
     scale=3.2,
     rotation_y=110,
@@ -128,7 +78,7 @@ shadow_front = Entity(
 
 # Peça menor ao fundo, à direita
 pawn_back = Entity(
-    model='Knight hologram',     # seu Knight hologram.obj
+    model=load_piece('Knight hologram'),     # seu Knight hologram.obj
     position=(8, -1, 12),     # mais longe -> parece menor
     scale=1.8,
     rotation_y=-50,
@@ -155,6 +105,7 @@ base_y_back = pawn_back.y
 
 def update():
     t = time.time()
+    scroll_neon_grid(grid_entity, t)
 
     # leve pulsar no brilho (altera alpha da cor)
     a1 = 0.7 + 0.15 * math.sin(t * 6)
@@ -0,0 +1,80 @@
+# app/gui/frame_governor.py
+# governador de frame rate do viewer 3D: o duelo parado (peças flutuando, esperando
+# resposta) não precisa de 60 fps, e o viewer costuma dividir o notebook com o host.
+#
+#   active  -> entrada/troca de peças, giro da câmera, timer nos últimos segundos,
+#              estado novo ou input recente (e mais `linger` segundos depois disso)
+#   idle    -> duelo na tela sem nada mudando
+#   hidden  -> janela minimizada fora da fase "quiz"
+#
+# Só decide e mede; quem aplica o limite (ClockObject do Panda3D) é o viewer.
+import collections
+import time
+from typing import Deque, Dict, Optional
+
+ACTIVE_FPS = 60
+IDLE_FPS = 20
+HIDDEN_FPS = 10
+
+
+class FrameGovernor:
+    def __init__(self, active_fps: int = ACTIVE_FPS, idle_fps: int = IDLE_FPS,
+                 hidden_fps: int = HIDDEN_FPS, linger: float = 1.0, window: int = 600):
+        self.fps = {"active": active_fps, "idle": idle_fps, "hidden": hidden_fps}
+        self.linger = linger
+        self.mode: Optional[str] = None
+        self._busy_until = 0.0
+        self._frames: Deque[float] = collections.deque(maxlen=window)   # dt dos últimos frames
+        self._mode_frames: Dict[str, int] = {"active": 0, "idle": 0, "hidden": 0}
+
+    def poke(self, now: Optional[float] = None, hold: float = 0.0):
+        """Algo vai se mexer (input, estado novo, tween de `hold` s): sobe para active."""
+        now = time.monotonic() if now is None else now
+        self._busy_until = max(self._busy_until, now + max(hold, self.linger))
+
+    def frame(self, dt: float, visible: bool, busy: bool = False,
+              now: Optional[float] = None) -> Optional[int]:
+        """
+        Registra o frame e escolhe o modo do próximo. Devolve o fps novo quando o
+        modo muda (None = manter o limite atual).
+        """
+        now = time.monotonic() if now is None else now
+        if dt > 0:
+            self._frames.append(dt)
+        if busy:
+            self.poke(now)
+        if not visible:
+            mode = "hidden"
+        elif now < self._busy_until:
+            mode = "active"
+        else:
+            mode = "idle"
+        self._mode_frames[mode] += 1
+        if mode == self.mode:
+            return None
+        self.mode = mode
+        return self.fps[mode]
+
+    def stats(self) -> Dict[str, float]:
+        """Tempo de frame (ms) da janela recente: média, p50, p95, p99 e pior."""
+        if not self._frames:
+            return {}
+        ordered = sorted(self._frames)
+        n = len(ordered)
+
+        def pct(p: float) -> float:
+            return ordered[min(n - 1, int(p * n))] * 1000.0
+
+        mean = sum(ordered) / n
+        return {"frames": n, "fps": 1.0 / mean if mean else 0.0, "mean_ms": mean * 1000.0,
+                "p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99),
+                "max_ms": ordered[-1] * 1000.0}
+
+    def report(self) -> str:
+        s = self.stats()
+        if not s:
+            return "sem frames"
+        modes = " ".join(f"{m}={c}" for m, c in self._mode_frames.items())
+        return (f"{s['fps']:.1f} fps ({self.mode}, alvo {self.fps.get(self.mode)}) | frame ms "
+                f"p50 {s['p50_ms']:.1f} p95 {s['p95_ms']:.1f} p99 {s['p99_ms']:.1f} "
+                f"max {s['max_ms']:.1f} | frames por modo: {modes}")
@@ -0,0 +1,186 @@
+# app/gui/models3d.py
+# modelos 3D compilados: converte os .obj de assets/3d para .bam (formato nativo do
+# Panda3D) e escreve models_compressed/manifest.json com o hash de cada arquivo.
+#
+# Build (cd backend && python -m app.gui.models3d):
+#   - um processo por modelo (ProcessPoolExecutor), só para os .obj que mudaram;
+#   - níveis de LOD opcionais (--lod 0.5 --lod 0.25 = fração das faces), decimados
+#     com o pacote trimesh se ele estiver instalado.
+# Viewer (model_path): usa o .bam do manifest enquanto o .obj de origem tiver o mesmo
+# hash; senão devolve None e quem chamou carrega o .obj (lento, mas sempre funciona).
+#
+# Este módulo não importa panda3d/ursina no topo: o viewer lê o manifest antes de
+# criar a janela e o build só precisa do panda3d dentro dos workers.
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import trimesh  # opcional: decimação dos níveis de LOD
+except ImportError:
+    trimesh = None
+
+MODELS_DIR = Path(__file__).resolve().parents[3] / "assets" / "3d"
+COMPILED = "models_compressed"
+MANIFEST = "manifest.json"
+MANIFEST_VERSION = 1
+
+_manifest_cache: Dict[str, dict] = {}
+_resolved: Dict[tuple, Optional[Path]] = {}   # (src, nome, lod) -> .bam já conferido
+
+
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _level_name(stem: str, level: int) -> str:
+    return f"{stem}.bam" if level == 0 else f"{stem}.lod{level}.bam"
+
+
+def _convert(src: str, out_dir: str, ratios: Sequence[float]) -> dict:
+    """Roda num worker: .obj -> um .bam por nível. Devolve a entrada do manifest."""
+    from panda3d.core import Filename, Loader, LoaderOptions, NodePath
+
+    src_path = Path(src)
+    loader = Loader.get_global_ptr()
+    opts = LoaderOptions(LoaderOptions.LF_no_cache)
+    levels = []
+    for level, ratio in enumerate(ratios):
+        load_from = src_path
+        tmp = None
+        if ratio < 1.0:
+            mesh = trimesh.load(src_path, force="mesh")
+            faces = max(4, int(len(mesh.faces) * ratio))
+            mesh = mesh.simplify_quadric_decimation(face_count=faces)
+            tmp = tempfile.NamedTemporaryFile(suffix=".obj", delete=False)
+            tmp.close()
+            mesh.export(tmp.name)
+            load_from = Path(tmp.name)
+        try:
+            node = loader.load_sync(Filename.from_os_specific(str(load_from)), opts)
+            if node is None:
+                raise RuntimeError(f"panda3d não conseguiu ler {load_from.name}")
+            model = NodePath(node)
+            model.flatten_strong()   # um Geom só: menos trabalho por frame no viewer
+            target = Path(out_dir) / _level_name(src_path.stem, level)
+            if not model.write_bam_file(Filename.from_os_specific(str(target))):
+                raise RuntimeError(f"falha ao escrever {target.name}")
+        finally:
+            if tmp is not None:
+                os.unlink(tmp.name)
+        levels.append({"ratio": ratio, "file": target.name, "sha256": _sha256(target)})
+    return {"source": src_path.name, "sha256": _sha256(src_path), "levels": levels}
+
+
+def _up_to_date(entry: Optional[dict], src_hash: str, ratios: Sequence[float], out: Path) -> bool:
+    if not entry or entry.get("sha256") != src_hash:
+        return False
+    levels = entry.get("levels") or []
+    if [lv.get("ratio") for lv in levels] != list(ratios):
+        return False
+    return all((out / lv["file"]).exists() for lv in levels)
+
+
+def build(src: Path = MODELS_DIR, lods: Sequence[float] = (), workers: Optional[int] = None,
+          force: bool = False) -> dict:
+    """Compila os .obj de `src` em src/models_compressed e devolve o manifest."""
+    src = Path(src)
+    out = src / COMPILED
+    out.mkdir(exist_ok=True)
+    ratios = [1.0] + sorted({float(r) for r in lods if 0.0 < float(r) < 1.0}, reverse=True)
+    if len(ratios) > 1 and trimesh is None:
+        print("WARN models3d: trimesh não instalado, gerando só o nível 0 (sem LOD)")
+        ratios = [1.0]
+
+    previous = {} if force else load_manifest(src, reload=True).get("models", {})
+    models: Dict[str, dict] = {}
+    pending: List[Path] = []
+    for path in sorted(src.glob("*.obj")):
+        entry = previous.get(path.stem)
+        if _up_to_date(entry, _sha256(path), ratios, out):
+            models[path.stem] = entry
+        else:
+            pending.append(path)
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            jobs = {pool.submit(_convert, str(p), str(out), ratios): p for p in pending}
+            for job in as_completed(jobs):
+                path = jobs[job]
+                try:
+                    models[path.stem] = job.result()
+                    print(f"  {path.name} -> {', '.join(lv['file'] for lv in models[path.stem]['levels'])}")
+                except Exception as e:
+                    print(f"WARN models3d: {path.name}: {e}")
+
+    manifest = {"version": MANIFEST_VERSION, "models": dict(sorted(models.items()))}
+    (out / MANIFEST).write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+    _manifest_cache.pop(str(src), None)
+    return manifest
+
+
+def load_manifest(src: Path = MODELS_DIR, reload: bool = False) -> dict:
+    key = str(src)
+    if reload or key not in _manifest_cache:
+        try:
+            data = json.loads((Path(src) / COMPILED / MANIFEST).read_text(encoding="utf-8"))
+            if data.get("version") != MANIFEST_VERSION:
+                data = {}
+        except (OSError, ValueError):
+            data = {}
+        _manifest_cache[key] = data
+        _resolved.clear()
+    return _manifest_cache[key]
+
+
+def model_path(name: str, lod: int = 0, src: Path = MODELS_DIR) -> Optional[Path]:
+    """
+    .bam compilado para o modelo `name` (ex.: "Queen hologram") no nível `lod`
+    (se esse nível não existir, o próximo mais detalhado). None = carregar o .obj.
+    """
+    key = (str(src), name, lod)
+    if key not in _resolved:
+        _resolved[key] = _resolve(name, lod, src)
+    return _resolved[key]
+
+
+def _resolve(name: str, lod: int, src: Path) -> Optional[Path]:
+    entry = load_manifest(src).get("models", {}).get(name)
+    if not entry:
+        return None
+    source = Path(src) / entry["source"]
+    if source.exists() and _sha256(source) != entry["sha256"]:
+        print(f"WARN models3d: {source.name} mudou depois do build, usando o .obj "
+              "(rode python -m app.gui.models3d)")
+        return None
+    levels = entry.get("levels") or []
+    for level in levels[:max(0, lod) + 1][::-1]:
+        path = Path(src) / COMPILED / level["file"]
+        if path.exists():
+            return path
+    return None
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m app.gui.models3d",
+                                 description="Converte os modelos .obj do viewer 3D para .bam")
+    ap.add_argument("--src", default=str(MODELS_DIR), help="pasta dos .obj")
+    ap.add_argument("--lod", type=float, action="append", default=[],
+                    help="nível extra com esta fração das faces (repetível; precisa do trimesh)")
+    ap.add_argument("--workers", type=int, default=None, help="processos de conversão (padrão: nº de CPUs)")
+    ap.add_argument("--force", action="store_true", help="reconverte tudo, mesmo sem mudança")
+    args = ap.parse_args(argv)
+
+    manifest = build(Path(args.src), args.lod, args.workers, args.force)
+    print(f"{len(manifest['models'])} modelos em {Path(args.src) / COMPILED / MANIFEST}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+# app/gui/neon_grid.py
+# grade neon do chão do duelo 3D numa malha só: todas as linhas (faixas horizontais
+# e as que convergem no horizonte) viram quads de um único Mesh -- um nó no grafo de
+# cena e um draw call, em vez de um Entity('cube') por linha.
+#
+# As faixas horizontais andam em direção à câmera pelo vertex shader: o Python só
+# muda o uniform u_scroll por frame. Cada vértice de faixa leva no UV o lado (-1/+1)
+# e o z original da faixa; o shader recoloca a faixa em start + (z - scroll) mod span
+# e recalcula a largura para a nova posição. Linhas convergentes têm UV.x = 0 e não mexem.
+#
+# Usado pelo viewer (scenes/quiz.py) e por assets/3d/testeRenderizarPecas.py.
+import math
+from typing import List, Tuple
+
+GRID_COLOR = "#27943b"
+GRID_LINES = 12        # quantas faixas
+SPACING_Z = 1.5        # distância entre faixas
+START_Z = -8.0         # onde começa o grid
+BASE_WIDTH = 26.0      # largura da primeira faixa
+WIDTH_GROWTH = 3.2     # quanto aumenta a largura a cada faixa
+LINE_DEPTH = 0.06      # "espessura" das faixas no chão
+
+VERT_COUNT = 5         # linhas que convergem no horizonte
+BOTTOM_WIDTH = 20.0    # espalhamento na base (perto da câmera)
+TOP_WIDTH = 60.0       # espalhamento lá no fundo
+LINE_WIDTH = 0.06
+VERT_Y = -0.6
+
+SCROLL_SPEED = 1.2     # unidades de z por segundo
+
+_VERTEX = """
+#version 140
+uniform mat4 p3d_ModelViewProjectionMatrix;
+uniform float u_scroll;
+uniform float u_start;
+uniform float u_span;
+uniform float u_base_width;
+uniform float u_growth;      // largura a mais por unidade de z
+in vec4 p3d_Vertex;
+in vec2 p3d_MultiTexCoord0;
+
+void main() {
+    vec4 v = p3d_Vertex;
+    float side = p3d_MultiTexCoord0.x;
+    if (abs(side) > 0.5) {
+        float rel = mod(p3d_MultiTexCoord0.y - u_start - u_scroll, u_span);
+        v.z += (u_start + rel) - p3d_MultiTexCoord0.y;
+        v.x = side * 0.5 * (u_base_width + rel * u_growth);
+    }
+    gl_Position = p3d_ModelViewProjectionMatrix * v;
+}
+"""
+
+_FRAGMENT = """
+#version 140
+uniform vec4 p3d_ColorScale;
+out vec4 fragColor;
+
+void main() {
+    fragColor = p3d_ColorScale;
+}
+"""
+
+Vec = Tuple[float, float, float]
+
+
+def grid_geometry() -> Tuple[List[Vec], List[Tuple[int, int, int]], List[Tuple[float, float]]]:
+    """(vértices, triângulos, uvs) da grade inteira, em coordenadas locais."""
+    verts: List[Vec] = []
+    tris: List[Tuple[int, int, int]] = []
+    uvs: List[Tuple[float, float]] = []
+
+    def quad(corners, uv_of):
+        base = len(verts)
+        verts.extend(corners)
+        uvs.extend(uv_of(i) for i in range(4))
+        tris.extend(((base, base + 1, base + 2), (base, base + 2, base + 3)))
+
+    # --- faixas horizontais (UV = lado, z da faixa) ---
+    half_d = LINE_DEPTH / 2
+    for i in range(GRID_LINES):
+        z = START_Z + i * SPACING_Z
+        half_w = (BASE_WIDTH + i * WIDTH_GROWTH) / 2
+        quad(((-half_w, 0.0, z - half_d), (-half_w, 0.0, z + half_d),
+              (half_w, 0.0, z + half_d), (half_w, 0.0, z - half_d)),
+             lambda k, z=z: (-1.0 if k < 2 else 1.0, z))
+
+    # --- linhas que convergem no "horizonte" (UV = 0: fixas) ---
+    horizon_z = START_Z - SPACING_Z
+    bottom_z = START_Z + GRID_LINES * SPACING_Z
+    half_l = LINE_WIDTH / 2
+    for j in range(-VERT_COUNT // 2, VERT_COUNT // 2 + 1):
+        t = j / float(VERT_COUNT // 2 or 1)
+        x1, z1 = t * TOP_WIDTH * 0.5, horizon_z
+        x2, z2 = t * BOTTOM_WIDTH * 0.5, bottom_z
+        length = math.hypot(x2 - x1, z2 - z1)
+        nx, nz = (z2 - z1) / length * half_l, -(x2 - x1) / length * half_l   # normal no chão
+        quad(((x1 - nx, VERT_Y, z1 - nz), (x2 - nx, VERT_Y, z2 - nz),
+              (x2 + nx, VERT_Y, z2 + nz), (x1 + nx, VERT_Y, z1 + nz)),
+             lambda k: (0.0, 0.0))
+
+    return verts, tris, uvs
+
+
+def make_neon_grid(parent=None):
+    """Entity com a grade inteira (um Mesh estático + shader da rolagem)."""
+    from ursina import Entity, Mesh, Shader, color
+
+    verts, tris, uvs = grid_geometry()
+    mesh = Mesh(vertices=verts, triangles=tris, uvs=uvs, mode="triangle", static=True)
+    grid = Entity(model=mesh, color=color.hex(GRID_COLOR), double_sided=True,
+                  shader=Shader(language=Shader.GLSL, vertex=_VERTEX, fragment=_FRAGMENT))
+    if parent is not None:
+        grid.parent = parent
+    for name, value in (("u_scroll", 0.0), ("u_start", START_Z), ("u_span", GRID_LINES * SPACING_Z),
+                        ("u_base_width", BASE_WIDTH), ("u_growth", WIDTH_GROWTH / SPACING_Z)):
+        grid.set_shader_input(name, value)
+    return grid
+
+
+def scroll_neon_grid(grid, t: float):
+    """Posição da rolagem no instante t (segundos). Único trabalho por frame da grade."""
+    grid.set_shader_input("u_scroll", (t * SCROLL_SPEED) % (GRID_LINES * SPACING_Z))
@@ -1,16 +1,24 @@
 # backend/app/gui/scenes/lobby.py
+import atexit
 import math
+import os
 import random
+import subprocess
 from pathlib import Path
 
 import pygame
 import qrcode
 from app.gui.assets import font_consolas
 from app.gui.scene_manager import Scene, SceneResult
-from realtime.server import create_app, get_local_ip, run_uvicorn_in_bg as run_bg
+from realtime.server import create_app, get_local_ip, run_uvicorn_in_bg as run_bg, run_workers
+from realtime.bus import SocketBus, run_broker_in_bg
+from realtime.cluster import ClusterNode
 
 START_GAME_EVENT = pygame.USEREVENT + 1
 
+# >1 = workers uvicorn extras atendendo os celulares (o host continua dono da sala)
+REALTIME_WORKERS = int(os.getenv("REALTIME_WORKERS", "1"))
+
 NEON = (20, 230, 60)
 FG   = (220, 255, 220)
 
@@ -144,6 +152,9 @@ class LobbyScene(Scene):
 
     def __init__(self, window_size: tuple[int,int]):
         self.win_w, self.win_h = window_size
+        self.workers_proc = None      # uvicorn --workers (REALTIME_WORKERS > 1)
+        self._starting_game = False   # saindo para o jogo: os workers continuam servindo a sala
+        atexit.register(self._stop_workers)
 
     def enter(self, ctx):
         self.ctx = ctx
@@ -185,10 +196,21 @@ class LobbyScene(Scene):
         if not static_dir.is_dir():
             raise RuntimeError(f"Pasta estática não encontrada: {static_dir}")
 
-        app = create_app(static_dir=str(static_dir), game_ctx=self.game_ctx)
-        run_bg(app, host="0.0.0.0", port=port)
+        self._starting_game = False
+        self._stop_workers()   # os de uma visita anterior ao lobby ainda seguram a porta
+        if REALTIME_WORKERS > 1:
+            # host fica numa porta interna; a porta pública é servida pelos workers de borda
+            _, broker = run_broker_in_bg()
+            cluster = ClusterNode(SocketBus(broker), hosting=True)
+            app = create_app(static_dir=str(static_dir), game_ctx=self.game_ctx, cluster=cluster)
+            run_bg(app, host="127.0.0.1", port=port + 1)
+            self.workers_proc, _ = run_workers(static_dir, "0.0.0.0", port, REALTIME_WORKERS, broker=broker)
+        else:
+            app = create_app(static_dir=str(static_dir), game_ctx=self.game_ctx)
+            run_bg(app, host="0.0.0.0", port=port)
         self.fastapi_app = app
         self.conn_mgr    = app.state.conn_manager
+        self.actor       = app.state.actor   # dono do game_ctx (fila de comandos)
 
         # QR central (escala responsiva)
         s = min(self.win_w, self.win_h)
@@ -200,7 +222,19 @@ class LobbyScene(Scene):
         self.countdown_left    = None   # float ou None
         self.countdown_running = False
 
-    def leave(self): pass
+    def leave(self):
+        if not self._starting_game:
+            self._stop_workers()
+
+    def _stop_workers(self):
+        """Encerra os workers de borda (sem o broker do host eles só seguram a porta)."""
+        proc, self.workers_proc = self.workers_proc, None
+        if proc is not None and proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
 
     def _recalc_qr(self):
         w, h = self.screen.get_size()
@@ -220,8 +254,10 @@ class LobbyScene(Scene):
                         "app": self.fastapi_app,
                         "conn_mgr": self.conn_mgr,
                         "game_ctx": self.game_ctx,
+                        "actor": self.actor,
                         "ws_url": self.ws_url,
                     }}
+                    self._starting_game = True
                     return SceneResult(next_scene="game", payload=payload)
         if ev.type == START_GAME_EVENT:
             # segurança extra: confirma se ainda tem 2 jogadores
@@ -231,8 +267,10 @@ class LobbyScene(Scene):
                     "app": self.fastapi_app,
                     "conn_mgr": self.conn_mgr,
                     "game_ctx": self.game_ctx,
+                    "actor": self.actor,
                     "ws_url": self.ws_url,
                 }}
+                self._starting_game = True
                 return SceneResult(next_scene="game", payload=payload)
         if ev.type == pygame.VIDEORESIZE:
             self._recalc_qr()
@@ -262,25 +300,13 @@ class LobbyScene(Scene):
                     p1_name = players[0].get("name", "Player 1") if len(players) >= 1 else "Player 1"
                     p2_name = players[1].get("name", "Player 2") if len(players) >= 2 else "Player 2"
 
-                    if self.game_ctx is None:
-                        self.game_ctx = {}
-
-                    # estrutura que o GameScene espera
-                    self.game_ctx["players"] = {
+                    # estrutura que o GameScene espera (gravada pelo ator, não direto)
+                    self.actor.update(players={
                         "whiteName": p1_name,
                         "blackName": p2_name,
                         "p1": p1_name,
                         "p2": p2_name,
-                    }
-
-                    payload = {
-                        "realtime": {
-                            "app": self.fastapi_app,
-                            "conn_mgr": self.conn_mgr,
-                            "game_ctx": self.game_ctx,
-                            "ws_url": self.ws_url,
-                        }
-                    }
+                    }).result()
 
                     self.countdown_running = False
                     self.countdown_left = None
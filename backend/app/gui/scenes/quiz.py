@@ -14,21 +14,43 @@ if str(BACKEND_ROOT) not in sys.path:
     sys.path.append(str(BACKEND_ROOT))
     
 from realtime.server import get_local_ip
+from realtime.wire import WireDecoder
+from realtime.clock import ClockSync
+from realtime.localipc import LocalStateReader
+from realtime.prefetch import QUESTION_WRAP, CHOICE_WRAP, apply_wrap, wrap_points
+from app.gui.models3d import model_path
+from app.gui.frame_governor import FrameGovernor
+from app.gui.neon_grid import make_neon_grid, scroll_neon_grid
 
 from ursina import *
 from ursina.shaders import unlit_shader
+from panda3d.core import ClockObject, Filename, WindowProperties
 
 # ================= CONFIG =================
 
 PORT = 8765
 
-WS_URL = os.getenv("QUIZ_WS_URL") or f"ws://{get_local_ip()}:{PORT}/ws"
+WS_URL = os.getenv("QUIZ_WS_URL")   # sem isso: ws://<ip local>:PORT/ws
 VIEWER_NAME = "Hologram Viewer"
+WS_ENCODING = os.getenv("QUIZ_WS_ENCODING", "json")   # "binary" -> realtime/wire.py
 DEBUG_LOCAL = False
 
 latest_state = None
 latest_state_lock = threading.Lock()
+CLOCK = ClockSync()          # offset para o relógio do servidor (ping/pong)
+# aberto pelo jogo na mesma máquina: estado pela memória compartilhada, sem WS nem JSON
+LOCAL = None if DEBUG_LOCAL or os.getenv("QUIZ_WS_URL") else LocalStateReader.from_env()
+if LOCAL is not None:
+    CLOCK.assume_same_clock()
+PING_BURST = 5               # pings seguidos logo depois de conectar
+PING_INTERVAL = 10.0         # depois, um a cada N segundos
 QUIZ_TOTAL_TIME = 20.0
+GOVERNOR = FrameGovernor()   # fps por modo (active/idle/hidden), ver app/gui/frame_governor.py
+TIMER_CRITICAL = 5.0         # últimos segundos da vez: timer em fps cheio
+FRAME_STATS_EVERY = float(os.getenv("QUIZ_FRAME_STATS", "30"))   # s entre relatórios; 0 = desliga
+# modelos carregados uma vez na subida: um duelo novo só troca o modelo da entidade
+MODEL_LOD = int(os.getenv("QUIZ_MODEL_LOD", "0"))   # nível do models3d (0 = malha completa)
+PIECE_MODELS = tuple(f"{p} hologram" for p in ("Pawn", "Knight", "Bishop", "Rook", "Queen", "King"))
 
 FAKE_QUIZ = {
     "battleId": 1,
@@ -74,6 +96,9 @@ def _calc_turn_remaining(quiz: dict) -> tuple[float, float]:
     side = quiz.get("currentSide", "white")
     pool = quiz.get("timePool") or {}
     started = quiz.get("turnStartedAt")
+    deadline = quiz.get("deadline")
+    if isinstance(pool, dict) and side in pool and deadline and CLOCK.synced:
+        return CLOCK.remaining(float(deadline)), float(pool.get(side, 0.0))
     if isinstance(pool, dict) and side in pool and started:
         bank = float(pool.get(side, 0.0))
         elapsed = max(0.0, time.time() - float(started))
@@ -84,65 +109,13 @@ def _calc_turn_remaining(quiz: dict) -> tuple[float, float]:
     mx  = float(quiz.get("maxTime", 15))
     return max(0.0, min(rem, mx)), mx
     
-def _make_neon_grid():
-    grid_color = color.hex("#27943b")
-    parent = Entity(parent=camera_pivot)
-
-    # --- linhas horizontais (faixas que vêm "pra frente") ---
-    grid_lines = 12        # quantas faixas
-    spacing_z = 1.5        # distância entre faixas
-    start_z = -8           # onde começa o grid
-    base_width = 26.0      # largura na faixa mais distante
-    width_growth = 3.2     # quanto aumenta a largura a cada faixa
-
-    for i in range(grid_lines):
-        z = start_z + i * spacing_z
-        width = base_width + i * width_growth
-        Entity(
-            parent=parent,
-            model='cube',
-            color=grid_color,
-            texture=None,
-            shader=unlit_shader,
-            position=(0, 0, z),
-            scale=(width, 0.03, 0.06),
-        )
-
-    # --- linhas verticais que convergem no "horizonte" ---
-    vert_count = 5          # quantidade de linhas verticais
-    bottom_width = 20.0     # espalhamento na base (perto da câmera)
-    top_width = 60.0        # espalhamento lá no fundo (perto do horizonte)
-    horizon_z = start_z - spacing_z
-    bottom_z = start_z + grid_lines * spacing_z
-
-    for j in range(-vert_count // 2, vert_count // 2 + 1):
-        t = j / float(vert_count // 2 or 1)  # -1 .. 1
-        x_top = t * top_width * 0.5
-        x_bottom = t * bottom_width * 0.5
-
-        x1, z1 = x_top, horizon_z
-        x2, z2 = x_bottom, bottom_z
-
-        mid_x = (x1 + x2) / 2.0
-        mid_z = (z1 + z2) / 2.0
-        dx = x2 - x1
-        dz = z2 - z1
-        length = math.sqrt(dx * dx + dz * dz)
-
-        angle_y = math.degrees(math.atan2(dx, dz))
-
-        Entity(
-            parent=parent,
-            model='cube',
-            color=grid_color,
-            texture=None,
-            shader=unlit_shader,
-            position=(mid_x, -0.6, mid_z),
-            rotation_y=angle_y,
-            scale=(0.06, 0.03, length),
-        )
-
-    return parent
+# arco do timer: a volta inteira dividida em ARC_STEPS fatias, calculadas uma vez
+ARC_STEPS = 90
+_ARC_RIM = [
+    Vec3(math.cos(math.radians(-90 - 360 * i / ARC_STEPS)), math.sin(math.radians(-90 - 360 * i / ARC_STEPS)), 0)
+    for i in range(ARC_STEPS + 1)
+]
+_ARC_TRIANGLES = [(0, i + 1, i) for i in range(1, ARC_STEPS + 1)]
 
 
 # ================= CENA 3D =================
@@ -180,6 +153,7 @@ class DuelScene(Entity):
         self._do_entry_anim = False
 
         self.current_side = "white"
+        self._duel_gen = 0   # muda a cada duelo: invalida callbacks de animação pendentes
 
         self.ui_player = Text(
             text="",
@@ -199,6 +173,19 @@ class DuelScene(Entity):
         - is_left=True  -> peça da frente, à esquerda (pawn_front)
         - is_left=False -> peça menor, ao fundo, à direita (pawn_back)
         """
+        piece = Entity(parent=self, texture=None, shader=unlit_shader)
+        shadow = Entity(
+            parent=self,
+            model='circle',
+            color=self.SHADOW_BASE,
+            rotation_x=90,
+            shader=unlit_shader,
+        )
+        self._place_piece(piece, shadow, model_name, is_left, color_piece)
+        return piece, shadow
+
+    def _place_piece(self, piece, shadow, model_name: str, is_left: bool, color_piece):
+        """Reposiciona uma peça já existente para um duelo novo (troca só modelo e cor)."""
         if is_left:
             x, y, z = -9, -7, 5
             scale_val = 3.8
@@ -210,34 +197,27 @@ class DuelScene(Entity):
             rot_y = -50
             shadow_scale = (2.4, 2.4, 2.4)
 
-        piece = Entity(
-            parent=self,
-            model=model_name,
-            position=Vec3(x, y - 15, z),  # começa fora da tela para a animação de entrada
-            scale=scale_val,
-            rotation_y=rot_y,
-            color=color_piece,
-            texture=None,
-            shader=unlit_shader,
-        )
+        # animações da troca frente/trás do duelo anterior não podem continuar
+        for ent in (piece, shadow):
+            for anim in list(getattr(ent, "animations", ())):
+                anim.kill()
 
-        shadow = Entity(
-            parent=self,
-            model='circle',
-            color=self.SHADOW_BASE,
-            rotation_x=90,
-            position=piece.position + Vec3(0, -0.78, 0),
-            scale=shadow_scale,
-            shader=unlit_shader,
-        )
+        if getattr(piece, "model_name", None) != model_name:
+            piece.model = piece_model(model_name)   # já está no cache (preload_models)
+            piece.model_name = model_name
+        piece.position = Vec3(x, y - 15, z)  # começa fora da tela para a animação de entrada
+        piece.scale = scale_val
+        piece.rotation_y = rot_y
+        piece.color = color_piece
+
+        shadow.position = piece.position + Vec3(0, -0.78, 0)
+        shadow.scale = shadow_scale
 
         if is_left:
             self._base_y_left = y
         else:
             self._base_y_right = y
 
-        return piece, shadow
-    
     def swap_front_back(self, duration=0.6):
         """
         Anima a troca: quem estava na frente e grande vai para trás e menor,
@@ -289,8 +269,14 @@ class DuelScene(Entity):
         self.right_shadow.animate_position(piece_R_target["pos"] + Vec3(0, -0.78, 0), duration=duration, curve=curve.in_out_quad)
         self.right_shadow.animate_scale(piece_R_target["shadow_scale"], duration=duration, curve=curve.in_out_quad)
 
+        GOVERNOR.poke(hold=duration)
+
         # depois que a animação terminar, atualiza as bases do "flutuar"
+        gen = self._duel_gen
+
         def _apply_bases():
+            if gen != self._duel_gen:
+                return  # outro duelo começou no meio da animação
             self._base_y_left  = piece_L_target["pos"].y
             self._base_y_right = piece_R_target["pos"].y
             self.is_flipped = not self.is_flipped # <-- ESSA INVERSÃO É FUNDAMENTAL
@@ -316,26 +302,30 @@ class DuelScene(Entity):
         def neon(c):
             return self.GREEN_WHITE if c == "white" else self.CYAN_BLACK
 
-        for ent in (self.left_piece, self.right_piece, self.left_shadow, self.right_shadow):
-            if ent:
-                destroy(ent)
-
-        self.left_piece, self.left_shadow = self._make_piece_with_shadow(
-            model_name=attacker_model,
-            is_left=True,
-            color_piece=neon(attacker_color),
-        )
-        self.right_piece, self.right_shadow = self._make_piece_with_shadow(
-            model_name=defender_model,
-            is_left=False,
-            color_piece=neon(defender_color),
-        )
+        # as entidades vivem o processo todo; um duelo novo só troca modelo/cor/posição
+        self._duel_gen += 1
+        if self.left_piece is None:
+            self.left_piece, self.left_shadow = self._make_piece_with_shadow(
+                model_name=attacker_model,
+                is_left=True,
+                color_piece=neon(attacker_color),
+            )
+            self.right_piece, self.right_shadow = self._make_piece_with_shadow(
+                model_name=defender_model,
+                is_left=False,
+                color_piece=neon(defender_color),
+            )
+        else:
+            self._place_piece(self.left_piece, self.left_shadow, attacker_model, True, neon(attacker_color))
+            self._place_piece(self.right_piece, self.right_shadow, defender_model, False, neon(defender_color))
+        for anim in list(getattr(camera_pivot, "animations", ())):
+            anim.kill()
 
         self.is_flipped = False
 
         self.current_side = current_side
         self._entry_t = 0.0
-        self._do_entry_anim = True
+        self._do_entry_anim = True   # step() mantém o governador em active até terminar
 
         self.ui_player.text = f"Vez das {'Brancas' if current_side == 'white' else 'Pretas'}"
 
@@ -378,6 +368,7 @@ class DuelScene(Entity):
             duration=1.7,
             curve=curve.in_out_quad
         )
+        GOVERNOR.poke(hold=1.7)
 
         if do_swap:
             self.swap_front_back()
@@ -425,6 +416,12 @@ class QuizUI(Entity):
         self.current_side = "white"
         self.enabled = False
 
+        # caches: a pergunta muda uma vez por vez, o timer muda a cada frame
+        self._wrap_cache: dict[tuple[str, int], str] = {}
+        self._scale_cache: dict[tuple, float] = {}
+        self._timer_secs = None   # último número desenhado no centro do timer
+        self._arc_step = None     # último preenchimento do arco (em ARC_STEPS)
+
         # -----------------------------
         # Caixa da Pergunta
         # -----------------------------
@@ -551,6 +548,18 @@ class QuizUI(Entity):
             position=(0, -0.2),
         )
 
+    def set_visible(self, flag: bool):
+        """Os elementos ficam em camera.ui (não são filhos deste Entity): liga/desliga um a um."""
+        self.enabled = flag
+        for ent in (self.box_question, self.text_question, self.timer_bar):
+            ent.enabled = flag
+        for btn in self.answers:
+            btn.enabled = flag
+            btn.text_entity.enabled = flag
+        if not flag:
+            self.ko_label.enabled = False
+            self.win_label.enabled = False
+
     # -----------------------------
     # Cria os botões de alternativas
     # -----------------------------
@@ -596,7 +605,14 @@ class QuizUI(Entity):
         """
         Ajusta txt.scale automaticamente para caber dentro de max_width x max_height.
         Não usa application.step(), só recalcula de forma aproximada.
+        O resultado fica em cache por texto/caixa: medir o Text é o passo caro.
         """
+        key = (txt.text, round(max_width, 4), round(max_height, 4), min_scale, max_scale)
+        cached = self._scale_cache.get(key)
+        if cached is not None:
+            txt.scale = cached
+            return
+
         txt.scale = max_scale
 
         # Faz algumas iterações reduzindo até caber ou chegar no mínimo
@@ -607,6 +623,8 @@ class QuizUI(Entity):
 
             txt.scale *= 0.96
 
+        self._scale_cache[key] = txt.scale_x
+
     # -----------------------------
     # Quebra de linha manual (sem usar Text.wordwrap)
     # -----------------------------
@@ -615,32 +633,25 @@ class QuizUI(Entity):
         Quebra o texto em linhas de até 'limit' caracteres, tentando
         quebrar em espaços. Retorna uma string com '\n'.
         """
-        words = (text or "").split()
-        if not words:
-            return ""
-
-        lines = []
-        current = words[0]
-
-        for w in words[1:]:
-            if len(current) + 1 + len(w) <= limit:
-                current += " " + w
-            else:
-                lines.append(current)
-                current = w
-
-        lines.append(current)
-        return "\n".join(lines)
+        key = (text or "", limit)
+        cached = self._wrap_cache.get(key)
+        if cached is None:
+            # mesmo algoritmo do servidor (realtime/prefetch.py), que normalmente já manda pronto
+            cached = self._wrap_cache[key] = apply_wrap(key[0], wrap_points(key[0], limit))
+        return cached
 
 
     # -----------------------------
     # Layout completo: lado, pergunta, alternativas
     # -----------------------------
-    def update_layout(self, side: str, question: str, alternatives: list[str]):
+    def update_layout(self, side: str, question: str, alternatives: list[str], layout=None):
         self.current_side = side
 
-        # Quebra de linha suave
-        wrapped_q = self._wrap_text(question, 55)
+        # Quebra de linha suave (quiz["layout"] do servidor, senão calcula aqui)
+        if layout:
+            wrapped_q = apply_wrap(question, layout.get("q") or [])
+        else:
+            wrapped_q = self._wrap_text(question, QUESTION_WRAP)
         self.text_question.text = wrapped_q
 
         # Ajuste dinâmico da altura da box
@@ -694,7 +705,12 @@ class QuizUI(Entity):
                 # 2) texto da alternativa
                 alt = alternatives[i] if i < len(alternatives) else ""
                 txt = btn.text_entity
-                txt.text = f"{chr(97+i)}. {self._wrap_text(alt, 25)}"
+                alt_points = (layout.get("c") or []) if layout else []
+                if i < len(alt_points):
+                    wrapped_alt = apply_wrap(alt, alt_points[i])
+                else:
+                    wrapped_alt = self._wrap_text(alt, CHOICE_WRAP)
+                txt.text = f"{chr(97+i)}. {wrapped_alt}"
 
                 btn_inner_w = btn.scale_x * 2 - 0.04
                 btn_inner_h = btn.scale_y * 2 - 0.02
@@ -712,30 +728,20 @@ class QuizUI(Entity):
         """
         Atualiza o Mesh do arco. ratio vai de 0.0 a 1.0 (1.0 = cheio).
         Desenha o preenchimento regressivo (quanto falta).
+        Só regera o Mesh quando o arco muda de passo (1/ARC_STEPS da volta).
         """
-        steps = 90  # mais steps = arco mais suave
-        angle_span = 360 * ratio
+        step = int(round(max(0.0, min(1.0, ratio)) * ARC_STEPS))
+        if step == self._arc_step:
+            return
+        self._arc_step = step
 
-        # Centro fixo no índice 0
+        # Centro fixo no índice 0 + vértices da borda (tabela pré-calculada)
         vertices = [Vec3(0, 0, 0)]
+        vertices += _ARC_RIM[:step + 1]
 
-        # Gera vértices da borda
-        for i in range(steps + 1):
-            prop_i = i / steps
-            a = -90 - (prop_i * angle_span)
-            ang = math.radians(a)
-            x = math.cos(ang)
-            y = math.sin(ang)
-            vertices.append(Vec3(x, y, 0))
-
-        # Gera índices de triângulos em modo "triangle"
-        triangles = []
-        for i in range(1, len(vertices) - 1):
-            # sempre usando o centro (0) + dois pontos consecutivos da borda
-            triangles.append((0, i + 1, i ))
-
+        # triângulos em leque: sempre o centro (0) + dois pontos consecutivos da borda
         self.arc_mesh.vertices = vertices
-        self.arc_mesh.triangles = triangles
+        self.arc_mesh.triangles = _ARC_TRIANGLES[:max(0, step)]
         self.arc_mesh.generate()
 
 
@@ -751,8 +757,11 @@ class QuizUI(Entity):
         # opcional: trilho mostrando o "banco" do jogador logo ao começar o turno (ex: 14/20)
         frac_bank = max(0.0, min(1.0, bank_for_side / total))
 
-        # número no centro
-        self.timer_text.text = str(int(math.ceil(remaining)))
+        # número no centro (só troca o texto quando o segundo muda)
+        secs = int(math.ceil(remaining))
+        if secs != self._timer_secs:
+            self._timer_secs = secs
+            self.timer_text.text = str(secs)
 
         # barra inferior proporcional ao TOTAL
         self.timer_bar.scale_x = 0.80 * frac_remaining
@@ -790,24 +799,46 @@ class QuizUI(Entity):
 
 # ================= WS EM THREAD =================
 
+async def _ping_loop(ws):
+    for i in range(PING_BURST):
+        await ws.send(json.dumps(CLOCK.ping()))
+        await asyncio.sleep(0.2)
+    while True:
+        await asyncio.sleep(PING_INTERVAL)
+        await ws.send(json.dumps(CLOCK.ping()))
+
+
 async def ws_consumer():
     import websockets  # pip install websockets
 
+    url = WS_URL or f"ws://{get_local_ip()}:{PORT}/ws"
     while True:
         try:
-            print(f"[quiz3d_client] Conectando em {WS_URL}...")
-            async with websockets.connect(WS_URL) as ws:
-                join_msg = {"type": "join", "name": VIEWER_NAME, "avatar": None}
+            print(f"[quiz3d_client] Conectando em {url}...")
+            async with websockets.connect(url) as ws:
+                # só o quiz (e a fase): lances e lobby nem chegam até aqui
+                join_msg = {"type": "join", "name": VIEWER_NAME, "avatar": None,
+                            "encoding": WS_ENCODING, "role": "spectator", "topics": ["quiz"]}
                 await ws.send(json.dumps(join_msg))
-
-                async for raw in ws:
-                    try:
-                        data = json.loads(raw)
-                    except Exception:
-                        continue
-
-                    if data.get("type") == "state":
-                        set_latest_state(data)
+                decoder = WireDecoder()
+                pinger = asyncio.ensure_future(_ping_loop(ws))
+
+                try:
+                    async for raw in ws:
+                        try:
+                            # antes do join o servidor ainda fala JSON
+                            data = decoder.feed(raw) if isinstance(raw, bytes) else json.loads(raw)
+                        except Exception:
+                            continue
+                        if data is None:
+                            continue
+
+                        if data.get("type") == "state":
+                            set_latest_state(data)
+                        elif data.get("type") == "pong":
+                            CLOCK.on_pong(data)
+                finally:
+                    pinger.cancel()
         except Exception as e:
             print(f"[quiz3d_client] Erro WS: {e}")
             await asyncio.sleep(2.0)
@@ -864,18 +895,112 @@ duel_scene.scene_root = scene_pivot
 quiz_ui = QuizUI()
 quiz_ui.enabled = False
 
-_grid_entity = _make_neon_grid()
+_grid_entity = make_neon_grid(parent=camera_pivot)   # uma malha, um draw call
 
 _last_battle_id = None
 _last_phase = None
-_ever_had_quiz = False  # para saber quando sair do quiz e fechar
+_last_layout_key = None   # (battleId, vez, pergunta, alternativas) do último layout
+_duel_visible = None  # None = ainda não decidiu (sobe minimizado até o primeiro quiz)
 
 
-def update():
-    global _last_battle_id, _last_phase, _ever_had_quiz, _fake_timer_value, FAKE_QUIZ
+def piece_model(name: str):
+    """
+    Modelo de uma peça: o .bam compilado pelo app.gui.models3d (cache do loader do
+    Panda3D, cada chamada devolve uma cópia) ou, sem build, o nome do .obj para o Ursina.
+    """
+    path = model_path(name, MODEL_LOD)
+    if path is None:
+        return name
+    return app.loader.loadModel(Filename.fromOsSpecific(str(path)))
+
+
+def preload_models():
+    """Carrega os modelos das peças para o cache antes do primeiro duelo."""
+    t0 = time.perf_counter()
+    for name in PIECE_MODELS:
+        try:
+            model = piece_model(name)
+            if isinstance(model, str):
+                load_model(model)
+        except Exception as e:
+            print(f"[quiz3d_client] WARN modelo {name}: {e}")
+    print(f"[quiz3d_client] {len(PIECE_MODELS)} modelos carregados em {time.perf_counter() - t0:.2f}s")
+
+
+def set_duel_visible(flag: bool):
+    """
+    Fora da fase 'quiz' o viewer não fecha: esconde a cena e minimiza a janela,
+    mantendo Panda3D, modelos e WebSocket prontos para o próximo duelo.
+    """
+    global _duel_visible, _last_battle_id, _last_layout_key
+    if flag == _duel_visible:
+        return
+    _duel_visible = flag
+
+    quiz_ui.set_visible(flag)
+    _grid_entity.enabled = flag
+    duel_scene.ui_player.enabled = flag
+    if not flag:
+        duel_scene.enabled = False
+        _last_battle_id = None   # o próximo quiz sempre remonta o duelo
+        _last_layout_key = None
+
+    props = WindowProperties()
+    props.setMinimized(not flag)
+    if flag:
+        props.setForeground(True)
+    try:
+        app.win.requestProperties(props)
+    except Exception as e:
+        print("[quiz3d_client] WARN janela:", e)
+
+
+_clock_obj = ClockObject.getGlobalClock()
+_last_state = None
+_stats_at = time.monotonic()
+
+
+def _apply_fps(mode: str, fps: int):
+    """Limite do loop do Panda3D. Escondido com canal local, quem segura o frame é o pipe."""
+    if mode == "hidden" and LOCAL is not None and LOCAL.notify_fd is not None:
+        _clock_obj.setMode(ClockObject.MNormal)
+    else:
+        _clock_obj.setMode(ClockObject.MLimited)
+        _clock_obj.setFrameRate(fps)
+
 
+def _govern(dt: float, remaining: float | None):
+    global _stats_at
+    busy = duel_scene._do_entry_anim or mouse.moving or (
+        remaining is not None and 0.0 < remaining <= TIMER_CRITICAL)
+    fps = GOVERNOR.frame(dt, visible=bool(_duel_visible), busy=busy)
+    if fps is not None:
+        _apply_fps(GOVERNOR.mode, fps)
+    now = time.monotonic()
+    if FRAME_STATS_EVERY > 0 and now - _stats_at >= FRAME_STATS_EVERY:
+        _stats_at = now
+        print(f"[quiz3d_client] {GOVERNOR.report()}")
+
+
+def input(key):
+    GOVERNOR.poke()
+
+
+def update():
     dt = time.dt
     duel_scene.step(dt)
+    if _duel_visible:
+        scroll_neon_grid(_grid_entity, time.monotonic())
+    _govern(dt, _update_state(dt))
+
+
+def _update_state(dt: float):
+    """Lê o estado e atualiza cena/UI. Devolve o tempo restante da vez (None sem duelo)."""
+    global _last_battle_id, _last_phase, _last_layout_key, _last_state, _fake_timer_value, FAKE_QUIZ
+
+    if not _duel_visible and LOCAL is not None and LOCAL.notify_fd is not None:
+        # minimizado: dorme no pipe do host e acorda assim que o estado mudar
+        LOCAL.wait(1.0 / GOVERNOR.fps["hidden"])
 
     # ======================================================
     #        MODO DEBUG LOCAL (SEM WS, MAS COM PEÇAS)
@@ -902,41 +1027,39 @@ def update():
         }
 
     else:
-        # ================= MODO NORMAL (com WS) =================
-        state = get_latest_state()
+        # ================= MODO NORMAL (memória compartilhada ou WS) =================
+        state = LOCAL.poll() if LOCAL is not None else get_latest_state()
         if not state:
-            return
+            return None
+        if state is not _last_state:
+            _last_state = state
+            GOVERNOR.poke()
 
     # ================= fluxo normal continua ====================
     phase = state.get("phase")
     quiz = state.get("quiz")
 
-     # ⬇️ SE JÁ TEVE QUIZ E O BACKEND SAIU DA FASE "quiz", FECHA A JANELA
-    if _ever_had_quiz and phase != "quiz":
-        print("[quiz3d_client] Quiz terminou, fechando viewer 3D.")
-        quiz_ui.enabled = False
-        application.quit()
-        sys.exit(0)
+    # saiu da fase "quiz": esconde e espera o próximo duelo (o processo continua vivo)
+    if phase != "quiz":
+        if _last_phase == "quiz":
+            print("[quiz3d_client] Quiz terminou, viewer 3D em espera.")
+        _last_phase = phase
+        set_duel_visible(False)
+        return None
+    _last_phase = phase
 
-    # se ainda não tem quiz nesse state, não desenha nada (mas NÃO fecha)
+    # se ainda não tem quiz nesse state, não desenha nada
     if not quiz:
-        return
-
-    _ever_had_quiz = True
+        return None
 
     current_side = quiz.get("currentSide", "white")
     question = quiz.get("question", "")
     alts = quiz.get("alternatives") or quiz.get("choices") or []
 
-    # atualiza UI
-    quiz_ui.enabled = True
-    quiz_ui.update_layout(current_side, question, alts)
-    rem, mx = _calc_turn_remaining(quiz)
-    quiz_ui.update_timer(rem, mx, QUIZ_TOTAL_TIME)
-
-    # === PEÇAS 3D (aqui é onde a mágica acontece no debug!) ===
+    # === PEÇAS 3D: duelo novo troca as peças no lugar ===
     battle_id = quiz.get("battleId")
     if battle_id != _last_battle_id:
+        set_duel_visible(True)
         _last_battle_id = battle_id
         duel_scene.set_duel_from_quiz(quiz)
     else:
@@ -946,14 +1069,24 @@ def update():
                 f"Vez das {'Brancas' if current_side == 'white' else 'Pretas'}"
             )
 
-    # Se já teve quiz e agora phase NÃO é quiz -> FECHA APP
-    if _ever_had_quiz and phase != "quiz":
-        print("[quiz3d_client] Quiz terminou, fechando viewer 3D.")
-        quiz_ui.enabled = False
-        application.quit()
-        sys.exit(0)
+    # layout (quebra de linha, autoscale, posições) só quando a vez ou a pergunta muda;
+    # por frame, só o timer
+    layout_key = (battle_id, current_side, question, tuple(alts))
+    if layout_key != _last_layout_key:
+        _last_layout_key = layout_key
+        quiz_ui.update_layout(current_side, question, alts, quiz.get("layout"))
+    rem, mx = _calc_turn_remaining(quiz)
+    quiz_ui.update_timer(rem, mx, QUIZ_TOTAL_TIME)
+    return rem
+
+
+preload_models()
+set_duel_visible(DEBUG_LOCAL)
 
 
 if __name__ == "__main__":
-    start_ws_thread()
+    if LOCAL is not None:
+        print("[quiz3d_client] Estado pela memória compartilhada do jogo (sem WebSocket).")
+    else:
+        start_ws_thread()
     app.run()
@@ -12,12 +12,13 @@ class ConsoleWidget:
         self.lines.pop(0)
         self.lines.append(text)
 
-    def draw(self, screen: pygame.Surface):
+    def draw(self, screen: pygame.Surface, lines=None):
+        # lines: linhas vindas de um snapshot imutável (senão usa as do próprio widget)
         pygame.draw.rect(screen, (0,0,0), self.rect)
         pygame.draw.rect(screen, self.neon, self.rect, 2)  # borda verde
         pad = 8
         y = self.rect.y + pad
-        for ln in self.lines:
+        for ln in (self.lines if lines is None else lines):
             surf = self.font.render(ln, True, (220, 255, 220))
             screen.blit(surf, (self.rect.x + pad, y))
             y += 20
@@ -0,0 +1,382 @@
+# bench/loadtest.py
+# teste de carga do servidor realtime: N clientes websockets num processo só,
+# contra um servidor local (subprocesso). Dois bots sentam e jogam lances legais
+# aleatórios e respondem os quizzes; o resto só assiste.
+#
+#   cd backend && python -m bench.loadtest --clients 200 --duration 30
+#   cd backend && python -m bench.loadtest --clients 40 --max-p99-ms 80 --json out.json
+#
+# Mede, do lado dos clientes:
+#   - latência de fan-out: do envio de um lance/resposta até cada cliente ver o
+#     estado novo (p50/p95/p99; players_p99 só dos jogadores)
+#   - mensagens/s recebidas e enviadas, desconexões inesperadas
+# e do servidor: CPU (utime+stime do subprocesso, via /proc ou psutil).
+# Sai com código 1 se algum limite (--max-*) for estourado.
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import List, Optional
+
+try:
+    import psutil  # opcional
+except ImportError:
+    psutil = None
+
+from chess.core.board import Board5x6
+from chess.utils.constants import WHITE, BLACK
+from chess.utils.coordinates import fr
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# ---------- Servidor de bench ----------
+
+def _bench_match(app):
+    """
+    Partida do servidor de bench: a mesma MatchService do servidor dedicado
+    (realtime/match.py), começando já no xadrez com os dois primeiros bots.
+    Acabou a partida -> reset + start na hora, para a carga não parar.
+    """
+    import realtime.match as match_mod
+    from realtime.match import MatchService
+
+    match_mod.registrar_vitoria = None   # partida de bench não entra no ranking
+    actor, mgr = app.state.actor, app.state.conn_manager
+    players = {"whiteName": "bot-0", "blackName": "bot-1"}
+    # broadcaster de mentira: o bench só mede o fan-out que vem de lance/resposta
+    # (o router já transmite depois de cada um); o restart abaixo transmite sozinho
+    match = MatchService(actor, players=players, request_broadcast=lambda: None)
+    actor.submit(match.start).result()
+
+    async def _restart_on_game_over():
+        while True:
+            await asyncio.sleep(0.25)
+            if actor.snapshot.get("gameOver"):
+                await actor.call(match.reset)
+                await actor.call(match.start, players)
+                await mgr.broadcast_state()
+
+    async def _startup():
+        asyncio.create_task(_restart_on_game_over())
+    app.add_event_handler("startup", _startup)
+    return match
+
+
+def serve(host: str, port: int):
+    import uvicorn
+    from realtime.match import lobby_ctx
+    from realtime.server import create_app
+
+    static_dir = BACKEND_DIR.parent / "clients" / "mobile_web"
+    app = create_app(str(static_dir), lobby_ctx())
+    _bench_match(app)
+    uvicorn.run(app, host=host, port=port, log_level="warning")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_health(base: str, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(base + "/health", timeout=1.0):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"servidor não respondeu em {base}")
+
+
+def _cpu_seconds(pid: int) -> Optional[float]:
+    if psutil is not None:
+        t = psutil.Process(pid).cpu_times()
+        return t.user + t.system
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+# ---------- Clientes ----------
+
+class Stats:
+    def __init__(self):
+        self.action_id = 0
+        self.action_at = 0.0            # time.monotonic() do último lance/resposta enviado
+        self.latencies: List[float] = []
+        self.player_latencies: List[float] = []   # só os dois bots sentados
+        self.received = 0
+        self.sent = 0
+        self.disconnects = 0
+        self.connected = 0
+        self.moves = 0
+        self.answers = 0
+
+    def mark_action(self):
+        self.action_id += 1
+        self.action_at = time.monotonic()
+
+
+def _percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def _state_key(msg: dict):
+    board = msg.get("board") or {}
+    quiz = msg.get("quiz") or {}
+    return (msg.get("phase"), tuple(board.get("cells") or ()), msg.get("turn"),
+            quiz.get("currentSide"), quiz.get("question"))
+
+
+def _random_move(cells: list, side: str):
+    b = Board5x6()
+    code = {"w": WHITE, "b": BLACK}
+    b.board = [None if c is None else (code[c[0]], "PNBRQK".index(c[1]) + 1) for c in cells]
+    b.turn = WHITE if side == "white" else BLACK
+    moves = b.legal_moves()
+    if not moves:
+        return None
+    captures = [m for m in moves if b.board[m.dst] is not None]
+    m = random.choice(captures) if captures and random.random() < 0.5 else random.choice(moves)
+    return list(fr(m.src)), list(fr(m.dst))
+
+
+class Bot:
+    def __init__(self, i: int, url: str, stats: Stats, player: bool, think: float, accuracy: float,
+                 role: str = "player"):
+        self.name = f"bot-{i}"
+        self.role = role
+        self.url = url
+        self.stats = stats
+        self.player = player
+        self.think = think
+        self.accuracy = accuracy
+        self.seen_action = 0
+        self.last_key = None
+        self.pending_until = 0.0        # espera o estado mudar (ou 1s, se o lance foi rejeitado)
+        self.last_msg: Optional[dict] = None
+        self.busy = False
+        self.closing = False
+
+    async def run(self, stop: asyncio.Event):
+        import websockets
+
+        try:
+            async with websockets.connect(self.url, max_size=None) as ws:
+                self.stats.connected += 1
+                await self._send(ws, {"type": "join", "name": self.name, "role": self.role})
+                reader = asyncio.create_task(self._read(ws))
+                while not stop.is_set():
+                    try:
+                        await asyncio.wait_for(stop.wait(), 1.0)
+                    except asyncio.TimeoutError:
+                        # lance rejeitado não muda o estado: tenta de novo
+                        if self.player and self.last_msg and time.monotonic() >= self.pending_until:
+                            await self._play(ws, self.last_msg)
+                self.closing = True
+                reader.cancel()
+        except Exception:
+            if not self.closing:
+                self.stats.disconnects += 1
+
+    async def _send(self, ws, msg: dict):
+        await ws.send(json.dumps(msg))
+        self.stats.sent += 1
+
+    async def _read(self, ws):
+        import websockets
+
+        try:
+            async for raw in ws:
+                now = time.monotonic()
+                self.stats.received += 1
+                msg = json.loads(raw)
+                if msg.get("type") != "state":
+                    continue
+                key = _state_key(msg)
+                if key != self.last_key:
+                    self.last_key = key
+                    if self.stats.action_id > self.seen_action:
+                        self.seen_action = self.stats.action_id
+                        self.stats.latencies.append(now - self.stats.action_at)
+                        if self.player:
+                            self.stats.player_latencies.append(now - self.stats.action_at)
+                    self.pending_until = 0.0
+                self.last_msg = msg
+                if self.player and now >= self.pending_until:
+                    await self._play(ws, msg)
+        except websockets.ConnectionClosed:
+            if not self.closing:
+                self.stats.disconnects += 1
+
+    def _side(self, msg: dict) -> Optional[str]:
+        names = [p.get("name") for p in msg.get("players") or []]
+        if self.name not in names:
+            return None
+        return ("white", "black")[names.index(self.name)]
+
+    async def _play(self, ws, msg: dict):
+        if self.busy:
+            return
+        self.busy = True
+        try:
+            await self._act(ws, msg)
+        finally:
+            self.busy = False
+
+    async def _act(self, ws, msg: dict):
+        side = self._side(msg)
+        if side is None or msg.get("gameOver"):
+            return
+        if msg.get("phase") == "chess" and msg.get("turn") == side and msg.get("board"):
+            move = _random_move(msg["board"]["cells"], side)
+            if move is None:
+                return
+            await asyncio.sleep(self.think)
+            self.pending_until = time.monotonic() + 1.0
+            self.stats.mark_action()
+            self.stats.moves += 1
+            await self._send(ws, {"type": "move", "from": move[0], "to": move[1]})
+        elif msg.get("phase") == "quiz":
+            quiz = msg.get("quiz") or {}
+            if quiz.get("currentSide") != side:
+                return
+            n = len(quiz.get("choices") or ()) or 1
+            right = quiz.get("correctIndex", 0)
+            answer = right if random.random() < self.accuracy else (right + 1) % n
+            await asyncio.sleep(self.think)
+            self.pending_until = time.monotonic() + 1.0
+            self.stats.mark_action()
+            self.stats.answers += 1
+            await self._send(ws, {"type": "quiz_answer", "answer": str(answer)})
+
+# ---------- Execução ----------
+
+async def _swarm(url: str, args, stats: Stats):
+    stop = asyncio.Event()
+    bots = [Bot(i, url, stats, player=i < 2, think=args.think, accuracy=args.accuracy,
+                role="player" if i < 2 else args.watchers)
+            for i in range(args.clients)]
+    tasks = []
+    for bot in bots:
+        tasks.append(asyncio.create_task(bot.run(stop)))
+        if args.ramp:
+            await asyncio.sleep(args.ramp / args.clients)
+    await asyncio.sleep(args.duration)
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def run(args) -> dict:
+    server = None
+    if args.url:
+        url, pid = args.url, args.server_pid
+    else:
+        port = _free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "bench.loadtest", "--serve", "--port", str(port)],
+            cwd=str(BACKEND_DIR),
+            # os bots jogam bem mais rápido que gente: sem limite de taxa aqui
+            env={**os.environ, "REALTIME_RATE_SCALE": os.getenv("REALTIME_RATE_SCALE", "0")},
+        )
+        _wait_health(f"http://127.0.0.1:{port}")
+        url, pid = f"ws://127.0.0.1:{port}/ws", server.pid
+
+    stats = Stats()
+    cpu0 = _cpu_seconds(pid) if pid else None
+    t0 = time.monotonic()
+    try:
+        asyncio.run(_swarm(url, args, stats))
+    finally:
+        wall = time.monotonic() - t0
+        cpu1 = _cpu_seconds(pid) if pid else None
+        if server is not None:
+            server.terminate()
+            server.wait(5)
+
+    ms = lambda v: None if v is None else round(v * 1000, 2)
+    return {
+        "clients": args.clients,
+        "connected": stats.connected,
+        "duration_s": round(wall, 2),
+        "fanout_p50_ms": ms(_percentile(stats.latencies, 50)),
+        "fanout_p95_ms": ms(_percentile(stats.latencies, 95)),
+        "fanout_p99_ms": ms(_percentile(stats.latencies, 99)),
+        "fanout_samples": len(stats.latencies),
+        "players_p99_ms": ms(_percentile(stats.player_latencies, 99)),
+        "msgs_in_per_s": round(stats.received / wall, 1),
+        "msgs_out_per_s": round(stats.sent / wall, 1),
+        "moves": stats.moves,
+        "answers": stats.answers,
+        "disconnects": stats.disconnects,
+        "server_cpu_pct": None if cpu0 is None or cpu1 is None else round((cpu1 - cpu0) / wall * 100, 1),
+    }
+
+
+def _gate(report: dict, args) -> List[str]:
+    fails = []
+    checks = (("fanout_p50_ms", args.max_p50_ms), ("fanout_p95_ms", args.max_p95_ms),
+              ("fanout_p99_ms", args.max_p99_ms), ("players_p99_ms", args.max_players_p99_ms),
+              ("disconnects", args.max_disconnects),
+              ("server_cpu_pct", args.max_cpu_pct))
+    for key, limit in checks:
+        if limit is not None and report[key] is not None and report[key] > limit:
+            fails.append(f"{key}={report[key]} > {limit}")
+    return fails
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Teste de carga do servidor realtime")
+    ap.add_argument("--clients", type=int, default=50)
+    ap.add_argument("--duration", type=float, default=20.0, help="segundos após conectar todos")
+    ap.add_argument("--ramp", type=float, default=2.0, help="segundos para abrir todas as conexões")
+    ap.add_argument("--think", type=float, default=0.05, help="pausa dos bots jogadores antes de agir (s)")
+    ap.add_argument("--accuracy", type=float, default=0.7, help="chance de acertar o quiz")
+    ap.add_argument("--watchers", choices=("spectator", "player"), default="spectator",
+                    help="papel dos clientes que não jogam")
+    ap.add_argument("--url", help="ws://... de um servidor já rodando (senão sobe um local)")
+    ap.add_argument("--server-pid", type=int, help="pid do servidor em --url, para medir CPU")
+    ap.add_argument("--json", help="grava o relatório neste arquivo")
+    ap.add_argument("--max-p50-ms", type=float)
+    ap.add_argument("--max-p95-ms", type=float)
+    ap.add_argument("--max-p99-ms", type=float)
+    ap.add_argument("--max-players-p99-ms", type=float)
+    ap.add_argument("--max-disconnects", type=int)
+    ap.add_argument("--max-cpu-pct", type=float)
+    ap.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    ap.add_argument("--port", type=int, default=8765, help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.serve:
+        serve("127.0.0.1", args.port)
+        return 0
+
+    report = run(args)
+    for k, v in report.items():
+        print(f"{k:<16} {v}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    fails = _gate(report, args)
+    for f in fails:
+        print("FALHOU:", f)
+    return 1 if fails else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+# bench/payload.py
+# microbenchmark do payload de estado: montagem + json a cada envio (antigo)
+# vs StatePayloadCache (só refaz quando a versão muda).
+#
+#   cd backend && python -m bench.payload [--n 20000]
+import argparse
+import json
+import time
+import timeit
+from pathlib import Path
+
+from chess.render.adapter import ChessAPI
+from chess.utils.constants import BOARD_W, BOARD_H
+from realtime.actor import GameActor
+from realtime.models import BoardState
+from realtime.payload import StatePayloadCache
+from realtime.router import _build_state_payload
+from realtime.ws_manager import ConnectionManager, encode_json
+
+QUIZ_FILE = Path(__file__).resolve().parents[1] / "quiz" / "QUIZ.json"
+
+
+def _make_ctx(phase: str) -> dict:
+    api = ChessAPI()
+    ctx = {
+        "phase": phase,
+        "board": BoardState(cells=api.export_board_linear(), width=BOARD_W, height=BOARD_H),
+        "turn": "white",
+        "quiz": None,
+        "seats": {"white": "Alice", "black": "Bob"},
+        "inCheckSide": None,
+        "inCheckKing": None,
+    }
+    if phase == "lobby":
+        ctx["board"] = ctx["turn"] = None
+    if phase == "quiz":
+        q = json.loads(QUIZ_FILE.read_text(encoding="utf-8"))[0]
+        ctx["quiz"] = {
+            "battleId": 1234567,
+            "attacker": {"color": "white", "piece": "pawn", "model": "Pawn hologram"},
+            "defender": {"color": "black", "piece": "knight", "model": "Knight hologram"},
+            "currentSide": "white",
+            "question": q["pergunta"],
+            "choices": q["alternativas"],
+            "correctIndex": q["correta"],
+            "timePool": {"white": 30.0, "black": 30.0},
+            "turnStartedAt": time.time(),
+            "maxTime": 30.0,
+            "remainingTime": 30.0,
+        }
+    return ctx
+
+
+def _make_manager() -> ConnectionManager:
+    mgr = ConnectionManager()
+    mgr.set_meta("c1", {"name": "Alice", "avatar": "a1"})
+    mgr.set_meta("c2", {"name": "Bob", "avatar": "a2"})
+    return mgr
+
+
+def run(n: int):
+    print(f"{'fase':<6} {'sem cache (us)':>15} {'com cache (us)':>15} {'ganho':>7} {'bytes':>6}")
+    for phase in ("lobby", "chess", "quiz"):
+        mgr = _make_manager()
+        actor = GameActor(_make_ctx(phase))
+        cache = StatePayloadCache(mgr, actor)
+
+        def uncached():
+            return encode_json(_build_state_payload(mgr, actor.snapshot))
+
+        # o cache só acrescenta o "seq" do evento
+        assert json.loads(uncached()).keys() | {"seq"} == json.loads(cache.text()).keys()
+        t_old = min(timeit.repeat(uncached, number=n, repeat=3)) / n * 1e6
+        t_new = min(timeit.repeat(cache.text, number=n, repeat=3)) / n * 1e6
+        size = len(cache.text().encode())
+        print(f"{phase:<6} {t_old:>15.2f} {t_new:>15.2f} {t_old / t_new:>6.1f}x {size:>6}")
+        actor.stop()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20000, help="chamadas por medição")
+    run(ap.parse_args().n)
@@ -0,0 +1,48 @@
+# bench/wire.py
+# bytes e CPU por mensagem: JSON (padrão) vs protocolo binário (realtime/wire.py),
+# com os payloads de estado que o servidor realmente manda.
+#
+#   cd backend && python -m bench.wire [--n 20000]
+import argparse
+import json
+import timeit
+
+from realtime.actor import GameActor
+from realtime.router import _build_state_payload
+from realtime.wire import StringTable, WireDecoder, encode_state
+from realtime.ws_manager import encode_json
+
+from .payload import _make_ctx, _make_manager
+
+
+def run(n: int):
+    print(f"{'fase':<6} {'json B':>7} {'bin B':>6} {'bin+str B':>9}"
+          f" {'enc json us':>11} {'enc bin us':>10} {'dec json us':>11} {'dec bin us':>10}")
+    for phase in ("lobby", "chess", "quiz"):
+        mgr = _make_manager()
+        actor = GameActor(_make_ctx(phase))
+        payload = _build_state_payload(mgr, actor.snapshot)
+        table = StringTable()
+
+        text = encode_json(payload)
+        frame, _ = encode_state(payload, table)
+        strings = table.strings_frame()
+        dec = WireDecoder()
+        dec.feed(strings)
+        decoded = dec.feed(frame)
+        assert decoded["phase"] == payload["phase"] and decoded["players"] == payload["players"]
+
+        t_ej = min(timeit.repeat(lambda: encode_json(payload), number=n, repeat=3)) / n * 1e6
+        t_eb = min(timeit.repeat(lambda: encode_state(payload, table), number=n, repeat=3)) / n * 1e6
+        t_dj = min(timeit.repeat(lambda: json.loads(text), number=n, repeat=3)) / n * 1e6
+        t_db = min(timeit.repeat(lambda: dec.feed(frame), number=n, repeat=3)) / n * 1e6
+        print(f"{phase:<6} {len(text.encode()):>7} {len(frame):>6} {len(frame) + len(strings):>9}"
+              f" {t_ej:>11.2f} {t_eb:>10.2f} {t_dj:>11.2f} {t_db:>10.2f}")
+        actor.stop()
+    print("bin+str = primeiro envio, com a tabela de strings; depois só o frame STATE.")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20000, help="chamadas por medição")
+    run(ap.parse_args().n)
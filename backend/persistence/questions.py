@@ -0,0 +1,286 @@
+# questions.py
+# banco de perguntas do quiz: o quiz/QUIZ.json é compilado para um SQLite em
+# quiz/compiled/questions-<hash>.db, e o jogo só lê dali.
+#
+#   - na memória fica só o índice (ids por categoria e dificuldade, em array);
+#     o corpo da pergunta é lido do SQLite quando é sorteada (com um LRU pequeno);
+#   - o .db é nomeado pelo sha256 do JSON: com o JSON igual, abrir é só carregar o
+#     índice, sem parsear o JSON;
+#   - watch() confere o JSON numa thread; se mudou, compila o .db novo ali mesmo e
+#     troca o índice de uma vez. Quem está sorteando nunca espera a compilação.
+#
+# Campos opcionais por pergunta no JSON: "categoria" (texto) e "dificuldade" (1..3).
+# Compilar na mão: cd backend && python -m persistence.questions
+import argparse
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+QUIZ_FILE = Path(__file__).resolve().parents[1] / "quiz" / "QUIZ.json"
+COMPILED = "compiled"
+SCHEMA_VERSION = 1
+DEFAULT_CATEGORY = "geral"
+DEFAULT_DIFFICULTY = 1
+
+_Key = Tuple[str, int]
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _db_path(src: Path, digest: str) -> Path:
+    return src.parent / COMPILED / f"questions-{digest[:16]}.db"
+
+
+def compile_questions(src: Path, out: Path) -> int:
+    """JSON -> SQLite (arquivo temporário + os.replace). Devolve quantas perguntas entraram."""
+    with open(src, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_suffix(f".tmp{os.getpid()}")
+    if tmp.exists():
+        tmp.unlink()
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.execute("""
+            CREATE TABLE questions (
+                id INTEGER PRIMARY KEY,
+                categoria TEXT NOT NULL,
+                dificuldade INTEGER NOT NULL,
+                body TEXT NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX questions_tag ON questions (categoria, dificuldade)")
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        rows = []
+        for qid, q in enumerate(data):
+            try:
+                body = {"pergunta": str(q["pergunta"]), "alternativas": [str(a) for a in q["alternativas"]],
+                        "correta": int(q["correta"])}
+            except (KeyError, TypeError, ValueError):
+                print(f"WARN questions: pergunta {qid} sem pergunta/alternativas/correta, ignorada")
+                continue
+            rows.append((qid, str(q.get("categoria") or DEFAULT_CATEGORY),
+                         int(q.get("dificuldade") or DEFAULT_DIFFICULTY),
+                         json.dumps(body, ensure_ascii=False)))
+        conn.executemany("INSERT INTO questions VALUES (?, ?, ?, ?)", rows)
+        conn.executemany("INSERT INTO meta VALUES (?, ?)",
+                         [("schema", str(SCHEMA_VERSION)), ("source", str(src))])
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp, out)
+    return len(rows)
+
+
+class _Index:
+    """Um .db aberto: ids por (categoria, dificuldade). Imutável depois de montado."""
+
+    def __init__(self, path: Path, stat: Tuple[float, int]):
+        self.path = path
+        self.stat = stat
+        self.by_key: Dict[_Key, array] = {}
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            if conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone() != (str(SCHEMA_VERSION),):
+                raise sqlite3.DatabaseError(f"{path.name}: schema antigo")
+            for qid, cat, diff in conn.execute("SELECT id, categoria, dificuldade FROM questions ORDER BY id"):
+                self.by_key.setdefault((cat, diff), array("l")).append(qid)
+        finally:
+            conn.close()
+        self.count = sum(len(ids) for ids in self.by_key.values())
+        self._views: Dict[tuple, Sequence[int]] = {}
+
+    def ids(self, category: Optional[str], difficulty: Optional[int]) -> Sequence[int]:
+        q = (category, difficulty)
+        view = self._views.get(q)
+        if view is None:
+            keys = [k for k in self.by_key
+                    if (category is None or k[0] == category) and (difficulty is None or k[1] == difficulty)]
+            view = self.by_key[keys[0]] if len(keys) == 1 else array("l", sorted(
+                qid for k in keys for qid in self.by_key[k]))
+            self._views[q] = view
+        return view
+
+
+class QuestionStore:
+    """
+    Perguntas do quiz. Abre (e compila, se preciso) na primeira consulta.
+    get()/random() podem ser chamados de qualquer thread; cada thread tem sua conexão.
+    """
+
+    def __init__(self, source: Path = QUIZ_FILE, cache_size: int = 256):
+        self.source = Path(source)
+        self.cache_size = cache_size
+        self.generation = 0                       # sobe a cada reload
+        self._index: Optional[_Index] = None
+        self._open_lock = threading.Lock()
+        self._local = threading.local()
+        self._cache: "OrderedDict[int, dict]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+
+    # ---------- abertura / reload ----------
+
+    def _stat(self) -> Tuple[float, int]:
+        st = self.source.stat()
+        return st.st_mtime, st.st_size
+
+    def _build(self) -> _Index:
+        stat = self._stat()
+        path = _db_path(self.source, _sha256(self.source))
+        if path.exists():
+            try:
+                return _Index(path, stat)
+            except sqlite3.DatabaseError as e:
+                print("WARN questions: recompilando,", e)
+        n = compile_questions(self.source, path)
+        print(f"questions: {n} perguntas compiladas em {path.name}")
+        self._remove_stale(path)
+        return _Index(path, stat)
+
+    def _current(self) -> Optional[_Index]:
+        index = self._index
+        if index is not None:
+            return index
+        with self._open_lock:
+            if self._index is None:
+                try:
+                    self._index = self._build()
+                except (OSError, ValueError, sqlite3.Error) as e:
+                    print(f"ATENÇÃO: banco de perguntas indisponível ({self.source}):", e)
+                    return None
+            return self._index
+
+    def reload(self) -> bool:
+        """Recompila se o JSON mudou desde a última abertura. True se trocou o índice."""
+        index = self._current()
+        try:
+            if index is not None and self._stat() == index.stat:
+                return False
+            new = self._build()
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print("WARN questions: reload falhou, mantendo o banco atual:", e)
+            return False
+        if index is not None and new.path == index.path:
+            self._index = new   # só o mtime mudou (mesmo conteúdo)
+            return False
+        with self._open_lock, self._cache_lock:
+            # troca e limpa juntos: get() nunca vê o índice novo com o cache do antigo
+            self._index = new
+            self.generation += 1
+            self._cache.clear()
+        print(f"questions: banco recarregado ({new.count} perguntas)")
+        return True
+
+    def _remove_stale(self, keep: Path):
+        for path in keep.parent.glob("questions-*.db"):
+            if path != keep:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass   # ainda aberto por outra thread/processo (Windows)
+
+    def watch(self, interval: float = 2.0) -> threading.Thread:
+        """Thread daemon que abre o banco e confere o JSON a cada `interval` s (uma por store)."""
+        if self._watcher is not None:
+            return self._watcher
+
+        def _run():
+            self._current()   # abre/compila aqui, fora do primeiro sorteio
+            stop = threading.Event()
+            while not stop.wait(interval):
+                try:
+                    self.reload()
+                except Exception as e:
+                    print("WARN questions: watcher:", e)
+
+        self._watcher = threading.Thread(target=_run, name="questions-watch", daemon=True)
+        self._watcher.start()
+        return self._watcher
+
+    # ---------- consultas ----------
+
+    def __len__(self) -> int:
+        index = self._current()
+        return index.count if index is not None else 0
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifica o conteúdo aberto (muda a cada JSON diferente); "" sem banco."""
+        index = self._current()
+        return "" if index is None else index.path.stem
+
+    def tags(self) -> Dict[_Key, int]:
+        """{(categoria, dificuldade): quantidade}."""
+        index = self._current()
+        return {} if index is None else {k: len(v) for k, v in index.by_key.items()}
+
+    def ids(self, category: Optional[str] = None, difficulty: Optional[int] = None) -> Sequence[int]:
+        """Ids (ordenados) das perguntas com essa categoria/dificuldade; None = qualquer uma."""
+        index = self._current()
+        return () if index is None else index.ids(category, difficulty)
+
+    def _conn(self, index: _Index) -> sqlite3.Connection:
+        local = self._local
+        if getattr(local, "path", None) != index.path:
+            if getattr(local, "conn", None) is not None:
+                local.conn.close()
+            local.conn = sqlite3.connect(f"file:{index.path}?mode=ro", uri=True)
+            local.path = index.path
+        return local.conn
+
+    def get(self, qid: int) -> Optional[dict]:
+        """Pergunta completa: {"id", "pergunta", "alternativas", "correta"}; None se não existe."""
+        with self._cache_lock:
+            hit = self._cache.get(qid)
+            if hit is not None:
+                self._cache.move_to_end(qid)
+                return hit
+        index = self._current()
+        if index is None:
+            return None
+        row = self._conn(index).execute("SELECT body FROM questions WHERE id = ?", (qid,)).fetchone()
+        if row is None:
+            return None
+        q = json.loads(row[0])
+        q["id"] = qid
+        with self._cache_lock:
+            if index is not self._index:
+                return q   # reload no meio da leitura: não põe o corpo antigo no cache
+            self._cache[qid] = q
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return q
+
+    def random(self, category: Optional[str] = None, difficulty: Optional[int] = None,
+               rng: random.Random = random) -> Optional[dict]:
+        ids = self.ids(category, difficulty)
+        return self.get(ids[rng.randrange(len(ids))]) if ids else None
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m persistence.questions",
+                                 description="Compila o JSON de perguntas para o SQLite indexado")
+    ap.add_argument("--src", default=str(QUIZ_FILE))
+    args = ap.parse_args(argv)
+    store = QuestionStore(Path(args.src))
+    print(f"{len(store)} perguntas")
+    for (cat, diff), n in sorted(store.tags().items()):
+        print(f"  {cat:<20} nível {diff}: {n}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# servidor dedicado, sem pygame/ursina:
+#   cd backend && python -m realtime --host 0.0.0.0 --port 8765 --workers 1
+# A partida começa sozinha quando as duas vagas ficam ocupadas (MatchService.run_lobby).
+import argparse
+import asyncio
+import os
+from pathlib import Path
+
+import uvicorn
+
+from .bus import SocketBus, run_broker_in_bg
+from .cluster import ClusterNode
+from .match import MatchService, lobby_ctx
+from .server import create_app, run_workers
+
+DEFAULT_STATIC = Path(__file__).resolve().parents[2] / "clients" / "mobile_web"
+
+
+def build_app(static_dir: str, cluster: ClusterNode | None = None):
+    app = create_app(static_dir, lobby_ctx(), cluster=cluster)
+    match = MatchService(app.state.actor, request_broadcast=app.state.request_broadcast)
+    app.state.match = match
+
+    async def _start_lobby():
+        asyncio.create_task(match.run_lobby(app.state.conn_manager))
+    app.add_event_handler("startup", _start_lobby)
+    return app
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m realtime", description="Servidor Chess-Quiz sem interface gráfica")
+    ap.add_argument("--host", default=os.getenv("REALTIME_HOST", "0.0.0.0"))
+    ap.add_argument("--port", type=int, default=int(os.getenv("REALTIME_PORT", "8765")))
+    ap.add_argument("--workers", type=int, default=int(os.getenv("REALTIME_WORKERS", "1")),
+                    help=">1: workers de borda na porta pública; a sala fica neste processo em port+1")
+    ap.add_argument("--static", default=str(DEFAULT_STATIC), help="pasta do cliente web (/web)")
+    args = ap.parse_args(argv)
+
+    if args.workers > 1:
+        # mesmo arranjo do LobbyScene: dono da sala numa porta interna, bordas na pública
+        _, broker = run_broker_in_bg()
+        app = build_app(args.static, ClusterNode(SocketBus(broker), hosting=True))
+        proc, _ = run_workers(args.static, args.host, args.port, args.workers, broker=broker)
+        try:
+            uvicorn.run(app, host="127.0.0.1", port=args.port + 1, log_level="warning")
+        finally:
+            proc.terminate()
+    else:
+        print(f"Chess-Quiz realtime em http://{args.host}:{args.port}/web")
+        uvicorn.run(build_app(args.static), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# realtime/actor.py
+# dono único do game_ctx: toda mutação entra numa fila e roda num thread só.
+# Quem só lê (loop do pygame, payloads do realtime) usa o snapshot imutável
+# publicado depois de cada comando -- sem lock no caminho de render.
+import asyncio
+import queue
+import threading
+from concurrent.futures import Future
+from types import MappingProxyType
+from typing import Any, Callable, Mapping
+
+
+def freeze(value: Any) -> Any:
+    """Cópia profunda imutável: dict -> MappingProxyType, list -> tuple."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Inverso do freeze, para quem precisa serializar (json/pydantic)."""
+    if isinstance(value, Mapping):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(v) for v in value]
+    return value
+
+
+_STOP = object()
+
+
+class GameActor:
+    """
+    Fila de comandos + thread consumidor. Cada comando é um callable que pode
+    mexer livremente em `state`; ao terminar, um novo snapshot é publicado
+    (troca atômica de referência) e a versão avança.
+    """
+
+    def __init__(self, state: dict):
+        self.state = state                      # privado: só o thread do ator escreve
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._published = (0, freeze(state))    # (versão, snapshot) trocados juntos
+        self._listeners: list[Callable[[int], None]] = []
+        self._thread = threading.Thread(target=self._run, daemon=True, name="game-actor")
+        self._thread.start()
+
+    # ----- leitura (qualquer thread) -----
+    @property
+    def snapshot(self) -> Mapping:
+        return self._published[1]
+
+    @property
+    def version(self) -> int:
+        return self._published[0]
+
+    @property
+    def published(self) -> tuple:
+        """(versão, snapshot) lidos de uma vez só -- nunca desencontrados."""
+        return self._published
+
+    def add_listener(self, fn: Callable[[int], None]):
+        """fn(versão) é chamado no thread do ator após cada publicação."""
+        self._listeners.append(fn)
+
+    # ----- escrita -----
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        fut: Future = Future()
+        if threading.current_thread() is self._thread:
+            # comando disparado de dentro de outro comando: roda direto
+            self._execute(fn, args, kwargs, fut, publish=False)
+            return fut
+        self._queue.put((fn, args, kwargs, fut))
+        return fut
+
+    async def call(self, fn: Callable, *args, **kwargs):
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def update(self, **changes):
+        """Atalho para comandos que só gravam chaves no estado."""
+        return self.submit(self.state.update, changes)
+
+    def stop(self):
+        self._queue.put((_STOP, (), {}, None))
+
+    # ----- thread do ator -----
+    def _execute(self, fn, args, kwargs, fut: Future, publish: bool = True):
+        try:
+            result, error = fn(*args, **kwargs), None
+        except BaseException as e:
+            result, error = None, e
+        # publica antes de liberar quem espera: após o await, o snapshot já é o novo
+        if publish:
+            self._publish()
+        if error is not None:
+            fut.set_exception(error)
+        else:
+            fut.set_result(result)
+
+    def _publish(self):
+        version = self._published[0] + 1
+        self._published = (version, freeze(self.state))
+        for fn in self._listeners:
+            try:
+                fn(version)
+            except Exception as e:
+                print("WARN listener do ator:", e)
+
+    def _run(self):
+        while True:
+            fn, args, kwargs, fut = self._queue.get()
+            if fn is _STOP:
+                return
+            self._execute(fn, args, kwargs, fut)
@@ -0,0 +1,279 @@
+# realtime/bus.py
+# barramento pub/sub entre workers: fan-out de estado e encaminhamento de comandos
+import asyncio
+import json
+import struct
+import threading
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+Handler = Callable[[str, bytes], Awaitable[None]]
+
+# tópico reservado: o próprio barramento publica aqui {node_id: hosting} a cada mudança
+MEMBERS_TOPIC = "__members__"
+
+# ---------- Interface ----------
+
+class PubSub:
+    """
+    Interface mínima do barramento. Mensagens são bytes opacos por tópico;
+    quem publica também recebe (se estiver inscrito no tópico).
+    """
+
+    node_id: str
+
+    async def start(self, hosting: bool = True): ...
+
+    async def publish(self, topic: str, data: bytes):
+        raise NotImplementedError
+
+    async def subscribe(self, topic: str, handler: Handler):
+        raise NotImplementedError
+
+    async def unsubscribe(self, topic: str, handler: Handler):
+        raise NotImplementedError
+
+    async def close(self): ...
+
+
+def new_node_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+# ---------- Implementação em processo (testes / worker único) ----------
+
+class InProcessHub:
+    """Estado compartilhado entre vários InProcessBus do mesmo processo."""
+
+    def __init__(self):
+        self.subs: Dict[str, List[Tuple["InProcessBus", Handler]]] = {}
+        self.members: Dict[str, bool] = {}
+
+    async def deliver(self, topic: str, data: bytes):
+        for _bus, handler in list(self.subs.get(topic, ())):
+            try:
+                await handler(topic, data)
+            except Exception as e:
+                print("WARN bus handler:", e)
+
+    async def announce(self):
+        await self.deliver(MEMBERS_TOPIC, json.dumps(self.members).encode())
+
+
+class InProcessBus(PubSub):
+    def __init__(self, hub: Optional[InProcessHub] = None, node_id: Optional[str] = None):
+        self.hub = hub or InProcessHub()
+        self.node_id = node_id or new_node_id()
+
+    async def start(self, hosting: bool = True):
+        self.hub.members[self.node_id] = hosting
+        await self.hub.announce()
+
+    async def publish(self, topic: str, data: bytes):
+        await self.hub.deliver(topic, data)
+
+    async def subscribe(self, topic: str, handler: Handler):
+        self.hub.subs.setdefault(topic, []).append((self, handler))
+        if topic == MEMBERS_TOPIC:
+            await handler(topic, json.dumps(self.hub.members).encode())
+
+    async def unsubscribe(self, topic: str, handler: Handler):
+        subs = self.hub.subs.get(topic, [])
+        self.hub.subs[topic] = [(b, h) for (b, h) in subs if not (b is self and h == handler)]
+
+    async def close(self):
+        for topic in list(self.hub.subs):
+            self.hub.subs[topic] = [(b, h) for (b, h) in self.hub.subs[topic] if b is not self]
+        if self.hub.members.pop(self.node_id, None) is not None:
+            await self.hub.announce()
+
+# ---------- Broker em socket local ----------
+#
+# Frame: !BHI (op, len(topic), len(data)) + topic + data
+#   SUB/UNSUB: cliente -> broker (data vazio)
+#   PUB:       nos dois sentidos
+#   HELLO:     cliente -> broker, data = {"node": id, "hosting": bool}
+
+OP_SUB, OP_UNSUB, OP_PUB, OP_HELLO = 1, 2, 3, 4
+_HDR = struct.Struct("!BHI")
+
+
+def _frame(op: int, topic: str, data: bytes = b"") -> bytes:
+    t = topic.encode()
+    return _HDR.pack(op, len(t), len(data)) + t + data
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Tuple[int, str, bytes]:
+    op, tlen, dlen = _HDR.unpack(await reader.readexactly(_HDR.size))
+    topic = (await reader.readexactly(tlen)).decode() if tlen else ""
+    data = await reader.readexactly(dlen) if dlen else b""
+    return op, topic, data
+
+
+def parse_address(addr: str) -> Tuple[str, int]:
+    host, _, port = addr.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class BusBroker:
+    """
+    Broker mínimo em TCP de loopback: repassa PUB para quem assinou o tópico
+    e mantém a lista de membros (nós conectados) publicada em MEMBERS_TOPIC.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host, self.port = host, port
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._subs: Dict[str, Set[asyncio.StreamWriter]] = {}
+        self._members: Dict[asyncio.StreamWriter, Tuple[str, bool]] = {}
+
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def _send(self, topic: str, data: bytes):
+        frame = _frame(OP_PUB, topic, data)
+        for w in list(self._subs.get(topic, ())):
+            if w.is_closing():
+                continue
+            w.write(frame)
+
+    def _announce(self):
+        members = {node: hosting for node, hosting in self._members.values()}
+        self._send(MEMBERS_TOPIC, json.dumps(members).encode())
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                op, topic, data = await _read_frame(reader)
+                if op == OP_PUB:
+                    self._send(topic, data)
+                elif op == OP_SUB:
+                    self._subs.setdefault(topic, set()).add(writer)
+                    if topic == MEMBERS_TOPIC:
+                        self._announce()
+                elif op == OP_UNSUB:
+                    self._subs.get(topic, set()).discard(writer)
+                elif op == OP_HELLO:
+                    hello = json.loads(data)
+                    self._members[writer] = (hello["node"], bool(hello.get("hosting", True)))
+                    self._announce()
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for subs in self._subs.values():
+                subs.discard(writer)
+            if self._members.pop(writer, None) is not None:
+                self._announce()
+            writer.close()
+
+
+def run_broker_in_bg(host: str = "127.0.0.1", port: int = 0) -> Tuple[threading.Thread, str]:
+    """Sobe o broker num thread próprio (mesmo padrão do run_uvicorn_in_bg). Retorna (thread, endereço)."""
+    ready = threading.Event()
+    broker = BusBroker(host, port)
+
+    def runner():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(broker.start())
+        ready.set()
+        loop.run_forever()
+
+    t = threading.Thread(target=runner, daemon=True)
+    t.start()
+    ready.wait(5.0)
+    return t, broker.address
+
+
+class SocketBus(PubSub):
+    """Cliente do BusBroker. Reconecta sozinho e refaz HELLO + assinaturas."""
+
+    def __init__(self, address: str, node_id: Optional[str] = None):
+        self.address = address
+        self.node_id = node_id or new_node_id()
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connected = asyncio.Event()
+        self._hosting = True
+        self._closed = False
+
+    async def start(self, hosting: bool = True):
+        self._hosting = hosting
+        await self._connect()
+        self._reader_task = asyncio.create_task(self._read_loop())
+
+    async def _connect(self):
+        host, port = parse_address(self.address)
+        reader, writer = await asyncio.open_connection(host, port)
+        self._reader, self._writer = reader, writer
+        writer.write(_frame(OP_HELLO, "", json.dumps({"node": self.node_id, "hosting": self._hosting}).encode()))
+        for topic in self._handlers:
+            writer.write(_frame(OP_SUB, topic))
+        await writer.drain()
+        self._connected.set()
+
+    async def _read_loop(self):
+        while not self._closed:
+            try:
+                op, topic, data = await _read_frame(self._reader)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                self._connected.clear()
+                if self._closed:
+                    return
+                await self._reconnect()
+                continue
+            if op != OP_PUB:
+                continue
+            for handler in list(self._handlers.get(topic, ())):
+                try:
+                    await handler(topic, data)
+                except Exception as e:
+                    print("WARN bus handler:", e)
+
+    async def _reconnect(self):
+        while not self._closed:
+            try:
+                await self._connect()
+                return
+            except OSError:
+                await asyncio.sleep(0.5)
+
+    async def publish(self, topic: str, data: bytes):
+        await self._connected.wait()
+        self._writer.write(_frame(OP_PUB, topic, data))
+        await self._writer.drain()
+
+    async def subscribe(self, topic: str, handler: Handler):
+        first = topic not in self._handlers
+        self._handlers.setdefault(topic, []).append(handler)
+        if first and self._writer is not None:
+            self._writer.write(_frame(OP_SUB, topic))
+            await self._writer.drain()
+
+    async def unsubscribe(self, topic: str, handler: Handler):
+        hs = self._handlers.get(topic, [])
+        if handler in hs:
+            hs.remove(handler)
+        if not hs and topic in self._handlers:
+            del self._handlers[topic]
+            if self._writer is not None:
+                self._writer.write(_frame(OP_UNSUB, topic))
+                await self._writer.drain()
+
+    async def close(self):
+        self._closed = True
+        if self._reader_task:
+            self._reader_task.cancel()
+        if self._writer:
+            self._writer.close()
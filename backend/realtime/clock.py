@@ -0,0 +1,58 @@
+# realtime/clock.py
+# relógio do servidor (monotônico) e o estimador de offset usado pelos clientes Python.
+#
+# Protocolo (estilo NTP), sobre o próprio WebSocket:
+#   cliente -> {"type": "ping", "t0": <relógio local>}
+#   servidor -> {"type": "pong", "t0": t0, "t1": <chegada>, "t2": <envio>}   (t1/t2 = server_now())
+# No recebimento (t3, relógio local):
+#   rtt    = (t3 - t0) - (t2 - t1)
+#   offset = ((t1 - t0) + (t2 - t3)) / 2          -> server_now ~= local + offset
+# Das últimas amostras, vale a de menor RTT (a menos afetada por fila/perda).
+#
+# Os prazos do quiz saem no payload como quiz["deadline"] no relógio do servidor;
+# cada cliente calcula o tempo restante sozinho, sem depender de pushes periódicos.
+import collections
+import time
+from typing import Deque, Optional, Tuple
+
+
+def server_now() -> float:
+    """Relógio de referência dos prazos: monotônico, não anda para trás com ajuste de hora."""
+    return time.monotonic()
+
+
+class ClockSync:
+    """Lado do cliente: guarda as amostras de ping/pong e estima o offset."""
+
+    def __init__(self, window: int = 8, local_clock=time.monotonic):
+        self._samples: Deque[Tuple[float, float]] = collections.deque(maxlen=window)  # (rtt, offset)
+        self._local = local_clock
+        self.offset: Optional[float] = None
+        self.rtt: Optional[float] = None
+
+    @property
+    def synced(self) -> bool:
+        return self.offset is not None
+
+    def ping(self) -> dict:
+        return {"type": "ping", "t0": self._local()}
+
+    def on_pong(self, msg: dict):
+        t3 = self._local()
+        t0, t1, t2 = float(msg["t0"]), float(msg["t1"]), float(msg["t2"])
+        rtt = max(0.0, (t3 - t0) - (t2 - t1))
+        self._samples.append((rtt, ((t1 - t0) + (t2 - t3)) / 2))
+        self.rtt, self.offset = min(self._samples)
+
+    def assume_same_clock(self):
+        """Mesma máquina (realtime/localipc.py): o monotônico do host é o nosso, offset zero."""
+        self._samples.clear()
+        self._samples.append((0.0, 0.0))
+        self.rtt, self.offset = 0.0, 0.0
+
+    def now(self) -> float:
+        """Estimativa do server_now() atual."""
+        return self._local() + (self.offset or 0.0)
+
+    def remaining(self, deadline: float) -> float:
+        return max(0.0, deadline - self.now())
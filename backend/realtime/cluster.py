@@ -0,0 +1,139 @@
+# realtime/cluster.py
+# várias instâncias (workers) servindo as mesmas salas:
+#  - a sala tem um dono só: o processo que hospeda a partida (host do jogo ou
+#    python -m realtime), o único nó "hosting". O estado do jogo vive nele e não é
+#    replicado -- se o dono cair, a sala acaba; os workers de borda não assumem.
+#  - o dono aplica os comandos e publica o estado; os outros só repassam
+import asyncio
+import json
+from typing import Awaitable, Callable, Dict, Optional
+
+from .bus import MEMBERS_TOPIC, PubSub
+
+def _state_seq(text: str) -> int:
+    """"seq" do JSON de estado sem decodificar tudo (é sempre a última chave)."""
+    at = text.rfind('"seq":')
+    if at < 0:
+        return 0
+    digits = text[at + 6:].split(",", 1)[0].split("}", 1)[0]
+    return int(digits) if digits.isdigit() else 0
+
+# ---------- Nó do cluster ----------
+
+RemoteHandler = Callable[[str, str, str, Optional[str]], Awaitable[None]]  # (origin, cid, op, frame)
+
+
+class ClusterNode:
+    """
+    Um processo servidor. Acompanha quem é o nó hosting (MEMBERS_TOPIC) e
+    liga as salas locais ao barramento (RoomRelay).
+    hosting=False -> nó só de borda: aceita sockets mas nunca é dono de sala.
+    Com mais de um nó hosting no broker (não deveria acontecer), vale o menor node_id.
+    """
+
+    def __init__(self, bus: PubSub, hosting: bool = True):
+        self.bus = bus
+        self.node_id = bus.node_id
+        self.hosting = hosting
+        self.owner: Optional[str] = self.node_id if hosting else None
+        self._relays: Dict[str, "RoomRelay"] = {}
+        self._started = False
+
+    async def start(self):
+        if self._started:
+            return
+        self._started = True
+        await self.bus.subscribe(MEMBERS_TOPIC, self._on_members)
+        await self.bus.subscribe(f"node.{self.node_id}", self._on_personal)
+        await self.bus.start(hosting=self.hosting)
+        for relay in self._relays.values():
+            await relay.start()
+
+    async def close(self):
+        await self.bus.close()
+
+    def owner_of(self, room: str) -> Optional[str]:
+        return self.owner
+
+    def is_owner(self, room: str) -> bool:
+        return self.hosting and self.owner == self.node_id
+
+    def relay(self, room: str, mgr, on_remote: RemoteHandler) -> "RoomRelay":
+        r = self._relays.get(room)
+        if r is None:
+            r = RoomRelay(self, room, mgr, on_remote)
+            self._relays[room] = r
+            if self._started:
+                asyncio.ensure_future(r.start())
+        return r
+
+    async def _on_members(self, _topic: str, data: bytes):
+        members: Dict[str, bool] = json.loads(data)
+        hosting = {n for n, h in members.items() if h}
+        if self.hosting:
+            hosting.add(self.node_id)
+        self.owner = min(hosting) if hosting else None
+
+    async def _on_personal(self, _topic: str, data: bytes):
+        # "<room>\n<cid>\n<texto>"
+        room, cid, text = data.decode().split("\n", 2)
+        relay = self._relays.get(room)
+        if relay:
+            await relay.mgr.send_local_text(cid, text)
+
+
+class RoomRelay:
+    """
+    Liga o ConnectionManager de uma sala ao barramento.
+      dono:     recebe room.<id>.cmd, publica room.<id>.state
+      não-dono: repassa frames para o dono e replica room.<id>.state aos sockets locais
+    """
+
+    def __init__(self, node: ClusterNode, room: str, mgr, on_remote: RemoteHandler):
+        self.node = node
+        self.room = room
+        self.mgr = mgr
+        self.on_remote = on_remote
+        self.last_state: Optional[str] = None  # último estado recebido (para /state e novos sockets)
+        self.last_seq = 0                      # "seq" desse estado (ETag do /state é igual em todo worker)
+        self._t_state = f"room.{room}.state"
+        self._t_cmd = f"room.{room}.cmd"
+        mgr.relay = self
+
+    @property
+    def is_owner(self) -> bool:
+        return self.node.is_owner(self.room)
+
+    async def start(self):
+        await self.node.bus.subscribe(self._t_state, self._on_state)
+        await self.node.bus.subscribe(self._t_cmd, self._on_cmd)
+
+    # ----- dono -> todos -----
+    async def publish_state(self, text: str):
+        self.last_state = text
+        await self.node.bus.publish(self._t_state, self.node.node_id.encode() + b"\n" + text.encode())
+
+    async def send_to(self, origin: str, cid: str, text: str):
+        await self.node.bus.publish(f"node.{origin}", f"{self.room}\n{cid}\n{text}".encode())
+
+    async def _on_state(self, _topic: str, data: bytes):
+        origin, _, body = data.partition(b"\n")
+        if origin.decode() == self.node.node_id:
+            return
+        text = body.decode()
+        self.last_state = text
+        self.last_seq = _state_seq(text)
+        await self.mgr.broadcast_local_text(text)
+
+    # ----- não-dono -> dono -----
+    async def forward(self, cid: str, op: str, frame: Optional[str] = None):
+        msg = {"origin": self.node.node_id, "cid": cid, "op": op, "frame": frame}
+        await self.node.bus.publish(self._t_cmd, json.dumps(msg).encode())
+
+    async def _on_cmd(self, _topic: str, data: bytes):
+        if not self.is_owner:
+            return
+        msg = json.loads(data)
+        if msg.get("origin") == self.node.node_id:
+            return
+        await self.on_remote(msg["origin"], msg["cid"], msg["op"], msg.get("frame"))
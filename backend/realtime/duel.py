@@ -0,0 +1,229 @@
+# realtime/duel.py
+# o duelo de quiz como máquina de estados pura: sem pygame, sem ator, sem ChessAPI.
+# Quem hospeda (MatchService, bench, simulador) chama as transições e aplica o
+# resultado no tabuleiro; o duelo só sabe de vez, banco de tempo e pergunta.
+#
+#   answering --answer(certa)----------> answering (vez do outro lado, pergunta nova)
+#   answering --answer(errada)---------> finished  (reason "wrong")
+#   answering --answer(banco zerou)----> finished  (reason "out_of_time")
+#   answering --answer/check_timeout---> finished  (reason "timeout": vez passou do banco)
+#
+# Todo tempo é do relógio monotônico do servidor (clock.server_now): pular o
+# relógio de parede não gera estouro falso. turnStartedAt (time.time) segue no
+# payload só como chave de "vez nova" para os clientes web.
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from .clock import server_now
+
+QUIZ_TOTAL_TIME = 20.0          # tempo total por jogador em um duelo
+QUIZ_PENALTY_RATIO = 0.6        # 5s pensando → ~3s de penalidade (5 * 0.6)
+QUIZ_MIN_PENALTY = 1.0          # nunca perde menos que 1s
+QUIZ_MAX_PENALTY = 10.0         # só pra não exagerar se ficar muito tempo
+
+SIDES = ("white", "black")
+OTHER = {"white": "black", "black": "white"}
+
+
+def compute_time_penalty(elapsed: float) -> float:
+    """
+    Converte o tempo que o jogador ficou pensando (elapsed)
+    em penalidade que será descontada do banco dele.
+
+    Exemplo: elapsed=5s → penalty ≈ 3s (5 * 0.6).
+    """
+    penalty = max(QUIZ_MIN_PENALTY, float(round(elapsed * QUIZ_PENALTY_RATIO)))
+    return min(QUIZ_MAX_PENALTY, penalty)
+
+
+def quiz_deadline(quiz: dict) -> Optional[float]:
+    """Prazo da vez de um payload de quiz (dict) no relógio monotônico; None sem banco."""
+    mono = quiz.get("turnStartedMono")
+    pool = quiz.get("timePool") or {}
+    side = quiz.get("currentSide")
+    if mono is None or side not in pool:
+        return None
+    return float(mono) + float(pool[side])
+
+
+def quiz_remaining(quiz: dict, now: Optional[float] = None) -> Optional[float]:
+    """Tempo restante da vez de um payload de quiz; None se o quiz não usa banco de tempo."""
+    deadline = quiz_deadline(quiz)
+    if deadline is not None:
+        return max(0.0, deadline - (server_now() if now is None else now))
+    # payload antigo (sem turnStartedMono): conta pelo relógio de parede
+    side = quiz.get("currentSide", "white")
+    pool = quiz.get("timePool") or {}
+    started = quiz.get("turnStartedAt")
+    if side in pool and started:
+        return max(0.0, float(pool[side]) - max(0.0, time.time() - float(started)))
+    return None
+
+
+@dataclass
+class DuelOutcome:
+    """Resultado de uma transição. finished=False: o duelo segue (vez do outro lado)."""
+    finished: bool
+    winner: Optional[str] = None
+    loser: Optional[str] = None
+    reason: Optional[str] = None     # "wrong" | "out_of_time" | "timeout"
+    penalty: float = 0.0
+
+
+class QuizDuel:
+    """
+    Um duelo entre atacante e defensor. `pick_question` devolve uma pergunta no
+    formato do quiz/QUIZ.json ({"pergunta", "alternativas", "correta"}).
+    `clock` é injetável para simular o duelo sem esperar (bench, testes manuais).
+    """
+
+    def __init__(self, attacker: dict, defender: dict, pick_question: Callable[[], dict], *,
+                 total_time: float = QUIZ_TOTAL_TIME, battle_id: Optional[int] = None,
+                 clock: Callable[[], float] = server_now):
+        self.attacker = dict(attacker)           # {"color", "piece", "model"}
+        self.defender = dict(defender)
+        self.pick_question = pick_question
+        self.clock = clock
+        self.battle_id = battle_id if battle_id is not None else random.randint(1, 10_000_000)
+        self.pool = {side: float(total_time) for side in SIDES}
+        self.side = self.attacker["color"]       # atacante SEMPRE começa respondendo
+        self.question: dict = {}
+        self.turn_started = 0.0                  # clock() no começo da vez
+        self.turn_started_wall = 0.0             # só para o payload (chave de vez nova)
+        self.result: Optional[DuelOutcome] = None
+        self._new_turn(self.side)
+
+    @classmethod
+    def from_battle(cls, battle: dict, pick_question: Callable[[], dict], **kw) -> "QuizDuel":
+        """Duelo a partir do ChessAPI.last_battle de uma captura."""
+        def fighter(prefix):
+            piece = battle[f"{prefix}_type"]
+            return {"color": battle[f"{prefix}_color"], "piece": piece,
+                    "model": f"{piece.capitalize()} hologram"}
+        return cls(fighter("attacker"), fighter("defender"), pick_question, **kw)
+
+    # ---------- consultas ----------
+
+    @property
+    def finished(self) -> bool:
+        return self.result is not None
+
+    def _now(self, now: Optional[float]) -> float:
+        return self.clock() if now is None else now
+
+    def elapsed(self, now: Optional[float] = None) -> float:
+        return max(0.0, self._now(now) - self.turn_started)
+
+    def remaining(self, now: Optional[float] = None) -> float:
+        if self.finished:
+            return 0.0
+        return max(0.0, self.pool[self.side] - self.elapsed(now))
+
+    def deadline(self) -> Optional[float]:
+        """Próximo instante (no clock) em que o duelo muda sozinho; None se acabou."""
+        if self.finished:
+            return None
+        return self.turn_started + self.pool[self.side]
+
+    # ---------- transições ----------
+
+    def _new_turn(self, side: str, now: Optional[float] = None):
+        self.side = side
+        self.question = self.pick_question()
+        self.turn_started = self._now(now)
+        self.turn_started_wall = time.time()
+
+    def _finish(self, reason: str, penalty: float = 0.0) -> DuelOutcome:
+        self.result = DuelOutcome(True, winner=OTHER[self.side], loser=self.side,
+                                  reason=reason, penalty=penalty)
+        return self.result
+
+    def check_timeout(self, now: Optional[float] = None) -> Optional[DuelOutcome]:
+        """Encerra o duelo se a vez passou do banco. None enquanto ainda há tempo."""
+        if self.finished:
+            return None
+        if self.elapsed(now) >= self.pool[self.side]:
+            return self._finish("timeout")
+        return None
+
+    def answer(self, answer, now: Optional[float] = None) -> Optional[DuelOutcome]:
+        """
+        Resposta do lado da vez (índice da alternativa; string vinda da web serve).
+        Desconta a penalidade do banco; certa passa a vez, errada encerra. None se já acabou.
+        """
+        if self.finished:
+            return None
+        now = self._now(now)
+        elapsed = self.elapsed(now)
+        bank = self.pool[self.side]
+        if elapsed >= bank:
+            return self._finish("timeout")
+
+        penalty = compute_time_penalty(elapsed)
+        self.pool[self.side] = max(0.0, bank - penalty)
+        if self.pool[self.side] <= 0.0:
+            return self._finish("out_of_time", penalty)
+
+        try:
+            idx = int(answer)
+        except (TypeError, ValueError):
+            idx = -1   # resposta inválida conta como erro
+        if idx != self.question.get("correta", -1):
+            return self._finish("wrong", penalty)
+
+        # acertou: bate-bola continua com o outro lado, sem resetar os bancos
+        self._new_turn(OTHER[self.side], now)
+        return DuelOutcome(False, penalty=penalty)
+
+    # ---------- serialização ----------
+
+    def payload(self) -> dict:
+        """game_ctx["quiz"]: o formato que web, viewer 3D e protocolo binário já leem."""
+        bank = self.pool[self.side]
+        return {
+            "battleId": self.battle_id,
+            "attacker": dict(self.attacker),
+            "defender": dict(self.defender),
+            "currentSide": self.side,
+            "question": self.question.get("pergunta"),
+            "choices": list(self.question.get("alternativas") or []),
+            "correctIndex": self.question.get("correta"),
+            "timePool": dict(self.pool),
+            "turnStartedAt": self.turn_started_wall,
+            "turnStartedMono": self.turn_started,
+            "maxTime": bank,
+            "remainingTime": bank,
+            "layout": self.question.get("layout"),   # quebras de linha prontas (realtime/prefetch.py)
+        }
+
+    def to_dict(self, now: Optional[float] = None) -> dict:
+        """Estado completo em tipos JSON. O tempo da vez vai como decorrido (o clock é do processo)."""
+        return {
+            "battleId": self.battle_id,
+            "attacker": dict(self.attacker),
+            "defender": dict(self.defender),
+            "side": self.side,
+            "pool": dict(self.pool),
+            "question": dict(self.question),
+            "elapsed": self.elapsed(now),
+            "result": None if self.result is None else vars(self.result).copy(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, pick_question: Callable[[], dict], *,
+                  clock: Callable[[], float] = server_now, now: Optional[float] = None) -> "QuizDuel":
+        duel = cls.__new__(cls)
+        duel.attacker = dict(data["attacker"])
+        duel.defender = dict(data["defender"])
+        duel.pick_question = pick_question
+        duel.clock = clock
+        duel.battle_id = data["battleId"]
+        duel.pool = {side: float(data["pool"][side]) for side in SIDES}
+        duel.side = data["side"]
+        duel.question = dict(data["question"])
+        duel.turn_started = (clock() if now is None else now) - float(data.get("elapsed") or 0.0)
+        duel.turn_started_wall = time.time() - float(data.get("elapsed") or 0.0)
+        duel.result = DuelOutcome(**data["result"]) if data.get("result") else None
+        return duel
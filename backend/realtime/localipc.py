@@ -0,0 +1,310 @@
+# realtime/localipc.py
+# canal local entre o jogo (host) e o viewer 3D na mesma máquina, sem WebSocket:
+# um bloco de memória compartilhada com o estado do quiz em layout fixo e um pipe
+# que só serve para acordar o viewer quando o bloco muda.
+#
+# Bloco (little-endian):
+#   cabeçalho  4s magic | u32 capacidade | u64 seq | u32 tamanho do corpo
+#   corpo      u8 fase | u8 flags | u32 battleId | u8 vez | u8 cor atacante | u8 cor defensor
+#              f32 banco brancas | f32 banco pretas | f32 maxTime | f32 remainingTime | f64 deadline
+#              str modelo atacante | str modelo defensor | str pergunta | u8 n | n x str alternativa
+#              [flags & F_LAYOUT] quebras de linha: pts da pergunta, u8 n, n x pts da alternativa
+#              (str = u16 tamanho + utf-8; pts = u8 n + n x u16 posição, ver realtime/prefetch.py)
+# seq funciona como seqlock: ímpar enquanto o host escreve. O leitor confere o seq antes
+# e depois de ler; se mudou, descarta e tenta no próximo frame. Por frame o viewer só lê
+# os 8 bytes do seq; o corpo é decodificado direto do buffer quando o seq anda.
+#
+# O deadline é do time.monotonic() do host -- o mesmo relógio do viewer na mesma
+# máquina, então aqui não precisa de ping/pong (ClockSync.assume_same_clock).
+import os
+import select
+import struct
+import time
+import uuid
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+BLOCK_SIZE = 64 * 1024
+MAGIC = b"CQB1"
+
+_HEADER = struct.Struct("<4sIQI")
+_SEQ = struct.Struct("<Q")
+_SIZE = struct.Struct("<I")
+_SEQ_AT = 8
+_SIZE_AT = 16
+_BODY_AT = 24
+_QUIZ = struct.Struct("<BBIBBBffffd")
+_STR = struct.Struct("<H")
+
+_PHASES = ("lobby", "chess", "quiz")
+_SIDES = ("white", "black")
+F_QUIZ = 1
+F_LAYOUT = 2
+
+ENV_NAME = "QUIZ_SHM_NAME"        # nome do bloco, passado ao viewer pelo host
+ENV_NOTIFY = "QUIZ_NOTIFY_FD"     # fd de leitura do pipe de aviso (só POSIX)
+
+
+def _pack_str(out: bytearray, text) -> None:
+    data = str(text or "").encode("utf-8")[:0xFFFF]
+    out += _STR.pack(len(data))
+    out += data
+
+
+def _pack_points(out: bytearray, points) -> None:
+    points = list(points or [])[:255]
+    out.append(len(points))
+    out += struct.pack(f"<{len(points)}H", *points)
+
+
+def _read_points(buf, at: int) -> Tuple[list, int]:
+    n = buf[at]
+    at += 1
+    return list(struct.unpack_from(f"<{n}H", buf, at)), at + 2 * n
+
+
+def pack_state(payload: dict) -> bytes:
+    """Payload de estado (o mesmo dict do JSON) -> corpo do bloco. Só fase e quiz."""
+    quiz = payload.get("quiz") or {}
+    attacker = quiz.get("attacker") or {}
+    defender = quiz.get("defender") or {}
+    pool = quiz.get("timePool") or {}
+    choices = (quiz.get("choices") or [])[:255]
+    layout = quiz.get("layout")
+    out = bytearray(_QUIZ.pack(
+        _PHASES.index(payload.get("phase", "lobby")),
+        (F_QUIZ if quiz else 0) | (F_LAYOUT if layout else 0),
+        int(quiz.get("battleId") or 0) & 0xFFFFFFFF,
+        _SIDES.index(quiz.get("currentSide", "white")),
+        _SIDES.index(attacker.get("color", "white")),
+        _SIDES.index(defender.get("color", "black")),
+        float(pool.get("white", 0.0)), float(pool.get("black", 0.0)),
+        float(quiz.get("maxTime") or 0.0),
+        # com deadline o viewer conta sozinho; remainingTime (que muda a cada leitura) só
+        # vai quando não há prazo, senão todo broadcast reescreveria o bloco
+        0.0 if quiz.get("deadline") else float(quiz.get("remainingTime") or 0.0),
+        float(quiz.get("deadline") or 0.0),
+    ))
+    _pack_str(out, attacker.get("model"))
+    _pack_str(out, defender.get("model"))
+    _pack_str(out, quiz.get("question"))
+    out.append(len(choices))
+    for choice in choices:
+        _pack_str(out, choice)
+    if layout:
+        _pack_points(out, layout.get("q"))
+        wraps = (layout.get("c") or [])[:255]
+        out.append(len(wraps))
+        for points in wraps:
+            _pack_points(out, points)
+    return bytes(out)
+
+
+def _read_str(buf, at: int) -> Tuple[str, int]:
+    (n,) = _STR.unpack_from(buf, at)
+    at += _STR.size
+    return str(buf[at:at + n], "utf-8"), at + n
+
+
+def unpack_state(buf, at: int = 0) -> dict:
+    """Corpo -> {"phase", "quiz"} no formato que o viewer já usa (sem JSON)."""
+    (phase, flags, battle_id, side, atk_color, def_color,
+     pool_w, pool_b, max_time, remaining, deadline) = _QUIZ.unpack_from(buf, at)
+    state = {"type": "state", "phase": _PHASES[phase], "quiz": None}
+    if not flags & F_QUIZ:
+        return state
+    at += _QUIZ.size
+    atk_model, at = _read_str(buf, at)
+    def_model, at = _read_str(buf, at)
+    question, at = _read_str(buf, at)
+    count = buf[at]
+    at += 1
+    choices = []
+    for _ in range(count):
+        choice, at = _read_str(buf, at)
+        choices.append(choice)
+    layout = None
+    if flags & F_LAYOUT:
+        q_points, at = _read_points(buf, at)
+        count = buf[at]
+        at += 1
+        c_points = []
+        for _ in range(count):
+            points, at = _read_points(buf, at)
+            c_points.append(points)
+        layout = {"q": q_points, "c": c_points}
+    quiz = {
+        "battleId": battle_id,
+        "attacker": {"color": _SIDES[atk_color], "model": atk_model},
+        "defender": {"color": _SIDES[def_color], "model": def_model},
+        "currentSide": _SIDES[side],
+        "question": question,
+        "choices": choices,
+        "timePool": {"white": pool_w, "black": pool_b},
+        "maxTime": max_time,
+        "remainingTime": remaining,
+        "layout": layout,
+    }
+    if deadline:
+        quiz["deadline"] = deadline
+    state["quiz"] = quiz
+    return state
+
+
+class LocalStateChannel:
+    """Lado do host: cria o bloco e o pipe; publish() a cada broadcast_state."""
+
+    def __init__(self, size: int = BLOCK_SIZE):
+        self.shm = shared_memory.SharedMemory(name=f"cqb_{uuid.uuid4().hex[:12]}", create=True, size=size)
+        self.capacity = size - _BODY_AT
+        self.seq = 0
+        self._last = None
+        _HEADER.pack_into(self.shm.buf, 0, MAGIC, self.capacity, 0, 0)
+        # pipe de aviso: fd herdado pelo viewer (pass_fds). No Windows o viewer só olha o seq.
+        self._notify_r = self._notify_w = None
+        if os.name == "posix":
+            self._notify_r, self._notify_w = os.pipe()
+            os.set_blocking(self._notify_w, False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def child_env(self) -> dict:
+        env = {ENV_NAME: self.name}
+        if self._notify_r is not None:
+            env[ENV_NOTIFY] = str(self._notify_r)
+        return env
+
+    def pass_fds(self) -> tuple:
+        return () if self._notify_r is None else (self._notify_r,)
+
+    def publish(self, payload: dict) -> bool:
+        """Escreve o estado se a parte do viewer mudou. True se escreveu."""
+        body = pack_state(payload)
+        if body == self._last:
+            return False
+        if len(body) > self.capacity:
+            print(f"WARN localipc: estado com {len(body)} bytes não cabe no bloco ({self.capacity})")
+            return False
+        buf = self.shm.buf
+        self.seq += 1                                    # ímpar: escrevendo
+        _SEQ.pack_into(buf, _SEQ_AT, self.seq)
+        buf[_BODY_AT:_BODY_AT + len(body)] = body
+        _SIZE.pack_into(buf, _SIZE_AT, len(body))
+        self.seq += 1                                    # par: pronto
+        _SEQ.pack_into(buf, _SEQ_AT, self.seq)
+        self._last = body
+        if self._notify_w is not None:
+            try:
+                os.write(self._notify_w, b"\0")
+            except (BlockingIOError, BrokenPipeError):
+                pass   # pipe cheio = o viewer já tem aviso pendente
+        return True
+
+    def close(self):
+        for fd in (self._notify_r, self._notify_w):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._notify_r = self._notify_w = None
+        if self.shm is not None:
+            self.shm.close()
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+            self.shm = None
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)   # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        # antes do 3.13 o resource_tracker apagaria o bloco do host quando o viewer sai
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+class LocalStateReader:
+    """Lado do viewer: poll() por frame devolve o último estado (o mesmo dict até o seq mudar)."""
+
+    def __init__(self, name: str, notify_fd: Optional[int] = None):
+        self.shm = _attach(name)
+        if _HEADER.unpack_from(self.shm.buf, 0)[0] != MAGIC:
+            self.shm.close()
+            raise ValueError(f"bloco {name} não é do Chess-Quiz")
+        self.notify_fd = notify_fd
+        if notify_fd is not None:
+            os.set_blocking(notify_fd, False)
+        self.seq = 0
+        self.state: Optional[dict] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["LocalStateReader"]:
+        """Reader a partir das variáveis que o host passa ao viewer; None se não há canal local."""
+        name = os.getenv(ENV_NAME)
+        if not name:
+            return None
+        fd = os.getenv(ENV_NOTIFY)
+        try:
+            return cls(name, int(fd) if fd else None)
+        except (OSError, ValueError) as e:
+            print("WARN localipc:", e)
+            return None
+
+    def poll(self) -> Optional[dict]:
+        buf = self.shm.buf
+        (seq,) = _SEQ.unpack_from(buf, _SEQ_AT)
+        if seq == self.seq or seq & 1:
+            return self.state
+        (size,) = _SIZE.unpack_from(buf, _SIZE_AT)
+        try:
+            state = unpack_state(buf[_BODY_AT:_BODY_AT + size])
+        except (struct.error, IndexError, UnicodeDecodeError, ValueError):
+            state = None   # lido no meio de uma escrita
+        if state is None or _SEQ.unpack_from(buf, _SEQ_AT)[0] != seq:
+            return self.state
+        self.seq, self.state = seq, state
+        return state
+
+    def wait(self, timeout: float) -> bool:
+        """Espera um aviso do host (até `timeout` s). True se chegou algo. Sem pipe, só dorme."""
+        if self.notify_fd is None:
+            time.sleep(timeout)
+            return False
+        ready, _, _ = select.select([self.notify_fd], [], [], timeout)
+        if not ready:
+            return False
+        try:
+            while True:
+                if not os.read(self.notify_fd, 64):
+                    # EOF: o host fechou o pipe (ou morreu); daqui em diante só dorme
+                    self._close_notify()
+                    return False
+        except BlockingIOError:
+            return True   # pipe esvaziado
+        except OSError:
+            self._close_notify()
+            return False
+
+    def _close_notify(self):
+        fd, self.notify_fd = self.notify_fd, None
+        if fd is not None:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def close(self):
+        self._close_notify()
+        if self.shm is not None:
+            self.shm.close()
+            self.shm = None
@@ -0,0 +1,482 @@
+# realtime/match.py
+# orquestração da partida sem nenhuma UI: lances, duelos de quiz, estouro de
+# tempo, fim de jogo e ranking. Antes morava no GameScene (pygame); agora a cena
+# só desenha e o servidor dedicado (python -m realtime) usa a mesma lógica.
+#
+# Todo método que escreve no game_ctx é comando do GameActor (roda na thread dele).
+import asyncio
+import time
+from typing import Callable, Optional
+
+from chess.core.rules import is_check, king_square
+from chess.render.adapter import ChessAPI
+from chess.utils.coordinates import fr
+from .actor import GameActor
+from .duel import QuizDuel, DuelOutcome
+from .models import BoardState
+from .prefetch import QuestionPrefetcher
+from .scheduler import QuestionScheduler
+from persistence.questions import QuestionStore
+
+# CHANGED: integração com o banco de ranking
+try:
+    from persistence.database import init_db, registrar_vitoria
+except Exception as e:
+    print("WARN: não foi possível importar módulo de ranking:", e)
+    init_db = None
+    registrar_vitoria = None
+
+# Se seu core expõe BOARD_W/BOARD_H via utils.constants, usamos nos cálculos.
+try:
+    from chess.utils.constants import BOARD_W, BOARD_H, WHITE, BLACK, PIECE_KING
+except Exception:
+    # Fallback seguro (não deve acontecer no seu projeto)
+    BOARD_W, BOARD_H, WHITE = 8, 8, 0
+
+CONSOLE_LINES = 8
+LOBBY_COUNTDOWN = 10.0          # segundos com dois jogadores até a partida começar
+GAME_OVER_HOLD = 10.0           # segundos mostrando o vencedor antes de voltar ao lobby
+
+# CHANGED: flag para inicializar o DB apenas uma vez
+_DB_INIT_DONE = False
+
+def ensure_db_init():
+    """Inicializa o banco de ranking apenas uma vez por processo."""
+    global _DB_INIT_DONE
+    if _DB_INIT_DONE:
+        return
+    if init_db is None:
+        return
+    try:
+        init_db()
+        _DB_INIT_DONE = True
+    except Exception as e:
+        print("Erro ao inicializar banco de ranking:", e)
+
+
+# perguntas num SQLite indexado (persistence/questions.py), abertas no primeiro sorteio
+QUESTIONS = QuestionStore()
+
+
+async def _noop_move(_src, _dst):
+    return False, False
+
+async def _noop_quiz(_cid, _answer):
+    return False
+
+def lobby_ctx() -> dict:
+    """game_ctx de uma sala esperando jogadores (lances e respostas ignorados)."""
+    return {"phase": "lobby", "board": None, "turn": None, "quiz": None,
+            "on_move": _noop_move, "on_quiz_answer": _noop_quiz}
+
+
+class MatchService:
+    """
+    Uma partida (uma sala). Escreve só no estado do ator; quem mostra o jogo
+    (GameScene, web, viewer 3D) lê os snapshots publicados.
+
+    on_quiz_start: chamado quando um duelo começa (o host abre o viewer 3D).
+    request_broadcast: avisa a sala fora do fluxo de mensagens (lance do host, fim de jogo).
+    question_targets: alvos do sorteio (kwargs do QuestionScheduler: topics, difficulty...).
+    question_state: QuestionPrefetcher.to_dict() salvo, para retomar a partida sem repetir perguntas.
+    """
+
+    def __init__(self, actor: GameActor, api=None, players: Optional[dict] = None,
+                 on_quiz_start: Optional[Callable[[], None]] = None,
+                 request_broadcast: Optional[Callable[[], None]] = None,
+                 question_targets: Optional[dict] = None,
+                 question_state: Optional[dict] = None):
+        ensure_db_init()
+        self.actor = actor
+        self.api = api if api is not None else ChessAPI()
+        self.players = players or {"whiteName": "Player 1", "blackName": "Player 2"}
+        self._on_quiz_start = on_quiz_start
+        self._broadcast = request_broadcast
+        # estado privado do ator: só é escrito dentro de comandos
+        self.game_ctx = actor.state
+        QUESTIONS.watch()   # JSON editado durante a partida vale já no próximo duelo
+        self.duel: Optional[QuizDuel] = None   # duelo em andamento (game_ctx["quiz"] é o payload dele)
+        self.question_targets = question_targets or {}
+        self._resume_questions = question_state
+        self.questions: Optional[QuestionPrefetcher] = None   # montado a cada start()
+
+    def start(self, players: Optional[dict] = None):
+        """Comando do ator: prepara o game_ctx para a partida."""
+        if players:
+            self.players = {"whiteName": players.get("whiteName") or players.get("p1") or "Player 1",
+                            "blackName": players.get("blackName") or players.get("p2") or "Player 2"}
+        # saco de perguntas novo a cada partida (ou o salvo, se está retomando); as
+        # primeiras já ficam prontas antes da primeira captura
+        if self._resume_questions is not None:
+            self.questions = QuestionPrefetcher.from_dict(self._resume_questions, QUESTIONS)
+            self._resume_questions = None
+        else:
+            self.questions = QuestionPrefetcher(QuestionScheduler(QUESTIONS, **self.question_targets))
+        self.questions.fill_async()
+        # CHANGED: agora que estamos na cena do jogo, garantimos fase e callbacks reais
+        self.game_ctx["phase"] = "chess"
+        self.game_ctx["on_move"] = self._on_move_async
+        self.game_ctx["on_quiz_answer"] = self._on_quiz_answer_async
+        self.game_ctx["turn"] = self.api.turn()
+        self.game_ctx["check_quiz_timeout"] = self._check_quiz_timeout
+        self.game_ctx["console"] = [""] * CONSOLE_LINES
+        self._sync_board_state()
+        self._update_turn_ctx(log_to_console=False)
+
+        self._log("Partida iniciada...")
+        self._update_turn_ctx(log_to_console=True) 
+
+        # limpa flags no contexto compartilhado (realtime)
+        self.game_ctx["gameOver"] = False
+        self.game_ctx["gameOverAt"] = None
+        self.game_ctx["winnerSide"] = None
+        self.game_ctx["winnerName"] = None
+        self.game_ctx["outcome"] = None
+
+    def _log(self, text: str):
+        """Escreve no console da partida (via estado do ator, lido no render pelo snapshot)."""
+        lines = self.game_ctx.setdefault("console", [""] * CONSOLE_LINES)
+        lines.append(text)
+        del lines[:-CONSOLE_LINES]
+
+    def _next_question(self):
+        return self.questions.take()
+
+    def _check_quiz_timeout(self) -> bool:
+        """Comando do ator (loop do servidor): True se o duelo acabou por tempo."""
+        if self.game_ctx.get("phase") != "quiz" or self.duel is None:
+            return False
+        outcome = self.duel.check_timeout()
+        if outcome is None:
+            return False
+        self._finish_duel(outcome)
+        return True
+
+    def _start_quiz(self):
+        """
+        Inicia o modo quiz depois de uma captura.
+        Usa self.api.last_battle pra montar o 'duelo' que o front 3D vai renderizar.
+        """
+        battle = getattr(self.api, "last_battle", None)
+        if not battle:
+            # não deveria acontecer se was_capture == True, mas garantimos
+            return
+
+        self.duel = QuizDuel.from_battle(battle, self._next_question)
+        # CHANGED: Muda a fase pro front saber que agora é tela de quiz
+        self.game_ctx["phase"] = "quiz"
+        self.game_ctx["quiz"] = self.duel.payload()
+
+        # log no console
+        atacante_nome = "Brancas" if self.duel.side == "white" else "Pretas"
+        self._log(f"Quiz iniciado! {atacante_nome} atacaram, vez delas responderem.")
+
+        if self._on_quiz_start is not None:
+            self._on_quiz_start()
+
+    def _finish_duel(self, outcome: DuelOutcome):
+        """Aplica o fim do duelo no tabuleiro: batalha resolvida, volta ao xadrez, checa fim de jogo."""
+        self.duel = None
+        if hasattr(self.api, "resolve_battle"):
+            self.api.resolve_battle(outcome.winner)
+
+        lado = "Brancas" if outcome.loser == "white" else "Pretas"
+        if outcome.reason == "timeout":
+            self._log(f"As {lado} estouraram o tempo!")
+        elif outcome.reason == "out_of_time":
+            self._log(f"As {lado} ficaram sem tempo!")
+
+        self.game_ctx["phase"] = "chess"
+        self.game_ctx["quiz"] = None
+        self._sync_board_state()
+        self._update_turn_ctx(log_to_console=True)
+
+        if self._check_king_absent_and_gameover():
+            return
+        self._check_game_over()
+
+    def _sync_board_state(self):
+        board_list = self.api.export_board_linear()
+        self.game_ctx["board"] = BoardState(
+            cells=board_list, width=BOARD_W, height=BOARD_H
+        )
+
+    def _update_check_status(self):
+        # 1. ACESSO AO TABULEIRO E DEFINIÇÃO DE VARIÁVEIS BÁSICAS
+        try:
+            # Acessa a lista de peças (o 'list' object) a partir do ChessAPI (self.api) -> Board5x6 (b)
+            board_list = self.api.b.board
+        except AttributeError:
+            # Se 'self.api' ou 'self.api.b' não existirem (inicialização falhou)
+            print("Erro: Instância do tabuleiro ChessAPI não acessível.")
+            return
+
+        current_turn = self.game_ctx["turn"]
+        color_int = WHITE if current_turn == "white" else BLACK
+        side_str = current_turn
+
+        # 2. VERIFICAÇÃO DE XEQUE
+        # Chama a função is_check (agora corretamente importada e passando a lista)
+        in_check = is_check(board_list, color_int)
+
+        # 3. RESET DE ESTADO (Limpa o estado de xeque a cada chamada)
+        self.game_ctx["inCheckSide"] = None
+        self.game_ctx["inCheckKing"] = None
+
+        # 4. ATUALIZAÇÃO DO ESTADO APENAS SE HOUVER XEQUE
+        if in_check:
+            try:
+                # Encontra a casa do rei (king_square retorna o índice: 0 a N-1)
+                king_sq_idx = king_square(board_list, color_int)
+
+                if king_sq_idx is not None:
+                    # Converte o índice (0..29) para coordenadas (col, row) que o frontend espera: (x, y)
+                    king_col, king_row = fr(king_sq_idx)
+                    
+                    # Preenche o contexto para que o frontend (chess.js) possa desenhar a cor vermelha
+                    self.game_ctx["inCheckSide"] = side_str
+                    # O frontend (chess.js) espera um dicionário {"x": x, "y": y}
+                    self.game_ctx["inCheckKing"] = {"x": king_col, "y": king_row}
+
+            except Exception as e:
+                # Captura qualquer erro ao encontrar/converter a casa do rei
+                print("Erro ao processar a casa do rei em xeque:", e)
+                # Garante que o estado não será inconsistente
+                self.game_ctx["inCheckSide"] = None
+                self.game_ctx["inCheckKing"] = None
+
+    def _king_square_from_any(self, core_or_board, color: int):
+        """
+        Retorna o índice linear da casa do rei (0..n-1) para a cor dada,
+        independente se 'core_or_board' é um objeto com .king_square()
+        ou uma lista linear de casas.
+        """
+        try:
+            # Caso 1: objeto com método king_square
+            if hasattr(core_or_board, "king_square"):
+                return core_or_board.king_square(color)
+
+            # Caso 2: lista linear ou objeto com atributo .board (lista)
+            board_list = core_or_board
+            if not isinstance(board_list, list):
+                board_list = getattr(core_or_board, "board", None)
+
+            if not isinstance(board_list, list):
+                return None
+
+            # Espera células como tuplas/listas (color, piece, ...)
+            for idx, cell in enumerate(board_list):
+                if not cell:
+                    continue
+                if isinstance(cell, (tuple, list)) and len(cell) >= 2:
+                    c, piece = cell[0], cell[1]
+                    if c == color and piece == PIECE_KING:
+                        return idx
+            return None
+        except Exception as e:
+            print("DEBUG _king_square_from_any error:", e)
+            return None
+
+    def _check_king_absent_and_gameover(self) -> bool:
+        """
+        Se um dos reis não existe no tabuleiro, dispara Game Over imediatamente.
+        Retorna True se finalizou o jogo, False caso contrário.
+        """
+        try:
+            core = getattr(self.api, "board", None) or self.api
+
+            wk = self._king_square_from_any(core, WHITE)
+            bk = self._king_square_from_any(core, BLACK)
+
+            # evita falso positivo durante boot (ambos None)
+            if wk is None and bk is None:
+                return False
+
+            if wk is None and bk is not None:
+                winner_side = "black"
+                winner_name = self.players.get("blackName", "Pretas")
+            elif bk is None and wk is not None:
+                winner_side = "white"
+                winner_name = self.players.get("whiteName", "Brancas")
+            else:
+                return False  # ambos vivos
+
+            self._start_game_over(winner_side, winner_name)
+            return True
+
+        except Exception as e:
+            print("Erro em _check_king_absent_and_gameover:", e)
+            return False
+
+    def _start_game_over(self, winner_side: str | None, winner_name: str | None):
+        winner_name = winner_name or "Empate"
+
+        # CHANGED: registra vitória no banco se houver vencedor claro
+        if winner_side is not None and registrar_vitoria is not None:
+            try:
+                registrar_vitoria(winner_name)
+            except Exception as e:
+                print(f"Erro ao registrar vitória para {winner_name}: {e}")
+
+        # expõe pro realtime/web (e pro render, via snapshot)
+        self.game_ctx["gameOver"] = True
+        self.game_ctx["gameOverAt"] = time.time()
+        self.game_ctx["winnerSide"] = winner_side
+        self.game_ctx["winnerName"] = winner_name
+
+        self._request_broadcast()
+
+    def _check_game_over(self):
+        try:
+            core = getattr(self.api, "board", None) or self.api
+            if not hasattr(core, "outcome"):
+                return
+
+            res = core.outcome()
+            if not res:
+                return
+
+            # guarda outcome bruto (se quiser usar no front)
+            self.game_ctx["outcome"] = res
+
+            winner_side = None
+            if res.startswith("checkmate_white_wins"):
+                winner_side = "white"
+            elif res.startswith("checkmate_black_wins"):
+                winner_side = "black"
+
+            if winner_side:
+                name_key = "whiteName" if winner_side == "white" else "blackName"
+                winner_name = self.players.get(name_key, "Jogador vencedor")
+                self._start_game_over(winner_side, winner_name)
+            else:
+                # empate / stalemate
+                self._start_game_over(None, "Empate")
+
+        except Exception as e:
+            print("Erro em _check_game_over:", e)
+
+    async def _on_move_async(self, src_xy, dst_xy):
+        return await self.actor.call(self._apply_move, src_xy, dst_xy)
+
+    def _apply_move(self, src_xy, dst_xy):
+        """Comando do ator: aplica um lance (web ou host)."""
+        ok = self.api.try_move(src_xy, dst_xy)
+        if not ok:
+            self._log("Movimento rejeitado")
+            return False, False
+
+        # descobre se o último movimento foi captura
+        was_capture = getattr(self.api, "was_capture", False)
+
+        
+        # atualiza estado local
+        self._sync_board_state()
+        self._update_check_status()
+        self._update_turn_ctx(log_to_console=True)
+            
+        # quiz
+        if was_capture:
+            self._start_quiz()
+        else:
+            self._check_game_over()
+
+        return ok, getattr(self.api, "was_capture", False)
+
+    async def _on_quiz_answer_async(self, client_id: str, answer: str):
+        return await self.actor.call(self._apply_quiz_answer, client_id, answer)
+
+    def _apply_quiz_answer(self, client_id: str, answer: str):
+        """
+        Comando do ator. answer vem da web como string.
+        Sugestão: mandar sempre o índice da alternativa ("0", "1", "2"...).
+        Retorna True se o duelo acabou.
+        """
+        if self.game_ctx.get("phase") != "quiz" or self.duel is None:
+            return False  # nada a fazer
+
+        outcome = self.duel.answer(answer)
+        if outcome is None:
+            return False
+        if outcome.finished:
+            self._finish_duel(outcome)
+            return True
+
+        # acertou: payload novo (vez do outro lado, bancos preservados)
+        self.game_ctx["quiz"] = self.duel.payload()
+        nome = "Brancas" if self.duel.side == "white" else "Pretas"
+        self._log(f"Quiz continua! Agora é a vez das {nome}.")
+        return False  # quiz continua
+
+    def host_move(self, src_xy, dst_xy):
+        """Comando do ator: lance feito com o mouse na janela do host."""
+        ok, _ = self._apply_move(src_xy, dst_xy)
+        if ok:
+            self._log(f"Movido de {src_xy} para {dst_xy}")
+        self._request_broadcast()
+
+    def _update_turn_ctx(self, log_to_console: bool = False):
+        """
+        Lê o turno da API e normaliza para 'white' / 'black'
+        dentro de game_ctx['turn'], além de escrever no console.
+        """
+        raw = self.api.turn()  # pode ser "white"/"black" ou WHITE/BLACK
+
+        if raw in ("white", "w", WHITE):
+            self.game_ctx["turn"] = "white"
+            msg = "Vez das brancas"
+        elif raw in ("black", "b", BLACK):
+            self.game_ctx["turn"] = "black"
+            msg = "Vez das pretas"
+        else:
+            # Só cai aqui se vier algo completamente inesperado
+            self.game_ctx["turn"] = None
+            msg = f"Vez indefinida (valor recebido: {raw!r})"
+
+        if log_to_console:
+            self._log(msg)
+
+    def _request_broadcast(self):
+        if self._broadcast is not None:
+            try:
+                self._broadcast()
+            except Exception as e:
+                print("WARN broadcast:", e)
+
+    def reset(self):
+        """Comando do ator: tabuleiro novo e volta para o lobby (jogadores e vagas ficam)."""
+        self.api = ChessAPI()
+        self.game_ctx.update(lobby_ctx(), gameOver=False, gameOverAt=None, winnerSide=None,
+                             winnerName=None, outcome=None, inCheckSide=None, inCheckKing=None)
+        self.game_ctx.pop("check_quiz_timeout", None)
+        self.duel = None
+
+    # ---------- servidor dedicado ----------
+
+    async def run_lobby(self, mgr, countdown: float = LOBBY_COUNTDOWN, hold: float = GAME_OVER_HOLD):
+        """
+        O que o LobbyScene e o GameScene fazem no host, sem tela: com as duas vagas
+        ocupadas por `countdown` segundos a partida começa; depois do fim de jogo,
+        espera `hold` segundos e volta ao lobby.
+        """
+        ready_since = None
+        while True:
+            await asyncio.sleep(0.25)
+            snap = self.actor.snapshot
+            if snap.get("phase") == "lobby":
+                seats = snap.get("seats") or {}
+                white, black = seats.get("white"), seats.get("black")
+                present = {p.get("name") for p in mgr.list_players()}
+                if not (white and black and white in present and black in present):
+                    ready_since = None
+                    continue
+                if ready_since is None:
+                    ready_since = time.monotonic()
+                elif time.monotonic() - ready_since >= countdown:
+                    ready_since = None
+                    await self.actor.call(self.start, {"whiteName": white, "blackName": black})
+                    await mgr.broadcast_state()
+            elif snap.get("gameOver") and snap.get("gameOverAt") is not None:
+                if time.time() - snap["gameOverAt"] >= hold:
+                    await self.actor.call(self.reset)
+                    await mgr.broadcast_state()
@@ -0,0 +1,133 @@
+# realtime/metrics.py
+# métricas do servidor no formato texto do Prometheus (GET /metrics).
+#
+# Feito para ficar ligado em produção: todas as séries existem desde o import
+# (rótulos fixos, listas de tamanho fixo) e o caminho quente só faz lookup num
+# dict e soma num slot -- nenhum objeto novo por mensagem. Rótulo desconhecido
+# cai em "other" em vez de criar série nova.
+import asyncio
+import bisect
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+
+IN_TYPES = ("join", "move", "quiz_answer", "resign", "ping", "invalid")
+OUT_TYPES = ("state", "session", "pong", "strings", "other")
+SHED_TYPES = ("join", "move", "quiz_answer", "resign", "ping", "oversize", "other")
+ROLES = ("player", "spectator", "remote")
+
+_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+_BYTES_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+LOOP_LAG_INTERVAL = 0.5   # segundos entre amostras do atraso do event loop
+
+
+def _fmt_labels(label: str, value: str) -> str:
+    return f'{{{label}="{value}"}}' if label else ""
+
+
+class Counter:
+    """Contador com um rótulo de valores fixos."""
+
+    def __init__(self, name: str, help_: str, label: str = "", values: Sequence[str] = ("",)):
+        self.name, self.help, self.label = name, help_, label
+        self._index: Dict[str, int] = {v: i for i, v in enumerate(values)}
+        self._values = tuple(values)
+        self._other = self._index.get("other", len(values) - 1)
+        self.counts: List[int] = [0] * len(values)
+
+    def inc(self, value: str = "", n: int = 1):
+        self.counts[self._index.get(value, self._other)] += n
+
+    def render(self, out: List[str]):
+        out.append(f"# HELP {self.name} {self.help}")
+        out.append(f"# TYPE {self.name} counter")
+        for v, c in zip(self._values, self.counts):
+            out.append(f"{self.name}{_fmt_labels(self.label, v)} {c}")
+
+
+class Histogram:
+    """Histograma de buckets fixos (cumulativo só na hora de renderizar)."""
+
+    def __init__(self, name: str, help_: str, buckets: Sequence[float],
+                 label: str = "", values: Sequence[str] = ("",)):
+        self.name, self.help, self.label = name, help_, label
+        self.buckets = tuple(buckets)
+        self._index: Dict[str, int] = {v: i for i, v in enumerate(values)}
+        self._values = tuple(values)
+        # por valor de rótulo: contagem por bucket (+Inf no fim), soma e total
+        self.counts: List[List[int]] = [[0] * (len(buckets) + 1) for _ in values]
+        self.sums: List[float] = [0.0] * len(values)
+
+    def observe(self, x: float, value: str = ""):
+        i = self._index.get(value, 0)
+        self.counts[i][bisect.bisect_left(self.buckets, x)] += 1
+        self.sums[i] += x
+
+    def render(self, out: List[str]):
+        out.append(f"# HELP {self.name} {self.help}")
+        out.append(f"# TYPE {self.name} histogram")
+        for v, counts, total in zip(self._values, self.counts, self.sums):
+            prefix = f'{self.label}="{v}",' if self.label else ""
+            acc = 0
+            for le, c in zip(self.buckets, counts):
+                acc += c
+                out.append(f'{self.name}_bucket{{{prefix}le="{le:g}"}} {acc}')
+            acc += counts[-1]
+            out.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {acc}')
+            out.append(f"{self.name}_sum{_fmt_labels(self.label, v)} {total!r}")
+            out.append(f"{self.name}_count{_fmt_labels(self.label, v)} {acc}")
+
+
+class Metrics:
+    def __init__(self):
+        self.messages_in = Counter("realtime_messages_in_total",
+                                   "Mensagens recebidas dos clientes, por tipo.", "type", IN_TYPES)
+        self.messages_out = Counter("realtime_messages_out_total",
+                                    "Mensagens enviadas aos clientes (por socket), por tipo.", "type", OUT_TYPES)
+        self.messages_shed = Counter("realtime_messages_shed_total",
+                                     "Frames descartados pelo limite de taxa ou tamanho, por tipo.",
+                                     "type", SHED_TYPES)
+        self.joins_coalesced = Counter("realtime_joins_coalesced_total",
+                                       "Joins idênticos repetidos na mesma conexão, ignorados.")
+        self.broadcast_seconds = Histogram("realtime_broadcast_seconds",
+                                           "Duração de um envio para todo o tier.", _LATENCY_BUCKETS,
+                                           "tier", ("player", "spectator"))
+        self.payload_bytes = Histogram("realtime_payload_bytes",
+                                       "Tamanho do estado transmitido, por encoding.", _BYTES_BUCKETS,
+                                       "encoding", ("json", "binary"))
+        self.move_seconds = Histogram("realtime_move_validation_seconds",
+                                      "Validação e aplicação de um lance no ator.", _LATENCY_BUCKETS)
+        self.quiz_timeout_lag = Histogram("realtime_quiz_timeout_lag_seconds",
+                                          "Atraso entre o prazo do quiz e a detecção do estouro.", _LAG_BUCKETS)
+        self.loop_lag = Histogram("realtime_event_loop_lag_seconds",
+                                  "Atraso do event loop para acordar um sleep.", _LAG_BUCKETS)
+        self._gauges: Dict[str, Tuple[str, str, Callable[[], Dict[str, float]]]] = {}
+
+    def gauge(self, name: str, help_: str, label: str, read: Callable[[], Dict[str, float]]):
+        """Gauge lido só no scrape (ex.: conexões por papel). Registrar de novo substitui."""
+        self._gauges[name] = (help_, label, read)
+
+    def render(self) -> str:
+        out: List[str] = []
+        for name, (help_, label, read) in self._gauges.items():
+            out.append(f"# HELP {name} {help_}")
+            out.append(f"# TYPE {name} gauge")
+            for v, x in read().items():
+                out.append(f"{name}{_fmt_labels(label, v)} {x}")
+        for m in (self.messages_in, self.messages_out, self.messages_shed, self.joins_coalesced,
+                  self.broadcast_seconds, self.payload_bytes,
+                  self.move_seconds, self.quiz_timeout_lag, self.loop_lag):
+            m.render(out)
+        out.append("")
+        return "\n".join(out)
+
+    async def run_loop_lag_probe(self, interval: float = LOOP_LAG_INTERVAL):
+        """Dorme `interval` e mede quanto a mais o loop levou para voltar."""
+        while True:
+            t = time.monotonic()
+            await asyncio.sleep(interval)
+            self.loop_lag.observe(max(0.0, time.monotonic() - t - interval))
+
+
+METRICS = Metrics()   # um por processo (cada worker expõe o seu /metrics)
@@ -1,6 +1,6 @@
 # mensagens e estados
-from typing import Literal, Optional, List, Tuple
-from pydantic import BaseModel, Field
+from typing import Annotated, Literal, Optional, List, Tuple, Union
+from pydantic import BaseModel, Field, TypeAdapter
 
 # Tipos básicos
 Coord = Tuple[int, int]  # (x, y)
@@ -25,11 +25,20 @@ class StateMsg(BaseModel):
     quiz: Optional[dict] = None  # {question, answers, timer} se phase == "quiz"
     players: List[dict] = Field(default_factory=list)  # [{id, name, avatar}]
 
+# Tópicos de estado que um cliente pode assinar no join (JoinMsg.topics).
+# "type", "phase" e "seq" vão sempre; o mapa tópico -> campos fica em ws_manager.STATE_TOPICS.
+Topic = Literal["board", "quiz", "players", "result"]
+
 # Mensagens Client -> Host
 class JoinMsg(BaseModel):
     type: Literal["join"]
     name: str
     avatar: Optional[str] = None
+    encoding: Literal["json", "binary"] = "json"  # "binary" -> realtime/wire.py
+    role: Literal["player", "spectator"] = "player"  # spectator: estado agrupado, em taxa menor
+    token: Optional[str] = None     # sessão anterior (mensagem "session"), para retomar
+    lastSeq: Optional[int] = None   # último "seq" de estado recebido antes de cair
+    topics: Optional[List[Topic]] = None   # None = estado inteiro; ex.: ["quiz"] (viewer 3D)
 
 class MoveMsg(BaseModel):
     type: Literal["move"]
@@ -40,7 +49,22 @@ class QuizAnswerMsg(BaseModel):
     type: Literal["quiz_answer"]
     answer: str
 
-IncomingMsg = JoinMsg | MoveMsg | QuizAnswerMsg
+class ResignMsg(BaseModel):
+    type: Literal["resign"]
+
+class PingMsg(BaseModel):
+    type: Literal["ping"]
+    t0: float   # relógio local do cliente; volta no "pong" (realtime/clock.py)
+
+# união marcada por "type": o pydantic escolhe a classe direto pelo campo,
+# sem tentar uma por uma
+IncomingMsg = Annotated[
+    Union[JoinMsg, MoveMsg, QuizAnswerMsg, ResignMsg, PingMsg],
+    Field(discriminator="type"),
+]
+
+# compilado uma vez; validate_json aceita str ou bytes e já devolve o modelo
+INCOMING = TypeAdapter(IncomingMsg)
 
 # Envelope “any”
 class AnyMsg(BaseModel):
@@ -0,0 +1,98 @@
+# realtime/payload.py
+# cache do payload de estado: só reconstrói quando muda a versão do ator
+# (estado do jogo) ou do ConnectionManager (lista de jogadores).
+import json
+from typing import Optional, Tuple
+
+from .actor import GameActor
+from .duel import quiz_remaining
+from .ws_manager import encode_json
+from .wire import encode_state, patch_remaining
+
+# marcador colocado no lugar de remainingTime no JSON em cache
+_REMAINING_MARK = "__remainingTime__"
+_REMAINING_TOKEN = json.dumps(_REMAINING_MARK)
+
+
+class StatePayloadCache:
+    """
+    Guarda, por (versão do estado, versão dos jogadores), o payload montado e o
+    texto JSON já codificado. Entre versões, só remainingTime é recalculado e
+    emendado no texto em cache (sem refazer pydantic, sort de jogadores nem json.dumps).
+    """
+
+    def __init__(self, mgr, actor: GameActor):
+        self.mgr = mgr
+        self.actor = actor
+        self._key: Optional[Tuple[int, int]] = None
+        self._payload: Optional[dict] = None
+        self._parts: Tuple[str, ...] = ()
+        self._timed = False
+        self._quiz = None
+        self._bin: Optional[bytes] = None       # frame binário (realtime/wire.py), feito sob demanda
+        self._bin_remaining_at: Optional[int] = None
+        self._bin_epoch = 0                     # strings.epoch do frame em cache
+        self.seq = 0                 # número do evento: sobe a cada versão nova (retomada de sessão)
+        self.json_bytes = 0          # tamanho do JSON em bytes (sem os dígitos de remainingTime), p/ métricas
+        self.hits = 0
+        self.misses = 0
+
+    def _refresh(self):
+        version, snap = self.actor.published
+        key = (version, self.mgr.version)
+        if key == self._key:
+            self.hits += 1
+            return
+        self.misses += 1
+        from .router import _build_state_payload  # evita import circular
+
+        payload = _build_state_payload(self.mgr, snap)
+        self.seq += 1
+        payload["seq"] = self.seq
+        quiz = payload.get("quiz")
+        self._quiz = snap.get("quiz")
+        self._timed = bool(quiz) and quiz_remaining(self._quiz) is not None
+        if self._timed:
+            quiz["remainingTime"] = _REMAINING_MARK
+            self._parts = tuple(encode_json(payload).split(_REMAINING_TOKEN))
+        else:
+            self._parts = (encode_json(payload),)
+        self.json_bytes = sum(len(p.encode("utf-8")) for p in self._parts)
+        self._payload = payload
+        self._bin = None
+        self._key = key
+
+    def version(self) -> int:
+        """seq do estado atual (sem montar texto; ETag do /state)."""
+        self._refresh()
+        return self.seq
+
+    def payload(self) -> dict:
+        """Cópia do payload (dict) com os campos de tempo atualizados."""
+        self._refresh()
+        out = dict(self._payload)
+        if self._timed:
+            out["quiz"] = dict(out["quiz"], remainingTime=quiz_remaining(self._quiz))
+        return out
+
+    def text(self) -> str:
+        """Payload já codificado em JSON, pronto para ws.send_text."""
+        self._refresh()
+        if not self._timed:
+            return self._parts[0]
+        remaining = json.dumps(quiz_remaining(self._quiz))
+        return remaining.join(self._parts)
+
+    def binary(self) -> bytes:
+        """Frame STATE do protocolo binário; só é montado se houver cliente binário."""
+        if (self._bin is None or self._key != (self.actor.version, self.mgr.version)
+                or self._bin_epoch != self.mgr.strings.epoch):
+            payload = self.payload()
+            frame, at = encode_state(payload, self.mgr.strings_for(payload))
+            self._bin, self._bin_remaining_at = frame, at
+            self._bin_epoch = self.mgr.strings.epoch
+            return frame
+        self.hits += 1
+        if self._timed and self._bin_remaining_at is not None:
+            return patch_remaining(self._bin, self._bin_remaining_at, quiz_remaining(self._quiz))
+        return self._bin
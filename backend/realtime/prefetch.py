@@ -0,0 +1,131 @@
+# realtime/prefetch.py
+# próximas perguntas de cada sala já prontas antes da captura: o sorteio
+# (QuestionScheduler), a leitura do SQLite e as quebras de linha do viewer 3D
+# acontecem numa thread de fundo. No lance que captura, _start_quiz só tira a
+# primeira da fila.
+#
+# As quebras de linha vão no payload do quiz em "layout" como posições (não como
+# texto quebrado, para não dobrar o tamanho do estado):
+#   {"q": [42, 97], "c": [[], [24], [], []]}
+# índices dos espaços que viram "\n" no texto normalizado (" ".join(texto.split())),
+# com o mesmo algoritmo e limites que o QuizUI do viewer usava (55 e 25 caracteres).
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, List, Optional
+
+from .scheduler import QuestionScheduler
+
+QUESTION_WRAP = 55
+CHOICE_WRAP = 25
+PREFETCH_DEPTH = 3
+
+# uma thread para todas as salas: preparar pergunta é rápido, só não pode ser no lance
+_FILLER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quiz-prefetch")
+
+
+def wrap_points(text: str, limit: int) -> List[int]:
+    """Posições (no texto normalizado) dos espaços onde a linha quebra."""
+    points = []
+    line_len = None
+    at = 0
+    for word in (text or "").split():
+        if line_len is None:
+            line_len = len(word)
+        elif line_len + 1 + len(word) <= limit:
+            line_len += 1 + len(word)
+        else:
+            points.append(at - 1)
+            line_len = len(word)
+        at += len(word) + 1
+    return points
+
+
+def apply_wrap(text: str, points) -> str:
+    """Texto com as quebras de wrap_points (o viewer usa no lugar de quebrar sozinho)."""
+    chars = list(" ".join((text or "").split()))
+    for p in points:
+        if 0 <= p < len(chars):
+            chars[p] = "\n"
+    return "".join(chars)
+
+
+def layout_hints(question: str, choices) -> dict:
+    return {"q": wrap_points(question, QUESTION_WRAP),
+            "c": [wrap_points(c, CHOICE_WRAP) for c in choices]}
+
+
+def prepare(question: Optional[dict]) -> Optional[dict]:
+    """Pergunta do banco + layout, pronta para o QuizDuel."""
+    if question is None:
+        return None
+    return dict(question, layout=layout_hints(question["pergunta"], question["alternativas"]))
+
+
+class QuestionPrefetcher:
+    """Fila das próximas `depth` perguntas de uma sala, reposta em segundo plano."""
+
+    def __init__(self, scheduler: QuestionScheduler, depth: int = PREFETCH_DEPTH):
+        self.scheduler = scheduler
+        self.depth = depth
+        self.queue: Deque[dict] = deque()
+        self._lock = threading.Lock()        # só a fila: take() no lance nunca espera um sorteio
+        self._draw_lock = threading.Lock()   # o scheduler (não é thread-safe)
+        self._pending = False
+        self.generation = scheduler.store.generation   # versão do banco das perguntas na fila
+
+    def _drop_stale(self):
+        """Com _lock: banco recarregado (QuestionStore.generation) -> a fila tem o texto antigo."""
+        generation = self.scheduler.store.generation
+        if generation != self.generation:
+            self.queue.clear()
+            self.generation = generation
+
+    def _draw(self) -> Optional[dict]:
+        with self._draw_lock:
+            return prepare(self.scheduler.next())
+
+    def fill(self):
+        """Completa a fila (roda na thread de fundo; pode ser chamado direto também)."""
+        with self._lock:
+            self._pending = False
+            self._drop_stale()
+            missing = self.depth - len(self.queue)
+        for _ in range(missing):
+            with self._draw_lock:
+                generation = self.scheduler.store.generation
+                q = prepare(self.scheduler.next())
+                if q is None:
+                    break
+                with self._lock:   # ainda com o _draw_lock: to_dict vê sorteio e fila juntos
+                    self._drop_stale()
+                    if generation == self.generation:
+                        self.queue.append(q)
+
+    def fill_async(self):
+        with self._lock:
+            if self._pending:
+                return
+            self._pending = True
+        _FILLER.submit(self.fill)
+
+    def take(self) -> Optional[dict]:
+        """Próxima pergunta. Sem nada na fila (primeiro lance, fila atrasada), sorteia na hora."""
+        with self._lock:
+            self._drop_stale()
+            q = self.queue.popleft() if self.queue else None
+        if q is None:
+            q = self._draw()
+        self.fill_async()
+        return q
+
+    def to_dict(self) -> dict:
+        """Estado do sorteio + perguntas já tiradas e ainda não usadas (não se perdem na retomada)."""
+        with self._draw_lock, self._lock:
+            return {"scheduler": self.scheduler.to_dict(), "queued": list(self.queue)}
+
+    @classmethod
+    def from_dict(cls, data: dict, store, depth: int = PREFETCH_DEPTH) -> "QuestionPrefetcher":
+        pre = cls(QuestionScheduler.from_dict(data["scheduler"], store), depth)
+        pre.queue.extend(data.get("queued") or [])
+        return pre
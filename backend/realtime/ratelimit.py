@@ -0,0 +1,88 @@
+# realtime/ratelimit.py
+# limite de mensagens por conexão: um token bucket por tipo de mensagem e um
+# para o total. Frame acima do limite é descartado -- de preferência antes do
+# JSON, olhando só o começo do texto ("type" é sempre a primeira chave nos
+# nossos clientes). Um celular com bug não consegue forçar legal_moves e
+# broadcast para a sala inteira a cada frame.
+import os
+import re
+import time
+from typing import Dict, Optional, Tuple
+
+# tipo -> (tokens por segundo, rajada). "*" = todas as mensagens da conexão.
+RATE_LIMITS: Dict[str, Tuple[float, float]] = {
+    "join": (0.5, 3),
+    "move": (3, 6),
+    "quiz_answer": (2, 4),
+    "resign": (0.2, 2),
+    "ping": (2, 8),          # a sincronização do relógio manda uma rajada de 5 ao conectar
+    "*": (10, 20),
+}
+# multiplica todos os limites; 0 desliga (ex.: bots do teste de carga)
+RATE_SCALE = float(os.getenv("REALTIME_RATE_SCALE", "1"))
+MAX_FRAME = int(os.getenv("REALTIME_MAX_FRAME", "4096"))   # bytes; acima disso nem decodifica
+FLOOD_CLOSE_AFTER = 200   # descartes seguidos sem nenhum frame aceito -> fecha o socket
+
+_SNIFF = re.compile(r'\s*\{\s*"type"\s*:\s*"(\w{1,16})"')
+_SNIFF_B = re.compile(rb'\s*\{\s*"type"\s*:\s*"(\w{1,16})"')
+
+
+def sniff_type(frame) -> Optional[str]:
+    """Tipo da mensagem pelo começo do frame, sem decodificar o JSON. None se não deu."""
+    m = (_SNIFF if isinstance(frame, str) else _SNIFF_B).match(frame, 0, 48)
+    if m is None:
+        return None
+    kind = m.group(1)
+    return kind if isinstance(kind, str) else kind.decode("ascii")
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "at")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.at = time.monotonic()
+
+    def take(self, now: float) -> bool:
+        self.tokens = min(self.burst, self.tokens + (now - self.at) * self.rate)
+        self.at = now
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+class InboundLimiter:
+    """Limites de uma conexão. Criado no ws_endpoint, vive junto com o socket."""
+
+    def __init__(self, limits: Dict[str, Tuple[float, float]] = RATE_LIMITS, scale: float = RATE_SCALE):
+        self.enabled = scale > 0
+        self._total = TokenBucket(*(x * scale for x in limits["*"])) if self.enabled else None
+        self._by_type = {k: TokenBucket(r * scale, b * scale)
+                         for k, (r, b) in limits.items() if k != "*"} if self.enabled else {}
+        self.shed_streak = 0      # descartes seguidos (zera no primeiro frame aceito)
+        self.last_join = None     # último JoinMsg aceito: join idêntico repetido é ignorado
+
+    def allow(self, kind: Optional[str]) -> bool:
+        """Consome um token do tipo (se conhecido) e do total."""
+        if not self.enabled:
+            return True
+        now = time.monotonic()
+        bucket = self._by_type.get(kind)
+        ok = (bucket is None or bucket.take(now)) and self._total.take(now)
+        self.shed_streak = 0 if ok else self.shed_streak + 1
+        return ok
+
+    def charge(self, kind: str) -> bool:
+        """Depois de decodificar, quando o tipo real não é o que o sniff achou: só o bucket do tipo."""
+        bucket = self._by_type.get(kind)
+        if bucket is None or bucket.take(time.monotonic()):
+            return True
+        self.shed_streak += 1
+        return False
+
+    @property
+    def flooding(self) -> bool:
+        return self.enabled and self.shed_streak >= FLOOD_CLOSE_AFTER
@@ -1,45 +1,59 @@
 # realtime/router.py
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Request
-from fastapi.responses import JSONResponse
-from .ws_manager import ConnectionManager
-from .models import StateMsg, JoinMsg, MoveMsg, QuizAnswerMsg
-import time 
+from fastapi.responses import Response
+from pydantic import ValidationError
+from .ws_manager import ConnectionManager, VIEWER_NAME, role_for, encode_json
+from .models import StateMsg, JoinMsg, MoveMsg, QuizAnswerMsg, ResignMsg, PingMsg, INCOMING
+from .actor import GameActor, thaw
+from .clock import server_now
+from .duel import quiz_deadline, quiz_remaining
+from .metrics import METRICS
+from .ratelimit import InboundLimiter, MAX_FRAME, sniff_type
+import os
+import time
+from typing import Optional
 
 router = APIRouter()
 
+LONG_POLL_MAX = float(os.getenv("REALTIME_LONG_POLL_MAX", "30"))   # teto do ?wait= do GET /state
+
 # ---------- Dependencies SEPARADAS para HTTP e para WebSocket ----------
 
 # HTTP deps (Request é injetado no handler HTTP)
 def get_manager_http(request: Request) -> ConnectionManager:
     return request.app.state.conn_manager
 
-def get_ctx_http(request: Request) -> dict:
-    return request.app.state.game_ctx
+def get_actor_http(request: Request) -> GameActor:
+    return request.app.state.actor
 
 # WS deps (WebSocket é injetado no handler WS)
 def get_manager_ws(websocket: WebSocket) -> ConnectionManager:
     return websocket.app.state.conn_manager  # starlette injeta app no websocket
 
-def get_ctx_ws(websocket: WebSocket) -> dict:
-    return websocket.app.state.game_ctx
+def get_actor_ws(websocket: WebSocket) -> GameActor:
+    return websocket.app.state.actor
 
 # ----------------------------------------------------------------------
 
-def _build_state_payload(mgr: ConnectionManager, ctx: dict) -> dict:
+def _build_state_payload(mgr: ConnectionManager, ctx) -> dict:
+    """ctx é o snapshot publicado pelo GameActor (somente leitura)."""
     quiz = ctx.get("quiz")
     quiz_out = None
     if quiz:
-        quiz_out = dict(quiz)  # cópia rasa (preserva attacker/defender/choices/etc)
+        quiz_out = thaw(quiz)  # cópia (preserva attacker/defender/choices/etc)
         side = quiz_out.get("currentSide", "white")
         pool = quiz_out.get("timePool") or {}
-        started = quiz_out.get("turnStartedAt")
+        remaining = quiz_remaining(quiz_out)
         # se temos banco+start, calcula remaining do turno; senão mantém compat
-        if isinstance(pool, dict) and side in pool and started:
-            bank = float(pool.get(side, 0.0))
-            elapsed = max(0.0, time.time() - float(started))
-            remaining = max(0.0, bank - elapsed)
-            quiz_out["maxTime"] = bank
+        if remaining is not None:
+            quiz_out["maxTime"] = float(pool.get(side, 0.0))
             quiz_out["remainingTime"] = remaining
+            deadline = quiz_deadline(quiz_out)
+            quiz_out.pop("turnStartedMono", None)
+            if deadline is not None:
+                # prazo absoluto no relógio do servidor: o cliente sincronizado (ping/pong)
+                # conta sozinho, sem depender de um estado novo a cada fração de segundo
+                quiz_out["deadline"] = deadline
         else:
             mx = float(quiz_out.get("maxTime", quiz_out.get("timer", 15)))
             rem = float(quiz_out.get("remainingTime", mx))
@@ -71,7 +85,7 @@ def _build_state_payload(mgr: ConnectionManager, ctx: dict) -> dict:
     ).model_dump()
     
     payload["inCheckSide"] = ctx.get("inCheckSide")   # "white" | "black" | None
-    payload["inCheckKing"] = ctx.get("inCheckKing")   # {"x":int,"y":int} | None
+    payload["inCheckKing"] = thaw(ctx.get("inCheckKing"))   # {"x":int,"y":int} | None
     payload["gameOver"] = bool(ctx.get("gameOver", False))
     payload["winnerSide"] = ctx.get("winnerSide")
     payload["winnerName"] = ctx.get("winnerName")
@@ -83,67 +97,264 @@ def _build_state_payload(mgr: ConnectionManager, ctx: dict) -> dict:
 async def health():
     return {"status": "ok"}
 
+@router.get("/metrics")
+async def metrics():
+    return Response(METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    return any(t.strip().removeprefix("W/") in (etag, "*") for t in header.split(","))
+
 @router.get("/state")
-async def state_snapshot(mgr: ConnectionManager = Depends(get_manager_http), ctx: dict = Depends(get_ctx_http)):
-    return JSONResponse(_build_state_payload(mgr, ctx))
+async def state_snapshot(request: Request, wait: float = 0.0,
+                         mgr: ConnectionManager = Depends(get_manager_http)):
+    """
+    Snapshot para quem não usa WebSocket. ETag = seq do estado: com If-None-Match
+    igual, responde 304 sem corpo. Com ?wait=N (segundos) e ETag igual, segura a
+    requisição até o estado mudar ou dar o tempo (long-poll).
+    """
+    seq = mgr.state_seq()
+    client_etag = request.headers.get("if-none-match")
+    if wait > 0 and _etag_matches(client_etag, f'"{seq}"'):
+        await mgr.wait_state(seq, min(wait, LONG_POLL_MAX))
+        seq = mgr.state_seq()
+    etag = f'"{seq}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(client_etag, etag):
+        return Response(status_code=304, headers=headers)
+    relay = mgr.relay
+    if relay is not None and not relay.is_owner and relay.last_state:
+        return Response(relay.last_state, media_type="application/json", headers=headers)
+    return Response(mgr.state_cache.text(), media_type="application/json", headers=headers)
+
+def _assign_seat(ctx: dict, name: str):
+    """Comando do ator: mapeia nome -> seat white/black."""
+    seats = ctx.setdefault("seats", {"white": None, "black": None})
+
+    # ignora o viewer 3D como "jogador"
+    if name != VIEWER_NAME:
+        # se já tinha seat, mantém
+        if name != seats.get("white") and name != seats.get("black"):
+            # atribui primeira vaga livre
+            if seats.get("white") is None:
+                seats["white"] = name
+            elif seats.get("black") is None:
+                seats["black"] = name
+
+def _abort_duel(ctx: dict):
+    ctx["phase"] = "chess"
+    ctx["quiz"] = None
+
+async def _resume(mgr: ConnectionManager, cid: str, msg: JoinMsg):
+    """Join com token válido: religa o socket ao client_id antigo e reenvia só o que faltou."""
+    old = mgr.sessions.resume(msg.token)
+    if old is None or not mgr.rebind(cid, old):
+        return None
+    mgr.set_encoding(old, msg.encoding)
+    mgr.set_role(old, role_for(msg))
+    mgr.set_topics(old, msg.topics)
+    await mgr.send_personal(old, {"type": "session", "token": msg.token, "resumed": True})
+    await mgr.replay(old, msg.lastSeq)
+    return old
+
+async def _handle_frame(mgr: ConnectionManager, actor: GameActor, cid: str, msg) -> str:
+    """
+    Aplica uma mensagem de cliente (local ou repassada por outro worker), já validada
+    por INCOMING. Retorna o client_id a usar dali em diante (muda quando retoma sessão).
+    """
+    if isinstance(msg, JoinMsg):
+        if msg.token:
+            resumed = await _resume(mgr, cid, msg)
+            if resumed is not None:
+                return resumed
+
+        role = role_for(msg)
+        mgr.set_encoding(cid, msg.encoding)
+        mgr.set_role(cid, role)
+        mgr.set_topics(cid, msg.topics)
+        if role == "player":
+            # espectadores (e o viewer 3D) não entram na lista de jogadores nem na ordem de chegada
+            mgr.set_meta(cid, {"name": msg.name, "avatar": msg.avatar})
+            await actor.call(_assign_seat, actor.state, msg.name)
+            seats = actor.snapshot.get("seats") or {}
+            for side in ("white", "black"):
+                if seats.get(side) == msg.name:
+                    mgr.slots[side] = cid
+
+        token = mgr.sessions.issue(cid)
+        await mgr.send_personal(cid, {"type": "session", "token": token, "resumed": False})
+        await mgr.send_state(cid)
+        await mgr.broadcast_state()
+
+    elif isinstance(msg, MoveMsg):
+        started = time.perf_counter()
+        ok, capture = await actor.snapshot["on_move"](msg.from_, msg.to)
+        METRICS.move_seconds.observe(time.perf_counter() - started)
+        await mgr.broadcast_state()
+
+    elif isinstance(msg, QuizAnswerMsg):
+        await actor.snapshot["on_quiz_answer"](cid, msg.answer)
+        await mgr.broadcast_state()
+
+    elif isinstance(msg, ResignMsg):
+        side = None
+        if mgr.slots.get("white") == cid: side = "white"
+        elif mgr.slots.get("black") == cid: side = "black"
+        if side:
+            # finalize duelo/partida como preferir
+            await actor.call(_abort_duel, actor.state)
+        await mgr.broadcast_state()
+
+    return cid
+
+
+async def _pong(ws: WebSocket, msg: PingMsg, t1: float):
+    """Resposta do ping direto no socket (sem passar pelo ator nem pelo dono da sala)."""
+    await ws.send_text(encode_json({"type": "pong", "t0": msg.t0, "t1": t1, "t2": server_now()}))
+    METRICS.messages_out.inc("pong")
+
+
+def _decode(frame, count: bool = True):
+    """
+    Frame (texto ou bytes) -> modelo, ou None se inválido. Frame ruim não derruba o socket.
+    count=False para frames repassados por outro worker (já contados lá).
+    """
+    try:
+        msg = INCOMING.validate_json(frame)
+    except ValidationError:
+        if count:
+            METRICS.messages_in.inc("invalid")
+        return None
+    if count:
+        METRICS.messages_in.inc(msg.type)
+    return msg
+
+
+def _admit(limiter: InboundLimiter, frame):
+    """
+    Frame cru -> mensagem a processar, ou None (grande demais, acima do limite de
+    taxa, inválido ou join repetido). O limite é checado antes do JSON sempre que
+    o tipo dá para ler no começo do frame.
+    """
+    if len(frame) > MAX_FRAME:
+        METRICS.messages_shed.inc("oversize")
+        return None
+    kind = sniff_type(frame)
+    if not limiter.allow(kind):
+        METRICS.messages_shed.inc(kind or "other")
+        return None
+    msg = _decode(frame)
+    if msg is None:
+        return None
+    if msg.type != kind and not limiter.charge(msg.type):
+        METRICS.messages_shed.inc(msg.type)
+        return None
+    if isinstance(msg, JoinMsg):
+        if msg == limiter.last_join:
+            METRICS.joins_coalesced.inc()
+            return None
+        limiter.last_join = msg
+    return msg
+
+
+async def _shed(ws: WebSocket, limiter: InboundLimiter):
+    """Frame descartado; se a conexão só manda lixo, fecha (1008 = policy violation)."""
+    if limiter.flooding:
+        print("WARN conexão fechada por flood")
+        try:
+            await ws.close(code=1008)
+        except Exception:
+            pass
+        raise WebSocketDisconnect(1008)
+
+
+async def _receive_frame(ws: WebSocket):
+    """Próximo frame cru (str ou bytes), sem decodificar."""
+    message = await ws.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    return message.get("text") or message.get("bytes") or b""
+
+
+def make_remote_handler(mgr: ConnectionManager, actor: GameActor):
+    """Callback do RoomRelay no dono da sala: frames de sockets presos em outros workers."""
+
+    async def on_remote(origin: str, cid: str, op: str, frame):
+        if op == "open":
+            mgr.add_remote(cid, origin)
+            await mgr.send_state(cid)
+        elif op == "frame" and frame:
+            msg = _decode(frame, count=False)
+            if msg is None:
+                return
+            try:
+                await _handle_frame(mgr, actor, cid, msg)
+            except Exception as e:
+                print("WARN frame remoto:", e)
+        elif op == "close":
+            mgr.remove(cid)
+            await mgr.broadcast_state()
+    return on_remote
+
 
 @router.websocket("/ws")
 async def ws_endpoint(ws: WebSocket,
                       mgr: ConnectionManager = Depends(get_manager_ws),
-                      ctx: dict = Depends(get_ctx_ws)):
-    import json, uuid
+                      actor: GameActor = Depends(get_actor_ws)):
+    import uuid
     cid = str(uuid.uuid4())
     await mgr.connect(ws, cid)
 
-    await mgr.send_personal(cid, _build_state_payload(mgr, ctx))
+    relay = mgr.relay
+    if relay is not None and not relay.is_owner:
+        # worker de borda: a sala mora em outro processo, só repassamos
+        if relay.last_state:
+            await ws.send_text(relay.last_state)
+        await relay.forward(cid, "open")
+        limiter = InboundLimiter()
+        try:
+            while True:
+                frame = await _receive_frame(ws)
+                t1 = server_now()
+                msg = _admit(limiter, frame)
+                if msg is None:
+                    await _shed(ws, limiter)
+                    continue  # descartado aqui mesmo, nem chega no dono
+                if isinstance(msg, PingMsg):
+                    # CLOCK_MONOTONIC é do sistema todo: a borda responde com o mesmo relógio do dono
+                    await _pong(ws, msg, t1)
+                    continue
+                if isinstance(msg, JoinMsg):
+                    # encoding, tier e tópicos são do socket, então são negociados aqui na borda
+                    mgr.set_encoding(cid, msg.encoding)
+                    mgr.set_role(cid, role_for(msg))
+                    mgr.set_topics(cid, msg.topics)
+                if isinstance(frame, bytes):
+                    frame = frame.decode("utf-8")
+                await relay.forward(cid, "frame", frame)
+        except WebSocketDisconnect:
+            mgr.remove(cid)
+            await relay.forward(cid, "close")
+        return
+
+    await mgr.send_state(cid)
+    limiter = InboundLimiter()
 
     try:
         while True:
-            data = json.loads(await ws.receive_text())
-            kind = data.get("type")
-
-            if kind == "join":
-                msg = JoinMsg.model_validate(data)
-                mgr.set_meta(cid, {"name": msg.name, "avatar": msg.avatar})
-
-                # --- NOVO: mapear nome -> seat white/black ---
-                seats = ctx.setdefault("seats", {"white": None, "black": None})
-
-                # ignora o viewer 3D como "jogador"
-                if msg.name != "Hologram Viewer":
-                    # se já tinha seat, mantém
-                    if msg.name != seats.get("white") and msg.name != seats.get("black"):
-                        # atribui primeira vaga livre
-                        if seats.get("white") is None:
-                            seats["white"] = msg.name
-                        elif seats.get("black") is None:
-                            seats["black"] = msg.name
-                # ---------------------------------------------
-
-                await mgr.send_personal(cid, _build_state_payload(mgr, ctx))
-                await mgr.broadcast(_build_state_payload(mgr, ctx))
-
-            elif kind == "move":
-                msg = MoveMsg.model_validate(data)
-                ok, capture = await ctx["on_move"](msg.from_, msg.to)
-                await mgr.broadcast(_build_state_payload(mgr, ctx))
-
-            elif kind == "quiz_answer":
-                msg = QuizAnswerMsg.model_validate(data)
-                await ctx["on_quiz_answer"](cid, msg.answer)
-                await mgr.broadcast(_build_state_payload(mgr, ctx))
-
-            elif kind == "resign":
-                side = None
-                if hasattr(mgr, "slots"):
-                    if mgr.slots.get("white") == cid: side = "white"
-                    elif mgr.slots.get("black") == cid: side = "black"
-                if side:
-                    # finalize duelo/partida como preferir
-                    ctx["phase"] = "chess"
-                    ctx["quiz"] = None
-                await mgr.broadcast(_build_state_payload(mgr, ctx))
+            frame = await _receive_frame(ws)
+            t1 = server_now()
+            msg = _admit(limiter, frame)
+            if msg is None:
+                await _shed(ws, limiter)
+                continue
+            if isinstance(msg, PingMsg):
+                await _pong(ws, msg, t1)
+                continue
+            cid = await _handle_frame(mgr, actor, cid, msg)
 
     except WebSocketDisconnect:
-        mgr.remove(cid)
-        await mgr.broadcast(_build_state_payload(mgr, ctx))
\ No newline at end of file
+        # com sessão, a vaga espera a volta (RESUME_GRACE) e a sala não muda
+        if not mgr.drop_socket(cid, ws):
+            await mgr.broadcast_state()
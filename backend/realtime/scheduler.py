@@ -0,0 +1,188 @@
+# realtime/scheduler.py
+# sorteio de perguntas de uma partida: sem repetir e com peso por categoria e
+# dificuldade, em tempo constante por sorteio mesmo com 100 mil perguntas.
+#
+#   1. qual (categoria, dificuldade): tabela de alias (Vose) montada uma vez a partir
+#      dos alvos; uma categoria usada há pouco é rejeitada com probabilidade que cai a
+#      cada sorteio (cooldown), e aí sorteia de novo (poucas tentativas, O(1) esperado);
+#   2. qual pergunta do grupo: shuffle-bag com Fisher-Yates "esparso" -- só as posições
+#      trocadas ficam num dict, então não se embaralha a lista inteira. Acabou o saco,
+#      começa outro; as últimas `recent` perguntas não voltam logo na virada.
+#
+# O estado (sacos, cooldowns, gerador) sai em to_dict() em tipos JSON. Se o banco for
+# recarregado (persistence/questions.py), os sacos recomeçam.
+import random
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from persistence.questions import QuestionStore
+
+_Key = Tuple[str, int]
+MAX_TRIES = 8
+
+
+def build_alias(weights: List[float]) -> Tuple[List[float], List[int]]:
+    """Tabela de alias de Vose: (prob, alias). Sorteio = 1 randrange + 1 random."""
+    n = len(weights)
+    total = float(sum(weights))
+    scaled = [w * n / total for w in weights]
+    prob, alias = [1.0] * n, list(range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s], alias[s] = scaled[s], l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    return prob, alias
+
+
+class _Bag:
+    """Permutação preguiçosa de range(size): draw() devolve a próxima posição."""
+
+    __slots__ = ("size", "drawn", "swaps")
+
+    def __init__(self, size: int, drawn: int = 0, swaps: Optional[Dict[int, int]] = None):
+        self.size = size
+        self.drawn = drawn
+        self.swaps = swaps or {}
+
+    def draw(self, rng: random.Random, reject=None) -> int:
+        """Próxima posição; `reject(pos)` True faz tentar outra (sem gastar a rejeitada)."""
+        if self.drawn >= self.size:
+            self.drawn, self.swaps = 0, {}        # saco vazio: começa outro
+        k = self.drawn
+        for _ in range(MAX_TRIES):
+            j = rng.randrange(k, self.size)
+            picked = self.swaps.get(j, j)
+            if reject is None or not reject(picked):
+                break
+        self.swaps[j] = self.swaps.pop(k, k)      # posição k não é mais lida
+        if j == k:
+            self.swaps.pop(j)
+        self.drawn = k + 1
+        return picked
+
+
+class QuestionScheduler:
+    """
+    topics: alvo por categoria ({"historia": 2, "ciencia": 1}); None = proporcional ao banco.
+    difficulty: alvo por dificuldade ({1: 1, 2: 2, 3: 1}); None = proporcional ao banco.
+    topic_cooldown: quantos sorteios uma categoria recém-usada fica desfavorecida.
+    recent: quantas perguntas recentes não se repetem na virada do saco.
+    """
+
+    def __init__(self, store: QuestionStore, topics: Optional[Dict[str, float]] = None,
+                 difficulty: Optional[Dict[int, float]] = None, topic_cooldown: int = 2,
+                 recent: int = 16, seed: Optional[int] = None):
+        self.store = store
+        self.topics = dict(topics or {})
+        self.difficulty = {int(k): float(v) for k, v in (difficulty or {}).items()}
+        self.topic_cooldown = topic_cooldown
+        self.rng = random.Random(seed)
+        self.draws = 0
+        self.last_topic: Dict[str, int] = {}       # categoria -> nº do sorteio em que saiu
+        self.recent: Deque[int] = deque(maxlen=recent)
+        self.bags: Dict[_Key, _Bag] = {}
+        self.fingerprint = ""
+        self._keys: List[_Key] = []
+        self._prob: List[float] = []
+        self._alias: List[int] = []
+
+    # ---------- alvos -> tabela ----------
+
+    def _weights(self, tags: Dict[_Key, int]) -> Dict[_Key, float]:
+        by_topic: Dict[str, int] = {}
+        for (cat, _), n in tags.items():
+            by_topic[cat] = by_topic.get(cat, 0) + n
+        topics = {c: float(w) for c, w in self.topics.items() if c in by_topic and w > 0}
+        if not topics:
+            topics = {c: float(n) for c, n in by_topic.items()}
+        weights = {}
+        for (cat, diff), n in tags.items():
+            if cat not in topics:
+                continue
+            if self.difficulty:
+                present = sum(self.difficulty.get(d, 0.0) for (c, d) in tags if c == cat)
+                share = self.difficulty.get(diff, 0.0) / present if present else n / by_topic[cat]
+            else:
+                share = n / by_topic[cat]
+            if share > 0:
+                weights[(cat, diff)] = topics[cat] / sum(topics.values()) * share
+        return weights
+
+    def _sync(self):
+        """Remonta a tabela se o banco mudou (ou na primeira vez)."""
+        fingerprint = self.store.fingerprint
+        if fingerprint == self.fingerprint and self._keys:
+            return
+        weights = self._weights(self.store.tags())
+        self._keys = list(weights)
+        self._prob, self._alias = build_alias(list(weights.values())) if weights else ([], [])
+        if fingerprint != self.fingerprint:
+            self.bags = {}
+            self.fingerprint = fingerprint
+
+    # ---------- sorteio ----------
+
+    def _pick_key(self) -> _Key:
+        key = self._keys[0]
+        for _ in range(MAX_TRIES):
+            i = self.rng.randrange(len(self._keys))
+            key = self._keys[i] if self.rng.random() < self._prob[i] else self._keys[self._alias[i]]
+            last = self.last_topic.get(key[0])
+            if last is None or self.topic_cooldown <= 0:
+                break
+            if self.rng.random() < min(1.0, (self.draws - last) / (self.topic_cooldown + 1)):
+                break
+        return key
+
+    def next(self) -> Optional[dict]:
+        """Próxima pergunta da partida (formato do QuestionStore.get); None sem banco."""
+        self._sync()
+        if not self._keys:
+            return None
+        key = self._pick_key()
+        ids = self.store.ids(*key)
+        bag = self.bags.get(key)
+        if bag is None or bag.size != len(ids):
+            bag = self.bags[key] = _Bag(len(ids))
+        recent = self.recent if len(ids) > len(self.recent) else ()
+        qid = ids[bag.draw(self.rng, lambda pos: ids[pos] in recent)]
+        self.draws += 1
+        self.last_topic[key[0]] = self.draws
+        self.recent.append(qid)
+        return self.store.get(qid)
+
+    # ---------- serialização ----------
+
+    def to_dict(self) -> dict:
+        version, internal, gauss = self.rng.getstate()
+        return {
+            "topics": dict(self.topics),
+            "difficulty": {str(k): v for k, v in self.difficulty.items()},
+            "topicCooldown": self.topic_cooldown,
+            "fingerprint": self.fingerprint,
+            "draws": self.draws,
+            "lastTopic": dict(self.last_topic),
+            "recent": list(self.recent),
+            "recentMax": self.recent.maxlen,
+            "bags": [[cat, diff, b.size, b.drawn, [[p, v] for p, v in b.swaps.items()]]
+                     for (cat, diff), b in self.bags.items()],
+            "rng": [version, list(internal), gauss],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, store: QuestionStore) -> "QuestionScheduler":
+        sched = cls(store, topics=data.get("topics"), difficulty=data.get("difficulty"),
+                    topic_cooldown=int(data.get("topicCooldown", 2)),
+                    recent=int(data.get("recentMax") or 16))
+        version, internal, gauss = data["rng"]
+        sched.rng.setstate((version, tuple(internal), gauss))
+        sched.draws = int(data.get("draws", 0))
+        sched.last_topic = {k: int(v) for k, v in (data.get("lastTopic") or {}).items()}
+        sched.recent.extend(data.get("recent") or [])
+        sched.fingerprint = data.get("fingerprint", "")
+        sched.bags = {(cat, int(diff)): _Bag(size, drawn, {int(p): int(v) for p, v in swaps})
+                      for cat, diff, size, drawn, swaps in data.get("bags") or []}
+        return sched
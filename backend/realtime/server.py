@@ -1,9 +1,19 @@
-import asyncio, socket, uvicorn
+import asyncio, os, socket, subprocess, sys, uvicorn
+from pathlib import Path
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from .ws_manager import ConnectionManager
-from .router import router, _build_state_payload
+from .actor import GameActor
+from .router import router, make_remote_handler
+from .payload import StatePayloadCache
+from .metrics import METRICS
+from .clock import server_now
+from .duel import quiz_deadline
+from .static import PrecompressedStaticFiles, resolve_dir
+from .bus import SocketBus, run_broker_in_bg
+from .cluster import ClusterNode
+
+DEFAULT_ROOM = "main"
 
 def get_local_ip() -> str:
     # tenta via socket “externo”
@@ -28,37 +38,87 @@ def get_local_ip() -> str:
     # último recurso
     return "127.0.0.1"
 
-def create_app(static_dir: str, game_ctx: dict) -> FastAPI:
+def create_app(static_dir: str, game_ctx: dict, cluster: ClusterNode | None = None) -> FastAPI:
     app = FastAPI(title="Chess-Quiz Realtime")
     app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
     app.state.conn_manager = ConnectionManager()
     app.state.game_ctx = game_ctx
+    app.state.actor = GameActor(game_ctx)   # único thread que escreve no game_ctx
+    app.state.conn_manager.state_cache = StatePayloadCache(app.state.conn_manager, app.state.actor)
+    app.state.cluster = cluster
+    app.state.loop = None
+
+    def request_broadcast():
+        """Agenda um broadcast do snapshot atual a partir de qualquer thread."""
+        loop = app.state.loop
+        if loop is None:
+            return
+        mgr: ConnectionManager = app.state.conn_manager
+        async def _send():
+            await mgr.broadcast_state()
+        asyncio.run_coroutine_threadsafe(_send(), loop)
+    app.state.request_broadcast = request_broadcast
+
+    @app.on_event("startup")
+    async def _capture_loop():
+        app.state.loop = asyncio.get_running_loop()
+
+    if cluster is not None:
+        # liga a sala ao barramento; quem é dono é decidido pelo anel
+        cluster.relay(DEFAULT_ROOM, app.state.conn_manager,
+                      make_remote_handler(app.state.conn_manager, app.state.actor))
+
+        @app.on_event("startup")
+        async def _start_cluster():
+            await cluster.start()
+
+        @app.on_event("shutdown")
+        async def _stop_cluster():
+            await cluster.close()
+
+    @app.on_event("startup")
+    async def _start_spectator_pump():
+        asyncio.create_task(app.state.conn_manager.run_spectator_pump())
+
+    METRICS.gauge("realtime_connections", "Conexões abertas por papel.", "role",
+                  app.state.conn_manager.counts_by_role)
+
+    @app.on_event("startup")
+    async def _start_loop_lag_probe():
+        asyncio.create_task(METRICS.run_loop_lag_probe())
 
     @app.on_event("startup")
     async def _start_quiz_broadcaster():
+        # o relógio do quiz roda nos clientes (quiz["deadline"] + ping/pong); aqui só
+        # se confere o estouro de tempo, e o estado sai apenas quando o duelo muda
         async def _loop():
             while True:
-                await asyncio.sleep(0.33)  # ~3x/seg
+                # ~3x/seg, ou acorda logo no prazo da vez se ele vier antes
+                quiz = app.state.actor.snapshot.get("quiz")
+                deadline = quiz_deadline(quiz) if quiz else None
+                wait = 0.33 if deadline is None else min(0.33, max(0.005, deadline - server_now()))
+                await asyncio.sleep(wait)
                 mgr: ConnectionManager = app.state.conn_manager
-                ctx: dict = app.state.game_ctx
+                actor: GameActor = app.state.actor
+                ctx = actor.snapshot
                 if not mgr.client_count(): continue
+                if mgr.relay is not None and not mgr.relay.is_owner: continue
                 if ctx.get("phase") != "quiz": continue
                 if not ctx.get("quiz"): continue
                 try:
-                    checker = app.state.game_ctx.get("check_quiz_timeout")
-                    if callable(checker) and checker():
+                    checker = ctx.get("check_quiz_timeout")
+                    deadline = quiz_deadline(ctx["quiz"])
+                    if callable(checker) and await actor.call(checker):
+                        if deadline is not None:
+                            METRICS.quiz_timeout_lag.observe(max(0.0, server_now() - deadline))
                         # duelo acabou por tempo; manda um snapshot pós-resolução e continua
-                        await mgr.broadcast(_build_state_payload(mgr, ctx))
-                        continue
-                except Exception:
-                    pass
-                try:
-                    await mgr.broadcast(_build_state_payload(mgr, ctx))
+                        await mgr.broadcast_state()
                 except Exception:
                     pass
         asyncio.create_task(_loop())
 
-    app.mount("/web", StaticFiles(directory=static_dir, html=True), name="web")
+    # dist/ (python -m realtime.static) quando existe: .br/.gz prontos e nomes com hash
+    app.mount("/web", PrecompressedStaticFiles(directory=resolve_dir(static_dir), html=True), name="web")
     app.include_router(router)
     return app
 
@@ -69,3 +129,39 @@ def run_uvicorn_in_bg(app: FastAPI, host: str, port: int):
     t = threading.Thread(target=server.run, daemon=True)
     t.start()
     return t
+
+
+# ---------- Vários workers (scale-out) ----------
+
+def create_worker_app() -> FastAPI:
+    """
+    Factory de cada worker uvicorn (--factory). A config vem do ambiente,
+    preenchido por run_workers. Workers de borda não hospedam salas: só
+    repassam comandos ao dono e replicam o estado publicado por ele.
+    """
+    bus = SocketBus(os.environ["REALTIME_BROKER"])
+    hosting = os.environ.get("REALTIME_HOSTING", "0") == "1"
+    game_ctx = {"phase": "lobby", "board": None, "turn": None, "quiz": None}
+    return create_app(os.environ["REALTIME_STATIC_DIR"], game_ctx, cluster=ClusterNode(bus, hosting=hosting))
+
+def run_workers(static_dir: str, host: str, port: int, workers: int,
+                broker: str | None = None, hosting: bool = False):
+    """
+    Sobe `workers` processos uvicorn atrás da mesma porta, todos ligados ao
+    broker (criado aqui se não for passado). Retorna (Popen, endereço do broker).
+    """
+    if broker is None:
+        _, broker = run_broker_in_bg()
+    env = dict(os.environ)
+    env.update({
+        "REALTIME_BROKER": broker,
+        "REALTIME_STATIC_DIR": str(static_dir),
+        "REALTIME_HOSTING": "1" if hosting else "0",
+    })
+    backend_dir = Path(__file__).resolve().parents[1]
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "realtime.server:create_worker_app", "--factory",
+         "--host", host, "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=str(backend_dir), env=env,
+    )
+    return proc, broker
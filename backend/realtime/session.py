@@ -0,0 +1,93 @@
+# realtime/session.py
+# sessões retomáveis: o join devolve um token; se o celular cair e voltar dentro
+# da janela de graça, o token religa o socket novo ao mesmo client_id (mesma vaga,
+# mesmo nome) e só o último estado perdido é reenviado.
+import collections
+import os
+import secrets
+import time
+from typing import Deque, Dict, List, Optional, Tuple
+
+RESUME_GRACE = float(os.getenv("REALTIME_RESUME_GRACE", "30"))   # segundos
+EVENT_RING_SIZE = int(os.getenv("REALTIME_EVENT_RING", "64"))
+
+
+class EventRing:
+    """Últimos eventos da sala: (seq, texto já codificado), seq crescente. Cada evento é um estado completo."""
+
+    def __init__(self, size: int = EVENT_RING_SIZE):
+        self._ring: Deque[Tuple[int, str]] = collections.deque(maxlen=size)
+        self._floor = 0     # maior seq já descartado do buffer
+
+    @property
+    def last_seq(self) -> int:
+        return self._ring[-1][0] if self._ring else 0
+
+    def push(self, seq: int, text: str):
+        if seq <= self.last_seq:
+            return
+        if len(self._ring) == self._ring.maxlen:
+            self._floor = self._ring[0][0]
+        self._ring.append((seq, text))
+
+    def since(self, seq: int) -> Optional[List[str]]:
+        """Eventos depois de `seq`; None se parte deles já saiu do buffer (precisa do estado cheio)."""
+        if seq < self._floor or seq > self.last_seq:
+            return None
+        return [text for s, text in self._ring if s > seq]
+
+
+class Session:
+    __slots__ = ("token", "client_id", "detached_at")
+
+    def __init__(self, token: str, client_id: str):
+        self.token = token
+        self.client_id = client_id
+        self.detached_at: Optional[float] = None   # time.monotonic() da queda; None = conectado
+
+
+class SessionStore:
+    def __init__(self, grace: float = RESUME_GRACE):
+        self.grace = grace
+        self._by_token: Dict[str, Session] = {}
+        self._by_client: Dict[str, Session] = {}
+
+    def issue(self, client_id: str) -> str:
+        old = self._by_client.get(client_id)
+        if old is not None:
+            return old.token
+        s = Session(secrets.token_urlsafe(16), client_id)
+        self._by_token[s.token] = s
+        self._by_client[client_id] = s
+        return s.token
+
+    def detach(self, client_id: str) -> bool:
+        """Socket caiu. True se há sessão para esperar a volta."""
+        s = self._by_client.get(client_id)
+        if s is None:
+            return False
+        s.detached_at = time.monotonic()
+        return True
+
+    def resume(self, token: Optional[str]) -> Optional[str]:
+        """
+        client_id da sessão, se ainda vale. Também aceita sessão "conectada": no
+        celular o socket antigo costuma ficar meio-aberto até o servidor perceber.
+        """
+        s = self._by_token.get(token or "")
+        if s is None:
+            return None
+        if s.detached_at is not None and time.monotonic() - s.detached_at > self.grace:
+            self.drop(s.client_id)
+            return None
+        s.detached_at = None
+        return s.client_id
+
+    def expired(self, client_id: str) -> bool:
+        s = self._by_client.get(client_id)
+        return s is not None and s.detached_at is not None and time.monotonic() - s.detached_at >= self.grace
+
+    def drop(self, client_id: str):
+        s = self._by_client.pop(client_id, None)
+        if s is not None:
+            self._by_token.pop(s.token, None)
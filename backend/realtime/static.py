@@ -0,0 +1,157 @@
+# realtime/static.py
+# cliente web (/web) pronto para a rajada da sala de aula: 30+ celulares lendo o QR
+# ao mesmo tempo num access point só.
+#
+# Build (python -m realtime.static): copia clients/mobile_web para dist/ com
+#   - .js/.css citados nos .html renomeados com hash do conteúdo (app.3f2a9c01de.js)
+#     e as referências nos .html reescritas;
+#   - irmãos pré-comprimidos .gz (e .br, se o pacote brotli estiver instalado).
+# Servidor (PrecompressedStaticFiles): escolhe .br/.gz pelo Accept-Encoding e marca
+# os arquivos com hash como imutáveis; o resto (html, imagens pedidas pelo JS)
+# revalida com ETag a cada carga.
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli  # opcional
+except ImportError:
+    brotli = None
+
+DIST = "dist"
+MANIFEST = "manifest.json"
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+_HASHED_NAME = re.compile(r"\.[0-9a-f]{10}\.\w+$")
+_HASHED_TYPES = {".js", ".css"}
+_COMPRESS_TYPES = {".html", ".js", ".css", ".json", ".svg", ".txt"}
+_REF = re.compile(r'(\b(?:src|href)=")([^"?#:]+)(")')   # referências locais nos .html
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def _write_variants(path: Path, data: bytes):
+    if path.suffix not in _COMPRESS_TYPES:
+        return
+    path.with_name(path.name + ".gz").write_bytes(gzip.compress(data, 9, mtime=0))
+    if brotli is not None:
+        path.with_name(path.name + ".br").write_bytes(brotli.compress(data, quality=11))
+
+
+def build(src: Path, out: Optional[Path] = None) -> Dict[str, str]:
+    """Gera `out` (padrão src/dist) e devolve o manifest {original: com hash}."""
+    src = Path(src)
+    out = Path(out) if out is not None else src / DIST
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir(parents=True)
+
+    manifest: Dict[str, str] = {}
+    pages = []
+    for path in sorted(src.rglob("*")):
+        rel = path.relative_to(src)
+        if path.is_dir() or rel.parts[0] == DIST:
+            continue
+        if path.suffix == ".html":
+            pages.append(rel)
+            continue
+        data = path.read_bytes()
+        name = rel.as_posix()
+        if path.suffix in _HASHED_TYPES:
+            name = f"{rel.with_suffix('').as_posix()}.{_digest(data)}{path.suffix}"
+        manifest[rel.as_posix()] = name
+        target = out / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        _write_variants(target, data)
+
+    for rel in pages:
+        html = (src / rel).read_text(encoding="utf-8")
+        html = _REF.sub(lambda m: m.group(1) + manifest.get(m.group(2), m.group(2)) + m.group(3), html)
+        target = out / rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(html, encoding="utf-8")
+        _write_variants(target, html.encode("utf-8"))
+
+    (out / MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def resolve_dir(static_dir: str) -> str:
+    """dist/ se o build existe e está em dia com os fontes; senão os próprios fontes."""
+    src = Path(static_dir)
+    manifest = src / DIST / MANIFEST
+    if not manifest.exists():
+        return static_dir
+    built_at = manifest.stat().st_mtime
+    for path in src.rglob("*"):
+        if DIST not in path.relative_to(src).parts and path.stat().st_mtime > built_at:
+            print("WARN /web: dist/ desatualizado, servindo os fontes (rode python -m realtime.static)")
+            return static_dir
+    return str(src / DIST)
+
+
+def _accepts(accept_encoding: str, coding: str) -> bool:
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip() == coding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles que serve .br/.gz prontos e manda Cache-Control conforme o nome."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # variantes existentes, lidas uma vez (o dist/ não muda com o servidor no ar)
+        self._variants = set()
+        if self.directory is not None and os.path.isdir(self.directory):
+            for root, _, files in os.walk(self.directory):
+                self._variants.update(os.path.join(root, f) for f in files if f.endswith((".gz", ".br")))
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope,
+                      status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        path = str(full_path)
+        accept = request_headers.get("accept-encoding", "")
+        response = None
+        for coding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            variant = path + suffix
+            if variant in self._variants and _accepts(accept, coding):
+                media_type = mimetypes.guess_type(path)[0] or "text/plain"
+                if media_type.startswith("text/") or media_type.endswith("javascript"):
+                    media_type += "; charset=utf-8"
+                response = FileResponse(variant, status_code=status_code, stat_result=os.stat(variant),
+                                        media_type=media_type)
+                response.headers["content-encoding"] = coding
+                break
+        if response is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        response.headers["vary"] = "Accept-Encoding"
+        response.headers["cache-control"] = IMMUTABLE if _HASHED_NAME.search(path) else REVALIDATE
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+if __name__ == "__main__":
+    default = Path(__file__).resolve().parents[2] / "clients" / "mobile_web"
+    src_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else default
+    result = build(src_dir)
+    print(f"{len(result)} arquivos em {src_dir / DIST} (brotli: {'sim' if brotli else 'não instalado'})")
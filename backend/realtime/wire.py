@@ -0,0 +1,277 @@
+# realtime/wire.py
+# protocolo binário opcional (negociado no join com "encoding": "binary").
+# JSON continua sendo o padrão; aqui só o payload de estado ganha versão compacta.
+#
+# Todo frame binário começa com (tipo u8, versão u8). Inteiros little-endian.
+#
+#   STRINGS (tipo 1): u16 primeiro_id, u16 n, n x (u16 len, utf-8)
+#       acrescenta entradas à tabela de strings do cliente (primeiro_id 0 = tabela
+#       nova: descarta o que tinha). A tabela é da sala e o servidor manda a cada
+#       cliente apenas o que ele ainda não tem; ela recomeça a cada partida nova e
+#       quando chega perto de 0xFFFF entradas.
+#
+#   STATE (tipo 2):
+#       u8 fase (0 lobby, 1 chess, 2 quiz)   u8 turno (lado)   u8 flags
+#       u8 inCheckSide (lado)   u8 winnerSide (lado)
+#       u16 winnerName (ref)    u16 outcome (ref)    u32 seq (número do evento)
+#       [flags & F_CHECK]  i8 x, i8 y do rei em xeque
+#       [flags & F_BOARD]  u8 largura, u8 altura, largura*altura bytes de peça
+#       u8 n jogadores, n x (u16 id, u16 name, u16 avatar, u8 joinOrder)
+#       [flags & F_QUIZ]   bloco de tamanho fixo _QUIZ (tempos em posição fixa),
+#                          seguido de n_choices x u16 (ref)
+#
+#   lado: 0 nenhum, 1 white, 2 black     ref: índice na tabela, 0xFFFF = None
+#   peça: 0 vazio, 1..6 brancas (P N B R Q K), 9..14 pretas
+import struct
+from typing import Dict, List, Optional, Tuple
+
+WIRE_VERSION = 3
+KIND_STRINGS, KIND_STATE = 1, 2
+NONE_REF = 0xFFFF
+STRINGS_HEADROOM = 1024         # folga: um estado inteiro ainda cabe quando a tabela "enche"
+
+F_GAME_OVER, F_BOARD, F_QUIZ, F_CHECK = 1, 2, 4, 8
+
+_PHASES = ("lobby", "chess", "quiz")
+_SIDES = (None, "white", "black")
+_PIECE_TYPES = "PNBRQK"
+_PIECE_NAMES = ("pawn", "knight", "bishop", "rook", "queen", "king")
+
+_HEAD = struct.Struct("<BBBBBBBHHI")        # tipo, versão, fase, turno, flags, inCheckSide, winnerSide, winnerName, outcome, seq
+_STR_HEAD = struct.Struct("<BBHH")
+_XY = struct.Struct("<bb")
+_PLAYER = struct.Struct("<HHHB")
+# battleId, currentSide, atacante (cor, peça), defensor (cor, peça), correctIndex,
+# maxTime, remainingTime, banco white, banco black, turnStartedAt, deadline (0 = sem),
+# question, n_choices
+_QUIZ = struct.Struct("<IBBBBBbffffddHB")
+_QUIZ_REMAINING_AT = struct.calcsize("<IBBBBBbf")   # deslocamento de remainingTime dentro de _QUIZ
+
+_PIECE_CODE = {c + t: (0 if c == "w" else 8) + i + 1 for c in "wb" for i, t in enumerate(_PIECE_TYPES)}
+_CODE_PIECE = {v: k for k, v in _PIECE_CODE.items()}
+
+
+def _side(value: Optional[str]) -> int:
+    return _SIDES.index(value) if value in _SIDES else 0
+
+
+def _piece(value: Optional[str]) -> int:
+    return _PIECE_NAMES.index(value) + 1 if value in _PIECE_NAMES else 0
+
+
+class StringTable:
+    """Strings internadas da sala: nomes, ids, pergunta e alternativas viram u16."""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self.entries: List[str] = []
+        self.epoch = 0          # sobe a cada reset: frame de epoch antigo não vale mais
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def nearly_full(self) -> bool:
+        return len(self.entries) >= NONE_REF - STRINGS_HEADROOM
+
+    def reset(self):
+        """Esvazia a tabela; quem já recebeu strings precisa de strings_frame(0) de novo."""
+        self._ids.clear()
+        self.entries = []
+        self.epoch += 1
+
+    def ref(self, value: Optional[str]) -> int:
+        if value is None:
+            return NONE_REF
+        value = str(value)
+        idx = self._ids.get(value)
+        if idx is None:
+            idx = len(self.entries)
+            if idx >= NONE_REF:
+                # não chega aqui: o ConnectionManager reseta antes (nearly_full)
+                raise OverflowError("tabela de strings cheia")
+            self._ids[value] = idx
+            self.entries.append(value)
+        return idx
+
+    def strings_frame(self, start: int = 0) -> bytes:
+        """Frame STRINGS com as entradas a partir de `start`."""
+        chunk = self.entries[start:]
+        out = bytearray(_STR_HEAD.pack(KIND_STRINGS, WIRE_VERSION, start, len(chunk)))
+        for s in chunk:
+            raw = s.encode("utf-8")
+            out += struct.pack("<H", len(raw)) + raw
+        return bytes(out)
+
+
+def encode_state(payload: dict, table: StringTable) -> Tuple[bytes, Optional[int]]:
+    """
+    Codifica o payload de estado (mesmo dict do JSON). Retorna (frame, offset)
+    onde offset é a posição do f32 remainingTime (None se não há quiz), para
+    quem quiser só atualizar o relógio no frame em cache.
+    """
+    board = payload.get("board")
+    quiz = payload.get("quiz")
+    king = payload.get("inCheckKing")
+    flags = ((F_GAME_OVER if payload.get("gameOver") else 0)
+             | (F_BOARD if board else 0)
+             | (F_QUIZ if quiz else 0)
+             | (F_CHECK if king else 0))
+
+    out = bytearray(_HEAD.pack(
+        KIND_STATE, WIRE_VERSION,
+        _PHASES.index(payload["phase"]), _side(payload.get("turn")), flags,
+        _side(payload.get("inCheckSide")), _side(payload.get("winnerSide")),
+        table.ref(payload.get("winnerName")), table.ref(payload.get("outcome")),
+        int(payload.get("seq") or 0),
+    ))
+    if king:
+        out += _XY.pack(int(king["x"]), int(king["y"]))
+    if board:
+        out += bytes((board["width"], board["height"]))
+        out += bytes(_PIECE_CODE.get(c, 0) for c in board["cells"])
+
+    players = payload.get("players") or []
+    out.append(len(players))
+    for p in players:
+        order = p.get("joinOrder")
+        out += _PLAYER.pack(table.ref(p.get("id")), table.ref(p.get("name")),
+                            table.ref(p.get("avatar")), 0xFF if order is None else order)
+
+    remaining_at = None
+    if quiz:
+        attacker = quiz.get("attacker") or {}
+        defender = quiz.get("defender") or {}
+        pool = quiz.get("timePool") or {}
+        choices = quiz.get("choices") or []
+        remaining_at = len(out) + _QUIZ_REMAINING_AT
+        out += _QUIZ.pack(
+            int(quiz.get("battleId") or 0), _side(quiz.get("currentSide")),
+            _side(attacker.get("color")), _piece(attacker.get("piece")),
+            _side(defender.get("color")), _piece(defender.get("piece")),
+            int(quiz.get("correctIndex", -1)),
+            float(quiz.get("maxTime") or 0.0), float(quiz.get("remainingTime") or 0.0),
+            float(pool.get("white", 0.0)), float(pool.get("black", 0.0)),
+            float(quiz.get("turnStartedAt") or 0.0), float(quiz.get("deadline") or 0.0),
+            table.ref(quiz.get("question")), len(choices),
+        )
+        for c in choices:
+            out += struct.pack("<H", table.ref(c))
+    return bytes(out), remaining_at
+
+
+def patch_remaining(frame: bytes, offset: int, remaining: float) -> bytes:
+    """Cópia do frame com outro remainingTime (campo de posição fixa)."""
+    buf = bytearray(frame)
+    struct.pack_into("<f", buf, offset, remaining)
+    return bytes(buf)
+
+# ---------- Decoder de referência ----------
+
+class WireDecoder:
+    """
+    Decoder de referência (usado pelo viewer 3D e pelo benchmark).
+    feed(frame) devolve o payload de estado como dict -- mesmas chaves do JSON --
+    ou None para frames de tabela de strings.
+    """
+
+    def __init__(self):
+        self.strings: List[Optional[str]] = []
+
+    def _s(self, ref: int) -> Optional[str]:
+        return None if ref == NONE_REF else self.strings[ref]
+
+    def feed(self, frame: bytes) -> Optional[dict]:
+        kind, version = frame[0], frame[1]
+        if version != WIRE_VERSION:
+            raise ValueError(f"versão de protocolo desconhecida: {version}")
+        if kind == KIND_STRINGS:
+            self._read_strings(frame)
+            return None
+        if kind == KIND_STATE:
+            return self._read_state(frame)
+        raise ValueError(f"frame desconhecido: {kind}")
+
+    def _read_strings(self, frame: bytes):
+        _, _, start, n = _STR_HEAD.unpack_from(frame)
+        pos = _STR_HEAD.size
+        del self.strings[start:]
+        for _ in range(n):
+            (ln,) = struct.unpack_from("<H", frame, pos)
+            pos += 2
+            self.strings.append(frame[pos:pos + ln].decode("utf-8"))
+            pos += ln
+
+    def _read_state(self, frame: bytes) -> dict:
+        (_, _, phase, turn, flags, check_side, winner_side,
+         winner_name, outcome, seq) = _HEAD.unpack_from(frame)
+        pos = _HEAD.size
+        king = None
+        if flags & F_CHECK:
+            x, y = _XY.unpack_from(frame, pos)
+            pos += _XY.size
+            king = {"x": x, "y": y}
+        board = None
+        if flags & F_BOARD:
+            w, h = frame[pos], frame[pos + 1]
+            pos += 2
+            cells = [_CODE_PIECE.get(b) for b in frame[pos:pos + w * h]]
+            pos += w * h
+            board = {"cells": cells, "width": w, "height": h}
+
+        players = []
+        for _ in range(frame[pos]):
+            pid, name, avatar, order = _PLAYER.unpack_from(frame, pos + 1)
+            pos += _PLAYER.size
+            p = {"id": self._s(pid), "name": self._s(name), "avatar": self._s(avatar)}
+            if order != 0xFF:
+                p["joinOrder"] = order
+            players.append(p)
+        pos += 1
+
+        quiz = None
+        if flags & F_QUIZ:
+            (battle, side, a_color, a_piece, d_color, d_piece, correct,
+             max_t, remaining, pool_w, pool_b, started, deadline, question, n) = _QUIZ.unpack_from(frame, pos)
+            pos += _QUIZ.size
+            choices = [self._s(r) for r in struct.unpack_from(f"<{n}H", frame, pos)]
+            quiz = {
+                "battleId": battle,
+                "attacker": _duelist(a_color, a_piece),
+                "defender": _duelist(d_color, d_piece),
+                "currentSide": _SIDES[side],
+                "question": self._s(question),
+                "choices": choices,
+                "correctIndex": correct,
+                "timePool": {"white": pool_w, "black": pool_b},
+                "turnStartedAt": started,
+                "maxTime": max_t,
+                "remainingTime": remaining,
+            }
+            if deadline:
+                quiz["deadline"] = deadline
+
+        return {
+            "type": "state",
+            "phase": _PHASES[phase],
+            "board": board,
+            "turn": _SIDES[turn],
+            "quiz": quiz,
+            "players": players,
+            "inCheckSide": _SIDES[check_side],
+            "inCheckKing": king,
+            "gameOver": bool(flags & F_GAME_OVER),
+            "winnerSide": _SIDES[winner_side],
+            "winnerName": self._s(winner_name),
+            "outcome": self._s(outcome),
+            "seq": seq,
+        }
+
+
+def _duelist(color: int, piece: int) -> dict:
+    name = _PIECE_NAMES[piece - 1] if piece else None
+    return {
+        "color": _SIDES[color],
+        "piece": name,
+        "model": f"{name.capitalize()} hologram" if name else None,
+    }
@@ -1,29 +1,195 @@
 # conexão dos players
 
 import asyncio
-from typing import Dict, Any
+import json
+import os
+import time
+from typing import Dict, Any, Optional
 from starlette.websockets import WebSocket
+from .wire import StringTable, encode_state
+from .session import EventRing, SessionStore
+from .metrics import METRICS
+
+# espectadores recebem o estado agrupado a esta taxa (Hz), nunca na frente dos jogadores
+SPECTATOR_HZ = float(os.getenv("REALTIME_SPECTATOR_HZ", "5"))
+SPECTATOR_SEND_TIMEOUT = 2.0
+VIEWER_NAME = "Hologram Viewer"   # o viewer 3D é sempre espectador
+
+# JoinMsg.topics -> campos do payload de estado. Quem assina recebe só esses campos
+# (mais _ALWAYS_FIELDS) e só quando algum deles muda.
+STATE_TOPICS = {
+    "board": ("board", "turn", "inCheckSide", "inCheckKing"),
+    "quiz": ("quiz",),
+    "players": ("players",),
+    "result": ("gameOver", "winnerSide", "winnerName", "outcome"),
+}
+_ALWAYS_FIELDS = ("type", "phase", "seq")
+
+
+def role_for(join) -> str:
+    """Tier de um JoinMsg: espectador se pediu, ou se é o viewer 3D."""
+    return "spectator" if join.role == "spectator" or join.name == VIEWER_NAME else "player"
+
+def encode_json(message: dict) -> str:
+    # mesmo formato do ws.send_json do starlette, mas serializado uma vez só
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+def _text_kind(text: str) -> str:
+    """Tipo de uma mensagem já codificada, para as métricas (sem decodificar)."""
+    if text.startswith('{"type":"state"'):
+        return "state"
+    if text.startswith('{"type":"session"'):
+        return "session"
+    return "other"
+
+async def _close_quietly(ws: WebSocket):
+    try:
+        await ws.close()
+    except Exception:
+        pass
 
 class ConnectionManager:
     def __init__(self):
         self._clients: Dict[str, WebSocket] = {}   # client_id -> ws
         self._meta: Dict[str, dict] = {}          # client_id -> {name, avatar}
+        self._remote: Dict[str, str] = {}         # client_id -> node_id (sockets em outro worker)
+        self.relay = None                         # RoomRelay quando rodando em cluster
+        self.version = 0                          # muda sempre que a lista de jogadores muda
+        self.state_cache = None                   # StatePayloadCache da sala (create_app)
+        self.local_viewer = None                  # LocalStateChannel do viewer 3D nesta máquina (localipc)
+        self.strings = StringTable()              # tabela de strings do protocolo binário
+        self._binary: Dict[str, int] = {}         # client_id -> quantas strings ele já recebeu
+        self._strings_phase = None                # fase do último estado codificado (partida nova -> tabela nova)
+        self._bin_from_text = ("", None)          # (json, frame) -- workers de borda só têm o JSON
+        self._spectators: set = set()             # client_ids no tier de espectador
+        self._spectator_latest = None             # (json, frame, epoch) mais recente ainda não enviado
+        self._spectator_wake = asyncio.Event()
+        self.sessions = SessionStore()            # tokens de retomada (join -> "session")
+        self.events = EventRing()                 # estados recentes, para reenviar só o que faltou
+        self.slots: Dict[str, Optional[str]] = {"white": None, "black": None}  # lado -> client_id
+        self._state_changed = asyncio.Condition()   # acorda os long-polls do GET /state
+        self._topics: Dict[str, frozenset] = {}    # client_id -> campos do estado que ele assina
+        self._topic_sent: Dict[str, str] = {}      # client_id -> o que ele já recebeu (sem seq/relógio)
+        self._topic_cache: Dict[frozenset, list] = {}   # campos -> [json cheio, json filtrado, chave, frame, dict]
 
     def client_count(self) -> int:
-        return len(self._clients)
+        return len(self._clients) + len(self._remote)
+
+    def counts_by_role(self) -> Dict[str, int]:
+        spectators = sum(1 for cid in self._spectators if cid in self._clients)
+        return {"player": len(self._clients) - spectators, "spectator": spectators,
+                "remote": len(self._remote)}
 
     async def connect(self, ws: WebSocket, client_id: str):
         await ws.accept()
         self._clients[client_id] = ws
 
+    def add_remote(self, client_id: str, node_id: str):
+        """Cliente conectado em outro worker; as mensagens dele chegam pelo barramento."""
+        self._remote[client_id] = node_id
+
     def set_meta(self, client_id, meta):
+        """Só jogadores: espectadores (e o viewer 3D) não entram na lista nem na ordem de chegada."""
         if client_id not in self._meta:
             meta["joinOrder"] = len(self._meta)  # 0 = brancas, 1 = pretas
         self._meta[client_id] = meta
+        self.version += 1
+
+    def set_encoding(self, client_id: str, encoding: str):
+        """Negociado no join: "json" (padrão) ou "binary" (realtime/wire.py)."""
+        if encoding == "binary" and client_id in self._clients:
+            # clientes remotos recebem o JSON; quem converte é o worker onde está o socket
+            self._binary.setdefault(client_id, 0)
+        else:
+            self._binary.pop(client_id, None)
+
+    def set_role(self, client_id: str, role: str):
+        """"spectator": sai do broadcast imediato e entra no envio agrupado (run_spectator_pump)."""
+        if role == "spectator":
+            self._spectators.add(client_id)
+        else:
+            self._spectators.discard(client_id)
+
+    def set_topics(self, client_id: str, topics):
+        """JoinMsg.topics: None = estado inteiro; senão só os campos dos tópicos pedidos."""
+        self._topic_sent.pop(client_id, None)
+        if topics is None:
+            self._topics.pop(client_id, None)
+            return
+        fields = set(_ALWAYS_FIELDS)
+        for topic in topics:
+            fields.update(STATE_TOPICS[topic])
+        self._topics[client_id] = frozenset(fields)
+
+    def _forget_topics(self, client_id: str):
+        self._topics.pop(client_id, None)
+        self._topic_sent.pop(client_id, None)
 
     def remove(self, client_id: str):
+        self._forget_topics(client_id)
         self._clients.pop(client_id, None)
-        self._meta.pop(client_id, None)
+        self._remote.pop(client_id, None)
+        self._binary.pop(client_id, None)
+        self._spectators.discard(client_id)
+        self.sessions.drop(client_id)
+        for side, owner in self.slots.items():
+            if owner == client_id:
+                self.slots[side] = None
+        if self._meta.pop(client_id, None) is not None:
+            self.version += 1
+
+    def drop_socket(self, client_id: str, ws: Optional[WebSocket] = None) -> bool:
+        """
+        O socket caiu. Com sessão, o jogador (meta e vaga) fica esperando a volta por
+        RESUME_GRACE segundos e nada muda para os outros -- retorna True. Sem sessão,
+        é um remove normal (False: quem chamou deve avisar a sala).
+        """
+        if ws is not None and self._clients.get(client_id) is not ws:
+            return True   # já foi religado a outro socket (rebind)
+        if client_id in self._clients and self.sessions.detach(client_id):
+            self._clients.pop(client_id, None)
+            self._binary.pop(client_id, None)
+            self._spectators.discard(client_id)
+            self._forget_topics(client_id)
+            asyncio.ensure_future(self._expire_later(client_id))
+            return True
+        self.remove(client_id)
+        return False
+
+    async def _expire_later(self, client_id: str):
+        await asyncio.sleep(self.sessions.grace)
+        if self.sessions.expired(client_id):
+            self.remove(client_id)
+            await self.broadcast_state()
+
+    def rebind(self, new_id: str, old_id: str) -> bool:
+        """Socket novo (new_id) assume o client_id da sessão retomada. Só para sockets locais."""
+        ws = self._clients.pop(new_id, None)
+        if ws is None:
+            return False
+        stale = self._clients.get(old_id)
+        if stale is not None and stale is not ws:
+            asyncio.ensure_future(_close_quietly(stale))
+        self._clients[old_id] = ws
+        self._binary.pop(old_id, None)     # conexão nova: tabela de strings recomeça
+        self._binary.pop(new_id, None)
+        self._spectators.discard(new_id)
+        self._forget_topics(new_id)
+        self._forget_topics(old_id)
+        self._meta.pop(new_id, None)
+        return True
+
+    async def replay(self, client_id: str, last_seq: Optional[int]):
+        """
+        Depois de retomar: nada se o cliente já está em dia; senão o evento mais novo
+        depois de last_seq (cada evento é o estado inteiro, os anteriores já estão
+        vencidos), ou o estado atual se last_seq saiu do buffer.
+        """
+        missed = self.events.since(last_seq) if last_seq is not None else None
+        if missed is None:
+            await self.send_state(client_id)
+        elif missed:
+            await self.send_personal(client_id, missed[-1])
 
     def list_players(self):
         ordered = sorted(
@@ -34,22 +200,203 @@ class ConnectionManager:
             {"id": cid, **meta} for cid, meta in ordered
         ]
 
-    async def send_personal(self, client_id: str, message: dict):
+    async def send_personal(self, client_id: str, message: dict | str):
+        # message: dict ou texto JSON já codificado (StatePayloadCache.text)
+        text = message if isinstance(message, str) else encode_json(message)
         ws = self._clients.get(client_id)
         if ws:
-            await ws.send_json(message)
+            await self._send_to(client_id, ws, text)
+            return
+        origin = self._remote.get(client_id)
+        if origin and self.relay:
+            await self.relay.send_to(origin, client_id, text)
+
+    async def send_local_text(self, client_id: str, text: str):
+        ws = self._clients.get(client_id)
+        if ws:
+            await self._send_to(client_id, ws, text)
+
+    async def send_state(self, client_id: str):
+        """Estado atual para um cliente, no encoding que ele negociou."""
+        ws = self._clients.get(client_id)
+        if ws and client_id in self._binary:
+            await self._send_binary(client_id, ws, self.state_cache.binary())
+        else:
+            await self.send_personal(client_id, self.state_cache.text())
+
+    async def broadcast_state(self):
+        text = self.state_cache.text()
+        self.events.push(self.state_cache.seq, text)
+        frame = self.state_cache.binary() if self._binary else None
+        epoch = self.strings.epoch
+        METRICS.payload_bytes.observe(self.state_cache.json_bytes, "json")
+        if frame is not None:
+            METRICS.payload_bytes.observe(len(frame), "binary")
+        if self.local_viewer is not None:
+            try:
+                self.local_viewer.publish(self.state_cache.payload())
+            except Exception as e:
+                print("WARN localipc:", e)
+        await self.broadcast(text, frame=frame, epoch=epoch)
+
+    def state_seq(self) -> int:
+        """Versão (seq) do estado que este worker serviria agora."""
+        relay = self.relay
+        if relay is not None and not relay.is_owner and relay.last_state:
+            return relay.last_seq
+        return self.state_cache.version()
 
-    async def broadcast(self, message: dict):
+    async def wait_state(self, seq: int, timeout: float) -> bool:
+        """Espera o estado sair da versão `seq`. False se deu timeout antes."""
+        try:
+            async with self._state_changed:
+                await asyncio.wait_for(
+                    self._state_changed.wait_for(lambda: self.state_seq() != seq), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _send_to(self, client_id: str, ws: WebSocket, text: str, frame: Optional[bytes] = None,
+                       epoch: Optional[int] = None):
+        if frame is not None and epoch is not None and epoch != self.strings.epoch:
+            frame = None   # codificado com a tabela de antes do reset: refaz a partir do texto
+        fields = self._topics.get(client_id)
+        if fields is not None and text.startswith('{"type":"state"'):
+            text, key, frame = self._state_for_topics(client_id, text, fields)
+            if key == self._topic_sent.get(client_id):
+                return   # nada do que ele assina mudou
+            self._topic_sent[client_id] = key
+        if client_id in self._binary:
+            frame = frame or self._binary_from_text(text)
+            if frame is not None:
+                await self._send_binary(client_id, ws, frame)
+                return
+        await ws.send_text(text)
+        METRICS.messages_out.inc(_text_kind(text))
+
+    async def _send_binary(self, client_id: str, ws: WebSocket, frame: bytes):
+        # strings novas primeiro: o frame STATE só referencia o que o cliente já tem
+        known = self._binary.get(client_id, 0)
+        total = len(self.strings)
+        if known < total:
+            await ws.send_bytes(self.strings.strings_frame(known))
+            self._binary[client_id] = total
+            METRICS.messages_out.inc("strings")
+        await ws.send_bytes(frame)
+        METRICS.messages_out.inc("state")
+
+    def _state_for_topics(self, client_id: str, text: str, fields: frozenset):
+        """
+        (json filtrado, chave de mudança, frame binário ou None) de um estado para
+        quem assina `fields`. Feito uma vez por estado e conjunto de campos, não por
+        cliente. A chave ignora seq e remainingTime: o viewer conta o tempo pelo deadline.
+        """
+        cached = self._topic_cache.get(fields)
+        if cached is None or cached[0] != text:
+            full = json.loads(text)
+            out = {k: v for k, v in full.items() if k in fields}
+            quiz = out.get("quiz")
+            still = dict(out, seq=None, quiz=dict(quiz, remainingTime=None) if quiz else quiz)
+            cached = self._topic_cache[fields] = [text, encode_json(out), encode_json(still), None, out]
+        if client_id in self._binary and cached[3] is None:
+            cached[3] = encode_state(cached[4], self.strings_for(cached[4]))[0]
+        return cached[1], cached[2], cached[3]
+
+    def strings_for(self, payload: dict) -> StringTable:
+        """
+        Tabela de strings para codificar `payload`. Recomeça vazia quando uma partida
+        nova começa (lobby -> jogo) ou quando está perto do limite de refs u16; cada
+        cliente binário então recebe strings_frame(0) antes do próximo estado.
+        """
+        phase = payload.get("phase")
+        new_match = phase is not None and phase != "lobby" and self._strings_phase == "lobby"
+        if phase is not None:
+            self._strings_phase = phase
+        if (new_match and len(self.strings)) or self.strings.nearly_full:
+            self.strings.reset()
+            for cid in self._binary:
+                self._binary[cid] = 0
+            self._bin_from_text = ("", None)
+            for cached in self._topic_cache.values():
+                cached[3] = None
+        return self.strings
+
+    def _binary_from_text(self, text: str) -> Optional[bytes]:
+        """
+        Frame binário a partir do JSON já codificado (worker de borda só recebe
+        o JSON do dono da sala). None se a mensagem não é de estado.
+        """
+        if self._bin_from_text[0] != text:
+            msg = json.loads(text)
+            frame = encode_state(msg, self.strings_for(msg))[0] if msg.get("type") == "state" else None
+            self._bin_from_text = (text, frame)
+        return self._bin_from_text[1]
+
+    async def broadcast(self, message: dict | str, frame: Optional[bytes] = None, epoch: Optional[int] = None):
+        text = message if isinstance(message, str) else encode_json(message)
+        if self.relay is not None and self.relay.is_owner:
+            try:
+                await self.relay.publish_state(text)
+            except Exception as e:
+                print("WARN publish_state:", e)
+        await self.broadcast_local_text(text, frame, epoch)
+
+    async def broadcast_local_text(self, text: str, frame: Optional[bytes] = None, epoch: Optional[int] = None):
+        """
+        frame: o mesmo estado no protocolo binário, para quem negociou "binary".
+        epoch: strings.epoch de quando o frame foi codificado (padrão: o atual).
+        Jogadores recebem agora; espectadores só ficam com o mais recente para o próximo tick.
+        """
+        async with self._state_changed:
+            self._state_changed.notify_all()
         if not self._clients:
             return
+        if epoch is None:
+            epoch = self.strings.epoch
+        if self._spectators:
+            self._spectator_latest = (text, frame, epoch)
+            self._spectator_wake.set()
         to_drop = []
-        for cid, ws in self._clients.items():
+        started = time.perf_counter()
+        for cid, ws in list(self._clients.items()):
+            if cid in self._spectators:
+                continue
             try:
-                await ws.send_json(message)
+                await self._send_to(cid, ws, text, frame, epoch)
             except Exception:
                 to_drop.append(cid)
+        METRICS.broadcast_seconds.observe(time.perf_counter() - started, "player")
         for cid in to_drop:
-            self.remove(cid)
+            self.drop_socket(cid)
+
+    async def run_spectator_pump(self, hz: float = SPECTATOR_HZ):
+        """
+        Loop do tier de espectadores: no máximo `hz` envios por segundo, sempre do
+        estado mais recente (os intermediários são descartados). Cada tick manda o
+        mesmo texto/frame já codificado para todos, em paralelo e com timeout, numa
+        task separada -- um celular lento não atrasa os jogadores nem os outros.
+        """
+        period = 1.0 / hz
+        while True:
+            await self._spectator_wake.wait()
+            self._spectator_wake.clear()
+            latest, self._spectator_latest = self._spectator_latest, None
+            if latest is not None:
+                text, frame, epoch = latest
+                targets = [(cid, self._clients[cid]) for cid in list(self._spectators) if cid in self._clients]
+                started = time.perf_counter()
+                results = await asyncio.gather(
+                    *(asyncio.wait_for(self._send_to(cid, ws, text, frame, epoch), SPECTATOR_SEND_TIMEOUT)
+                      for cid, ws in targets),
+                    return_exceptions=True,
+                )
+                METRICS.broadcast_seconds.observe(time.perf_counter() - started, "spectator")
+                for (cid, ws), res in zip(targets, results):
+                    if isinstance(res, Exception):
+                        # envio cancelado no meio deixa o socket inutilizável: fecha
+                        self.remove(cid)
+                        asyncio.ensure_future(_close_quietly(ws))
+            await asyncio.sleep(period)
 
     async def recv_json(self, client_id: str) -> Any:
         ws = self._clients.get(client_id)
@@ -4,6 +4,7 @@
 const params = new URLSearchParams(location.search);
 const WS_URL = params.get('ws') || `${location.protocol === 'https:' ? 'wss' : 'ws'}://${location.host}/ws`;
 let playerName = params.get('name') || 'Jogador'; // será sobrescrito pelo input no clique
+const SPECTATE = params.has('spectate');           // ?spectate -> só assiste (estado em taxa menor)
 
 const PIECES_PATH = 'chess-pieces';
 
@@ -281,7 +282,7 @@ enterBtn.addEventListener('click', async ()=>{
   started = true;         // libera o clique do tabuleiro
   gate.style.display='none';
   await ensureWS();
-  ws.send(JSON.stringify({ type:'join', name: playerName }));
+  ws.send(JSON.stringify({ type:'join', name: playerName, role: SPECTATE ? 'spectator' : 'player' }));
   log('<i>Jogo liberado.</i>');
 });
 
@@ -119,6 +119,8 @@ if (activePlayers < 2) {
 }
 
 btnLeave.addEventListener('click', () => {
+  leaving = true;
+  sessionStorage.removeItem(SESSION_KEY);
   try { ws?.close(); } catch {}
   location.href = location.pathname.replace(/[^/]+$/, '') + 'index.html';
 });
@@ -775,6 +777,32 @@ function setTurnFromMessage(msgTurn) {
 
 /* ========== WebSocket ========== */
 
+// sessão retomável: se a rede cair, o join com token volta para a mesma vaga
+// e o servidor manda só os estados depois de lastSeq
+const SESSION_KEY = 'cqb.session';
+let sessionToken = sessionStorage.getItem(SESSION_KEY);
+let lastSeq = null;
+let leaving = false;
+
+function connectWS() {
+  ws = new WebSocket(WS_URL);
+  ws.addEventListener('open', () => {
+    log(`<b>Conectado</b> ${WS_URL}`);
+    ws.send(JSON.stringify({
+      type: 'join', name: playerName,
+      color: myColor === 'b' ? 'black' : (myColor === 'w' ? 'white' : null),
+      token: sessionToken, lastSeq,
+    }));
+  });
+  ws.addEventListener('close', () => {
+    if (leaving) return;
+    log('<b>Desconectado</b> — reconectando...');
+    setTimeout(connectWS, 1000);
+  });
+  ws.addEventListener('error', () => log('<b>Erro de conexão</b>'));
+  ws.addEventListener('message', onMessage);
+}
+
 (function boot() {
   // nome local (UI otimista)
   setPlayersUI(playerName, null);
@@ -787,15 +815,8 @@ function setTurnFromMessage(msgTurn) {
     fetchStateSnapshot(); 
   });
 
-  ws = new WebSocket(WS_URL);
-  ws.addEventListener('open', () => {
-    log(`<b>Conectado</b> ${WS_URL}`);
-    ws.send(JSON.stringify({ type: 'join', name: playerName, color: myColor === 'b' ? 'black' : (myColor === 'w' ? 'white' : null) }));
-  });
-  ws.addEventListener('close', () => log('<b>Desconectado</b>'));
-  ws.addEventListener('error', () => log('<b>Erro de conexão</b>'));
-  ws.addEventListener('message', onMessage);
-  
+  connectWS();
+
   fetchStateSnapshot();
   setTimeout(() => {
     const anyPiece = Array.isArray(board) && board.some(c => !!c);
@@ -934,7 +955,14 @@ function onMessage(ev) {
     return; // não deixe cair em lógicas de players por nome
   }
 
+  if (msg.type === 'session') {
+    sessionToken = msg.token;
+    sessionStorage.setItem(SESSION_KEY, sessionToken);
+    return;
+  }
+
   if (msg.type === 'state') {
+    if (typeof msg.seq === 'number') lastSeq = msg.seq;
     applyStateSnapshot(msg);
     return;
   }
@@ -0,0 +1,58 @@
+// =====================
+// RELÓGIO DO SERVIDOR (ping/pong)
+// =====================
+// O servidor manda quiz.deadline no relógio monotônico dele; aqui estimamos o
+// offset (servidor - local) com pings estilo NTP e o cronômetro roda só no cliente.
+//   rtt    = (t3 - t0) - (t2 - t1)
+//   offset = ((t1 - t0) + (t2 - t3)) / 2
+// Das últimas amostras, fica a de menor RTT. Tudo em segundos.
+const ServerClock = (() => {
+  const WINDOW = 8;
+  const BURST = 5;
+  const INTERVAL_MS = 10000;
+
+  let samples = [];
+  let offset = null;
+  let timer = null;
+
+  function localNow() {
+    return performance.now() / 1000;
+  }
+
+  function sendPing(ws) {
+    if (ws.readyState === WebSocket.OPEN) {
+      ws.send(JSON.stringify({ type: "ping", t0: localNow() }));
+    }
+  }
+
+  // chamar no "open" do socket: rajada curta e depois um ping de vez em quando
+  function start(ws) {
+    stop();
+    for (let i = 0; i < BURST; i++) setTimeout(() => sendPing(ws), i * 200);
+    timer = setInterval(() => sendPing(ws), INTERVAL_MS);
+  }
+
+  function stop() {
+    if (timer) {
+      clearInterval(timer);
+      timer = null;
+    }
+  }
+
+  function onPong(msg) {
+    const t3 = localNow();
+    const rtt = Math.max(0, (t3 - msg.t0) - (msg.t2 - msg.t1));
+    samples.push({ rtt, offset: ((msg.t1 - msg.t0) + (msg.t2 - t3)) / 2 });
+    if (samples.length > WINDOW) samples.shift();
+    offset = samples.reduce((a, b) => (b.rtt < a.rtt ? b : a)).offset;
+  }
+
+  return {
+    start,
+    stop,
+    onPong,
+    synced: () => offset !== null,
+    now: () => localNow() + (offset || 0),
+    remaining: (deadline) => Math.max(0, deadline - (localNow() + (offset || 0))),
+  };
+})();
@@ -20,6 +20,8 @@ let timerMax = 20;
 let timerLeft = 20;
 let timerInterval = null;
 let lastTurnKey = null;
+let deadline = null;  // quiz.deadline (relógio do servidor), se veio
+let localEnd = 0;     // sem deadline/sync: fim da vez em performance.now() (s)
 
 // minha cor: "white"/"black"
 let myColor = null;
@@ -42,26 +44,32 @@ function normalizeColorParam(raw) {
 // =====================
 // TIMER
 // =====================
-function startTimer() {
-  stopTimer();
+function currentRemaining() {
+  if (deadline !== null && ServerClock.synced()) {
+    return ServerClock.remaining(deadline);
+  }
+  return Math.max(0, localEnd - performance.now() / 1000);
+}
 
-  const startedAt = performance.now();
-  timerLeft = Math.max(0, baseRemaining);
+function tickTimer() {
+  timerLeft = currentRemaining();
   updateTimerUI();
 
-  timerInterval = setInterval(() => {
-    const now = performance.now();
-    const elapsed = (now - startedAt) / 1000;
-    const remaining = Math.max(0, baseRemaining - elapsed); // CHANGED
+  if (timerLeft <= 0) {
+    stopTimer();
+    disableOptions();
+  }
+}
 
-    timerLeft = remaining;
-    updateTimerUI();
+// o servidor não manda mais o relógio a cada fração de segundo: a contagem é local
+function startTimer(remaining, turnDeadline) {
+  stopTimer();
 
-    if (remaining <= 0) {
-      stopTimer();
-      disableOptions();
-    }
-  }, 100);
+  deadline = typeof turnDeadline === "number" ? turnDeadline : null;
+  localEnd = performance.now() / 1000 + Math.max(0, remaining);
+  tickTimer();
+
+  timerInterval = setInterval(tickTimer, 100);
 }
 
 
@@ -126,15 +134,10 @@ function applyQuizToUI(q) {
 
   if (turnKey !== lastTurnKey) {                 // só quando de fato troca o turno
     lastTurnKey = turnKey;
-    startTimer(rem);                             // NEW: usa o remaining do backend
-  } else {
-    // só sinc fino: atualiza UI se drift > ~300ms
-    const drift = Math.abs(timerLeft - rem);
-    if (drift > 0.3) {
-      // não reinicia o intervalo; apenas corrige visualização
-      timerLeft = rem;
-      updateTimerUI();
-    }
+    startTimer(rem, q.deadline);                 // deadline manda; rem é o fallback
+  } else if (deadline === null && Math.abs(timerLeft - rem) > 0.3) {
+    // sem deadline: corrige a contagem local se desviou > ~300ms
+    localEnd = performance.now() / 1000 + rem;
   }
 
   // quem responde?
@@ -228,6 +231,7 @@ function connectWS() {
   ws.addEventListener("open", () => {
     console.log("[QUIZ] WS conectado:", wsUrl);
     ws.send(JSON.stringify({ type: "join", name: "quiz-web", avatar: null }));
+    ServerClock.start(ws);
   });
 
   ws.addEventListener("message", (event) => {
@@ -241,11 +245,14 @@ function connectWS() {
 
     if (data.type === "state") {
       handleStateMessage(data);
+    } else if (data.type === "pong") {
+      ServerClock.onPong(data);
     }
   });
 
   ws.addEventListener("close", () => {
     console.log("[QUIZ] WS fechado");
+    ServerClock.stop();
   });
 
   ws.addEventListener("error", (err) => {